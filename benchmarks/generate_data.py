@@ -0,0 +1,141 @@
+# 基准测试数据生成器
+
+# benchmarks/generate_data.py
+"""
+生成可复现的合成 data/ 目录（固定随机种子）
+- 场景：scenes.json + tables/*.csv，行数可从 1 万到 1000 万（逐行流式写入，内存占用恒定）
+- 便签：数百条含中日韩文字的 notes.json
+- Flag：大量带起止时间、运行状态的 flags.json
+
+用法：
+    python benchmarks/generate_data.py /tmp/systema_bench --rows 10000 100000 --notes 300 --flags 500
+生成后 <输出目录>/data 即为可直接使用的数据目录
+"""
+
+import argparse
+import csv
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 保证从任意目录运行都能导入项目模块
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import DIZHI_SCENE, DIZHI_FLAG, TIANGAN, MAX_SCENES
+
+CJK_SAMPLES = (
+    "今天完成了数据整理，明天继续推进项目。",
+    "会议纪要：讨论了下一阶段的目标与分工。",
+    "読書メモ：第三章の要点をまとめる。",
+    "회의 내용 정리 및 다음 일정 확인.",
+    "记得买菜、交水电费、给家里打电话。",
+    "灵感：用天干地支给场景和任务命名。",
+)
+CATEGORIES = ("餐饮", "交通", "购物", "学习", "娱乐", "医疗", "其他")
+
+# 场景字段：覆盖 str / int / float / date / enum 各类型
+SCENE_FIELDS = [
+    "名称",
+    {"name": "日期", "type": "date"},
+    {"name": "金额", "type": "float"},
+    {"name": "数量", "type": "int"},
+    {"name": "类别", "type": "enum", "options": list(CATEGORIES)},
+    "备注",
+]
+
+def write_scene_csv(path: Path, rows: int, rng: random.Random):
+    """逐行写入，避免千万行时占用大量内存"""
+    start = datetime(2020, 1, 1)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["名称", "日期", "金额", "数量", "类别", "备注"])
+        for i in range(rows):
+            writer.writerow([
+                f"记录{i}",
+                (start + timedelta(days=rng.randrange(2000))).date().isoformat(),
+                f"{rng.uniform(0, 1000):.2f}",
+                rng.randrange(1, 100),
+                rng.choice(CATEGORIES),
+                rng.choice(CJK_SAMPLES) if rng.random() < 0.3 else "",
+            ])
+
+def make_note(i: int, rng: random.Random, paragraphs: int) -> dict:
+    created = datetime(2024, 1, 1) + timedelta(minutes=rng.randrange(500000))
+    return {
+        "display_name": TIANGAN[i % len(TIANGAN)] + str(i // len(TIANGAN) or ""),
+        "title": rng.choice(CJK_SAMPLES)[:8],
+        "content": "\n".join(rng.choice(CJK_SAMPLES) for _ in range(paragraphs)),
+        "status": rng.choice(("active", "active", "completed", "discarded")),
+        "created_at": created.isoformat(),
+        "updated_at": (created + timedelta(hours=rng.randrange(100))).isoformat(),
+        "finished_at": "",
+        "discarded_at": "",
+    }
+
+def make_flag(i: int, rng: random.Random) -> dict:
+    start = datetime(2024, 1, 1) + timedelta(hours=rng.randrange(20000))
+    target = start + timedelta(hours=rng.randrange(1, 500))
+    status = rng.choice(("active", "completed", "discarded"))
+    finished = start + timedelta(hours=rng.randrange(1, 600))
+    return {
+        "name": DIZHI_FLAG[i % len(DIZHI_FLAG)] + str(i // len(DIZHI_FLAG) or ""),
+        "target_time": target.isoformat(),
+        "start_time": start.isoformat(),
+        "content": rng.choice(CJK_SAMPLES),
+        "status": status,
+        "finished_at": finished.isoformat() if status == "completed" else "",
+        "discarded_at": finished.isoformat() if status == "discarded" else "",
+        "span_seconds": int((target - start).total_seconds()),
+        "running": False,
+        "paused": False,
+        "paused_duration": rng.randrange(0, 3600),
+        "pause_start_time": None,
+    }
+
+def generate(root: Path, rows_list, notes: int, flags: int, paragraphs: int = 20, seed: int = 20240101) -> dict:
+    """
+    在 root/data 下生成完整数据目录，并写入 root/manifest.json
+    场景数受 MAX_SCENES 限制，依次占用地支名称（子、丑…）；返回 manifest
+    """
+    if len(rows_list) > MAX_SCENES:
+        raise ValueError(f"最多生成 {MAX_SCENES} 个场景")
+    rng = random.Random(seed)
+    data_dir = root / "data"
+    tables_dir = data_dir / "tables"
+    tables_dir.mkdir(parents=True, exist_ok=True)
+
+    scenes = {name: ["标签1"] for name in DIZHI_SCENE}
+    scene_rows = {}
+    for name, rows in zip(DIZHI_SCENE, rows_list):
+        scenes[name] = SCENE_FIELDS
+        scene_rows[name] = rows
+        write_scene_csv(tables_dir / f"{name}.csv", rows, rng)
+    with open(data_dir / "scenes.json", "w", encoding="utf-8") as f:
+        json.dump(scenes, f, ensure_ascii=False, indent=2)
+
+    with open(data_dir / "notes.json", "w", encoding="utf-8") as f:
+        json.dump([make_note(i, rng, paragraphs) for i in range(notes)], f, ensure_ascii=False, indent=2)
+    with open(data_dir / "flags.json", "w", encoding="utf-8") as f:
+        json.dump([make_flag(i, rng) for i in range(flags)], f, ensure_ascii=False, indent=2)
+
+    manifest = {"seed": seed, "scenes": scene_rows, "notes": notes, "flags": flags, "paragraphs": paragraphs}
+    with open(root / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="生成 Systema 基准测试数据")
+    parser.add_argument("root", type=Path, help="输出根目录（将在其中创建 data/）")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000], help="每个场景的行数，可给多个")
+    parser.add_argument("--notes", type=int, default=300)
+    parser.add_argument("--flags", type=int, default=500)
+    parser.add_argument("--paragraphs", type=int, default=20, help="每条便签的段落数")
+    parser.add_argument("--seed", type=int, default=20240101)
+    args = parser.parse_args()
+    manifest = generate(args.root, args.rows, args.notes, args.flags, args.paragraphs, args.seed)
+    print(f"已生成：{args.root / 'data'}  场景行数：{manifest['scenes']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# 基准测试入口
+
+# benchmarks/run_benchmarks.py
+"""
+可复现的基准测试
+- 使用 generate_data 生成（或复用）合成数据目录，在其中无界面运行（Qt offscreen 平台）
+- 测量 load_records / load_scene_table / save_records / TableWorkspace.load_data /
+  二进制列式格式的 load_scene_table / save_scene_table / JSON 序列化方案（stdlib / orjson，
+  缩进 / 紧凑，流式解析）/ load_notes / save_notes / load_flags / save_flags 的耗时（多次取最小值与中位数）与峰值内存（tracemalloc）
+- 结果输出为 JSON，可用 --compare 与另一版本的结果对比
+
+用法：
+    python benchmarks/run_benchmarks.py --rows 10000 100000 --output bench.json
+    python benchmarks/run_benchmarks.py --root /tmp/systema_bench --compare old.json
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from generate_data import generate
+
+
+def measure(func, repeat: int) -> dict:
+    """运行 repeat 次取耗时，再单独运行一次测峰值内存（tracemalloc 会拖慢速度，不计入耗时）"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "runs": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "peak_mb": peak / (1024 * 1024),
+    }
+
+def run(root: Path, repeat: int, with_qt: bool) -> dict:
+    # 项目模块使用相对路径 data/，必须先切换工作目录
+    os.chdir(root)
+    from config import APP_VERSION, NUMPY_AVAILABLE, PYQT6_AVAILABLE, NOTES_FILE, FLAGS_FILE
+    import data_utils
+
+    manifest = json.loads((root / "manifest.json").read_text(encoding="utf-8"))
+    scenes = data_utils.load_scenes()
+    results = {}
+
+    def bench(name, func):
+        print(f"  {name} ...", end="", flush=True)
+        results[name] = measure(func, repeat)
+        print(f" {results[name]['median_s'] * 1000:.1f} ms, 峰值 {results[name]['peak_mb']:.1f} MB")
+
+    workspace = None
+    if with_qt and PYQT6_AVAILABLE:
+        from PyQt6.QtWidgets import QApplication
+        from ui.table_workspace import TableWorkspace
+        app = QApplication.instance() or QApplication([])
+        workspace = TableWorkspace()
+        workspace.build_ui()
+
+    for scene_name, rows in manifest["scenes"].items():
+        fields = scenes[scene_name]
+        records = data_utils.load_records(scene_name, fields)
+        bench(f"load_records[{rows}]", lambda: data_utils.load_records(scene_name, fields))
+        bench(f"load_scene_table[{rows}]", lambda: data_utils.load_scene_table(scene_name, fields))
+        bench(f"save_records[{rows}]", lambda: data_utils.save_records(scene_name, fields, records))
+        if workspace is not None:
+            bench(f"TableWorkspace.load_data[{rows}]", lambda: workspace.load_data(fields, records))
+        del records
+
+        # 同一场景转换为 .scol 后再测一遍，结束后转回 CSV，保持数据目录不变
+        data_utils.convert_scene_storage(scene_name, fields, "binary")
+        table = data_utils.load_scene_table(scene_name, fields)
+        bench(f"load_scene_table.binary[{rows}]", lambda: data_utils.load_scene_table(scene_name, fields))
+        bench(f"save_scene_table.binary[{rows}]", lambda: data_utils.save_scene_table(scene_name, table))
+        results[f"file_size_kb[{rows}]"] = {
+            "csv": None,
+            "binary": data_utils.get_scene_binary_file(scene_name).stat().st_size / 1024,
+        }
+        del table
+        data_utils.convert_scene_storage(scene_name, fields, "csv")
+        results[f"file_size_kb[{rows}]"]["csv"] = data_utils.get_scene_data_file(scene_name).stat().st_size / 1024
+
+    # 保存时写回完整原始列表，保证多次运行的数据规模不变
+    _, raw_notes = data_utils._read_json(NOTES_FILE, [])
+    _, raw_flags = data_utils._read_json(FLAGS_FILE, [])
+    bench(f"load_notes[{manifest['notes']}]", data_utils.load_notes)
+    bench(f"save_notes[{manifest['notes']}]", lambda: data_utils.save_notes(raw_notes))
+    bench(f"load_flags[{manifest['flags']}]", data_utils.load_flags)
+    bench(f"save_flags[{manifest['flags']}]", lambda: data_utils.save_flags(raw_flags))
+
+    # JSON 序列化方案对比：以最大场景的全部记录作为大体量负载
+    from serializer import ORJSON_AVAILABLE, dumps, loads, load_streaming
+    largest = max(manifest["scenes"], key=manifest["scenes"].get)
+    payload = {"schema": 1, "revision": 1, "items": data_utils.load_records(largest, scenes[largest])}
+    sizes = results["json_size_kb"] = {}
+    backends = ["stdlib", "orjson"] if ORJSON_AVAILABLE else ["stdlib"]
+    for backend in backends:
+        for compact in (False, True):
+            label = f"{backend}.{'compact' if compact else 'indent'}"
+            encoded = dumps(payload, compact=compact, backend=backend)
+            sizes[label] = len(encoded) / 1024
+            bench(f"json.dumps.{label}", lambda: dumps(payload, compact=compact, backend=backend))
+            bench(f"json.loads.{label}", lambda: loads(encoded, backend=backend))
+    text = dumps(payload, compact=True, backend="stdlib").decode("utf-8")
+    bench("json.load_streaming", lambda: load_streaming(io.StringIO(text)))
+    del payload, encoded, text
+
+    return {
+        "version": APP_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": NUMPY_AVAILABLE,
+        "orjson": ORJSON_AVAILABLE,
+        "qt": workspace is not None,
+        "repeat": repeat,
+        "manifest": manifest,
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict):
+    """按中位数耗时对比两次结果，ratio > 1 表示变慢"""
+    print(f"\n对比：{baseline.get('version')} → {current.get('version')}")
+    print(f"{'项目':<40}{'基线(ms)':>12}{'当前(ms)':>12}{'比值':>8}")
+    for name, cur in current["results"].items():
+        if "median_s" not in cur:
+            continue
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:<40}{'-':>12}{cur['median_s'] * 1000:>12.1f}{'新增':>8}")
+            continue
+        ratio = cur["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        print(f"{name:<40}{base['median_s'] * 1000:>12.1f}{cur['median_s'] * 1000:>12.1f}{ratio:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Systema 基准测试")
+    parser.add_argument("--root", type=Path, help="已生成的数据根目录（含 manifest.json）；不指定则生成到临时目录")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--notes", type=int, default=300)
+    parser.add_argument("--flags", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=20240101)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-qt", action="store_true", help="跳过需要 Qt 的测试项")
+    parser.add_argument("--output", type=Path, help="结果 JSON 输出路径")
+    parser.add_argument("--compare", type=Path, help="与之前的结果 JSON 对比")
+    args = parser.parse_args()
+
+    output = args.output.resolve() if args.output else None
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+
+    if args.root:
+        root = args.root.resolve()
+    else:
+        root = Path(tempfile.mkdtemp(prefix="systema_bench_"))
+        print(f"生成数据到 {root} ...")
+        generate(root, args.rows, args.notes, args.flags, seed=args.seed)
+
+    result = run(root, args.repeat, with_qt=not args.no_qt)
+    if output:
+        output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"结果已写入 {output}")
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    if baseline:
+        compare(result, baseline)
+
+if __name__ == "__main__":
+    main()
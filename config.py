@@ -9,20 +9,71 @@ Systema 全局配置与常量定义
 from pathlib import Path
 import sys
 
+# ===================== 版本 =====================
+APP_VERSION = "4.7.1.3"
+
 # ===================== 数据存储相关 =====================
 DATA_DIR = Path("data")
 SCENES_FILE = DATA_DIR / "scenes.json"      # 场景字段定义
 FLAGS_FILE = DATA_DIR / "flags.json"        # Flag 任务数据
 NOTES_FILE = DATA_DIR / "notes.json"        # 便签笔记数据（你之前用 sticky_notes.json，这里统一改成 notes.json）
+FLAG_EVENTS_FILE = DATA_DIR / "flag_events.log"  # Flag 计时事件日志（追加写入，见 flag_events.py）
+FLAG_HISTORY_FILE = DATA_DIR / "flag_history.log"  # Flag 结束记录（追加写入，见 flag_analytics.py）
+STARTUP_LOG_FILE = DATA_DIR / "startup.log"  # 每次启动各阶段耗时（追加写入，见 startup.py）
+
+# scenes.json / flags.json / notes.json 的数据格式版本（见 data_utils 中的迁移表）
+DATA_SCHEMA_VERSION = 2
+
+# JSON 序列化（见 serializer.py）
+JSON_BACKEND = "auto"            # "auto"（有 orjson 用 orjson）/ "orjson" / "stdlib"
+JSON_COMPACT = True              # 数据文件不缩进（仅程序读写；需要手工查看时可改为 False）
+JSON_STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024  # 超过该大小的数据文件按块流式解析
 
 # 每个场景的独立数据文件目录（CSV）
 TABLES_DIR = DATA_DIR / "tables"
 
+# 便签正文压缩存储目录（notes.json 只保存元数据和正文哈希）
+NOTES_CONTENT_DIR = DATA_DIR / "notes"
+NOTE_CACHE_MAX_BYTES = 4 * 1024 * 1024  # 内存中保留的便签正文上限（按 UTF-8 字节计，LRU 淘汰）
+NOTE_LARGE_CHARS = 1024 * 1024          # 正文超过该字符数时以大文档模式打开（不自动换行、分块载入）
+NOTE_LOAD_CHUNK_CHARS = 256 * 1024      # 大文档每次事件循环载入的字符数
+
+# 超大场景分页浏览（见 scene_pages.py，只支持 CSV 存储）
+SCENE_PAGE_ROWS = 10000                             # 每页行数
+SCENE_PAGE_PREFETCH = 1                             # 常驻当前页前后各几页（后台预读）
+SCENE_PAGED_THRESHOLD_BYTES = 256 * 1024 * 1024     # CSV 超过该大小时自动以分页方式打开
+
+# 场景二进制存储（.scol）的默认压缩方式："zlib" / "zstd"（需安装 zstandard）/ "none"
+SCENE_BINARY_COMPRESSION = "zlib"
+
 # 最大数量限制
 MAX_SCENES = 6
 MAX_FLAGS = 6
 MAX_NOTES = 10
 
+# ===================== 多进程访问 =====================
+LOCK_TIMEOUT_SECONDS = 10  # 等待其他实例释放数据文件写锁的最长时间
+
+# ===================== 保存调度 =====================
+SAVE_BATCH_INTERVAL_MS = 1000  # 同一文件在该间隔内的多次修改合并为一次后台写入
+
+FLAG_CHECKPOINT_EVENTS = 50  # 累计多少个 Flag 事件后把状态写入 flags.json 并压缩事件日志
+FLAG_REMINDER_BEFORE_SECONDS = 15 * 60  # 截止前多久提醒一次（0 表示只在到期时提醒）
+
+# ===================== 剪贴板 =====================
+CLIPBOARD_MAX_BYTES = 64 * 1024 * 1024  # 单次复制 / 粘贴的 TSV 文本上限，超出时提示分次操作
+CLIPBOARD_CHUNK_ROWS = 4096             # 生成 TSV 时每块的行数
+
+# ===================== 文件监视 =====================
+WATCH_DEBOUNCE_MS = 400  # 外部修改 data/ 后合并连续事件的等待时间
+
+# ===================== 快照备份 =====================
+BACKUP_DIR = Path("backups")  # 放在 data/ 之外：不会触发文件监视，也不会被备份进快照
+BACKUP_KEEP = 30              # 最多保留的快照数（超出时删除最旧的快照及不再引用的文件）
+
+# ===================== 性能诊断 =====================
+PROFILE_ENV = "SYSTEMA_PROFILE"  # 设置为 1 启用性能埋点（见 profiler.py）
+
 # ===================== 天干地支（用于默认名称） =====================
 TIANGAN = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
 DIZHI_SCENE = ["子", "丑", "寅", "卯", "辰", "巳"]      # Mode 0 场景默认名称
@@ -37,11 +88,20 @@ try:
 except ImportError:
     pass
 
+# ===================== 可选依赖 =====================
+NUMPY_AVAILABLE = False
+try:
+    import numpy
+    NUMPY_AVAILABLE = True
+except ImportError:
+    pass
+
 # ===================== 工具函数（可选放这里或移到 data_utils） =====================
 def ensure_data_dir():
     """确保 data 目录及其子目录存在"""
     DATA_DIR.mkdir(exist_ok=True)
     TABLES_DIR.mkdir(exist_ok=True)
+    NOTES_CONTENT_DIR.mkdir(exist_ok=True)
 
 # ===================== 字体设置（全局） =====================
 def get_default_font():
@@ -0,0 +1,198 @@
+# data/ 目录的增量快照备份与恢复
+
+# data_backup.py
+"""
+data/ 目录的快照备份
+- 文件按内容寻址存放：backups/objects/<sha256 前两位>/<sha256>.z（zlib 压缩），
+  内容相同的文件（包括不同快照中未修改的文件）只存一份
+- 每个快照是一份清单 backups/snapshots/<快照 id>.json：{相对路径: {hash, size, mtime_ns}}
+- 增量：文件的 (mtime_ns, size) 与上一个快照一致时直接沿用其哈希，不重新读取
+- 读取每个文件时持有与写入方相同的文件锁（file_lock.locked），不会读到保存到一半的内容；
+  调用方应先写完待保存的数据（SaveCoordinator.flush_now）
+- 恢复前自动做一次快照，恢复时只改写内容不同的文件，并删除快照之后新增的数据文件
+- 全部函数都是阻塞的，由 UI 放到后台线程执行
+"""
+
+import hashlib
+import os
+import zlib
+from contextlib import nullcontext
+from datetime import datetime
+
+import serializer
+from config import DATA_DIR, NOTES_CONTENT_DIR, BACKUP_DIR, BACKUP_KEEP
+from file_lock import locked, atomic_write
+from profiler import timed, incr
+
+OBJECTS_DIR = BACKUP_DIR / "objects"
+SNAPSHOTS_DIR = BACKUP_DIR / "snapshots"
+SKIP_SUFFIXES = (".lock", ".tmp", ".idx.json", ".pages.json")  # 锁、临时文件与可重建的索引缓存
+SKIP_NAMES = ("profile.json", "startup.log")  # 诊断数据
+NOTES_PREFIX = NOTES_CONTENT_DIR.relative_to(DATA_DIR).as_posix() + "/"
+
+
+def object_path(digest: str):
+    return OBJECTS_DIR / digest[:2] / f"{digest}.z"
+
+def iter_data_files():
+    """data/ 下需要备份的文件（相对路径，/ 分隔）"""
+    if not DATA_DIR.exists():
+        return
+    for root, dirs, files in os.walk(DATA_DIR):
+        dirs.sort()
+        for name in sorted(files):
+            if name.startswith(".") or name.endswith(SKIP_SUFFIXES) or name in SKIP_NAMES:
+                continue
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, DATA_DIR).replace(os.sep, "/")
+
+def _lock_for(rel: str):
+    """与写入方相同的文件锁；便签正文文件写入后不再修改，不需要加锁"""
+    return nullcontext() if rel.startswith(NOTES_PREFIX) else locked(DATA_DIR / rel)
+
+def _read_locked(rel: str) -> tuple:
+    """在文件锁内读取整个文件，返回 (内容, mtime_ns, size)"""
+    with _lock_for(rel), open(DATA_DIR / rel, "rb") as f:
+        st = os.fstat(f.fileno())
+        return f.read(), st.st_mtime_ns, st.st_size
+
+def _store_object(data: bytes) -> tuple:
+    """存入对象库（已存在则跳过），返回 (哈希, 是否新写入)"""
+    digest = hashlib.sha256(data).hexdigest()
+    path = object_path(digest)
+    if path.exists():
+        return digest, False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(path, binary=True) as f:
+        f.write(zlib.compress(data, 6))
+    return digest, True
+
+def read_object(digest: str) -> bytes:
+    """读取对象并校验哈希，损坏时抛出 ValueError"""
+    with open(object_path(digest), "rb") as f:
+        data = zlib.decompress(f.read())
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"备份文件已损坏：{digest}")
+    return data
+
+# ===================== 快照清单 =====================
+def load_manifest(snapshot_id: str) -> dict:
+    with open(SNAPSHOTS_DIR / f"{snapshot_id}.json", "rb") as f:
+        return serializer.loads(f.read())
+
+def list_snapshots() -> list:
+    """全部快照清单，最新的在前"""
+    if not SNAPSHOTS_DIR.exists():
+        return []
+    result = []
+    for path in sorted(SNAPSHOTS_DIR.glob("*.json"), reverse=True):
+        try:
+            result.append(load_manifest(path.stem))
+        except (OSError, ValueError) as e:
+            print(f"警告: 快照清单 {path.name} 无法读取: {e}")
+    return result
+
+def _new_snapshot_id() -> str:
+    """定长的时间戳 id，按文件名排序即按时间排序"""
+    return datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+# ===================== 备份 / 恢复 =====================
+@timed("backup.create_snapshot")
+def create_snapshot(label: str = "", keep: int = BACKUP_KEEP) -> dict:
+    """
+    对 data/ 做一次快照，返回清单（额外带 new_objects / reused 统计）
+    与最新快照完全相同时不写新清单，返回的清单带 unchanged=True；keep 为 None 时不清理旧快照
+    """
+    snapshots = list_snapshots()
+    previous = snapshots[0]["files"] if snapshots else {}
+    files = {}
+    new_objects = reused = 0
+    for rel in iter_data_files():
+        path = DATA_DIR / rel
+        try:
+            st = path.stat()
+        except OSError:
+            continue  # 扫描后被删除
+        old = previous.get(rel)
+        if old and old["mtime_ns"] == st.st_mtime_ns and old["size"] == st.st_size and object_path(old["hash"]).exists():
+            files[rel] = old
+            reused += 1
+            continue
+        try:
+            data, mtime_ns, size = _read_locked(rel)
+        except FileNotFoundError:
+            continue
+        digest, created = _store_object(data)
+        new_objects += created
+        files[rel] = {"hash": digest, "size": size, "mtime_ns": mtime_ns}
+    incr("backup.files_reused", reused)
+    incr("backup.objects_written", new_objects)
+
+    if snapshots and {k: v["hash"] for k, v in files.items()} == {k: v["hash"] for k, v in previous.items()}:
+        return dict(snapshots[0], unchanged=True, new_objects=0, reused=reused)
+    manifest = {
+        "id": _new_snapshot_id(),
+        "created_at": datetime.now().isoformat(),
+        "label": label,
+        "size": sum(v["size"] for v in files.values()),
+        "files": files,
+    }
+    SNAPSHOTS_DIR.mkdir(parents=True, exist_ok=True)
+    with atomic_write(SNAPSHOTS_DIR / f"{manifest['id']}.json", binary=True) as f:
+        f.write(serializer.dumps(manifest, compact=True))
+    if keep is not None:
+        prune_snapshots(keep)
+    return dict(manifest, new_objects=new_objects, reused=reused)
+
+@timed("backup.restore_snapshot")
+def restore_snapshot(snapshot_id: str) -> dict:
+    """
+    把 data/ 恢复为指定快照（恢复前自动备份当前状态），返回 {"restored", "removed", "safety"}
+    内容与快照相同的文件不改写；便签正文文件按内容寻址，多出来的保留（由 note_store.prune_blobs 清理）
+    """
+    target = load_manifest(snapshot_id)["files"]
+    for entry in target.values():
+        if not object_path(entry["hash"]).exists():
+            raise ValueError(f"快照 {snapshot_id} 不完整：缺少备份文件 {entry['hash']}")
+    # 安全快照此时不清理：要恢复的快照可能正是最旧、会被淘汰的那个
+    safety = create_snapshot(label=f"恢复 {snapshot_id} 前自动备份", keep=None)
+    current = safety["files"]
+
+    restored = removed = 0
+    for rel, entry in target.items():
+        if rel in current and current[rel]["hash"] == entry["hash"]:
+            continue
+        path = DATA_DIR / rel
+        data = read_object(entry["hash"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _lock_for(rel), atomic_write(path, binary=True) as f:
+            f.write(data)
+        restored += 1
+    for rel in current:
+        if rel not in target and not rel.startswith(NOTES_PREFIX):
+            with _lock_for(rel):
+                (DATA_DIR / rel).unlink(missing_ok=True)
+            removed += 1
+    prune_snapshots(protect=(snapshot_id, safety["id"]))
+    return {"restored": restored, "removed": removed, "safety": safety["id"]}
+
+def prune_snapshots(keep: int = BACKUP_KEEP, protect=()) -> int:
+    """
+    只保留最新的 keep 个快照（protect 中的快照 id 始终保留），
+    并删除不再被任何快照引用的备份文件，返回删除的文件数
+    """
+    if not SNAPSHOTS_DIR.exists():
+        return 0
+    manifests = sorted(SNAPSHOTS_DIR.glob("*.json"), reverse=True)
+    expired = [path for path in manifests[keep:] if path.stem not in protect]
+    for path in expired:
+        path.unlink(missing_ok=True)
+    if not expired or not OBJECTS_DIR.exists():
+        return 0
+    live = {entry["hash"] for snapshot in list_snapshots() for entry in snapshot["files"].values()}
+    deleted = 0
+    for path in OBJECTS_DIR.glob("*/*.z"):
+        if path.stem not in live:
+            path.unlink(missing_ok=True)
+            deleted += 1
+    return deleted
@@ -6,45 +6,207 @@
 负责 scenes.json / flags.json / notes.json / 各个场景 CSV 的读写
 """
 
-import json
+import copy
 from pathlib import Path
 import csv
 from datetime import datetime
 from config import (
-    DATA_DIR, SCENES_FILE, FLAGS_FILE, NOTES_FILE, TABLES_DIR,
-    MAX_SCENES, MAX_FLAGS, MAX_NOTES,
+    DATA_DIR, SCENES_FILE, FLAGS_FILE, NOTES_FILE, TABLES_DIR, FLAG_EVENTS_FILE, FLAG_HISTORY_FILE,
+    MAX_SCENES, MAX_FLAGS, MAX_NOTES, DATA_SCHEMA_VERSION, JSON_STREAM_THRESHOLD_BYTES,
     DIZHI_SCENE, DIZHI_FLAG, TIANGAN,ensure_data_dir
 )
+from scene_types import SceneTable, field_names
+from scene_storage import write_scene_binary, read_scene_binary, iter_binary_records
+import serializer
+import flag_events
+from flag_analytics import append_history, backfill_history
+from note_store import externalize_content, prune_blobs
+from profiler import timed, incr
+from file_lock import locked, atomic_write
 
 # ===================== 通用工具 =====================
+_written_stamps = {}  # 文件路径 → 本进程最后一次写入后的文件戳（文件监视器据此忽略自身写入）
+
 def get_scene_data_file(scene_name: str) -> Path:
     """获取指定场景的 CSV 数据文件路径"""
     return TABLES_DIR / f"{scene_name}.csv"
 
-# ===================== Scenes (Mode 0 数据表格) =====================
-def load_scenes():
+def get_scene_binary_file(scene_name: str) -> Path:
+    """获取指定场景的二进制列式数据文件路径"""
+    return TABLES_DIR / f"{scene_name}.scol"
+
+def get_scene_storage(scene_name: str) -> str:
+    """场景当前的存储格式：binary（存在 .scol 文件）或 csv"""
+    return "binary" if get_scene_binary_file(scene_name).exists() else "csv"
+
+def get_scene_file(scene_name: str) -> Path:
+    """场景当前实际使用的数据文件"""
+    if get_scene_storage(scene_name) == "binary":
+        return get_scene_binary_file(scene_name)
+    return get_scene_data_file(scene_name)
+
+def file_stamp(path):
+    """文件戳 (mtime_ns, size)，文件不存在时为 None；用于判断缓存是否过期"""
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def mark_written(path):
+    """记录本进程刚写入的文件戳"""
+    _written_stamps[str(Path(path))] = file_stamp(path)
+
+def is_own_write(path) -> bool:
+    """文件当前内容是否就是本进程最后一次写入的内容"""
+    key = str(Path(path))
+    return key in _written_stamps and _written_stamps[key] == file_stamp(path)
+
+# ===================== 版本号与跨进程合并 =====================
+# JSON 数据文件格式：{"schema": 数据格式版本, "revision": 写入次数, "items": 数据}
+# 旧版（无包装，或只有 revision 的包装）按 schema 0 读取
+# 每次保存都在文件锁内读取磁盘版本：与加载时一致则直接写入，否则先按实体合并再写入
+_snapshots = {}  # 文件路径 → (加载/保存时的 revision, {实体 id: 实体副本})
+
+SCHEMA_UNREADABLE = -1  # 文件缺失/为空/损坏：按最旧格式迁移出默认数据，但不回写
+
+def _read_versioned(path: Path, default):
+    """读取 JSON 数据文件，返回 (schema, revision, 数据)"""
+    if not path.exists():
+        return SCHEMA_UNREADABLE, 0, default
+    try:
+        if path.stat().st_size > JSON_STREAM_THRESHOLD_BYTES:
+            with open(path, "r", encoding="utf-8") as f:
+                data = serializer.load_streaming(f)
+        else:
+            with open(path, "rb") as f:
+                content = f.read().strip()
+            if not content:
+                return SCHEMA_UNREADABLE, 0, default  # 空文件
+            data = serializer.loads(content)
+    except ValueError:  # json.JSONDecodeError / orjson.JSONDecodeError 均为 ValueError 子类
+        print(f"警告: {path.name} 格式错误，已使用默认数据")
+        return SCHEMA_UNREADABLE, 0, default
+    except Exception as e:
+        print(f"加载 {path.name} 失败: {e}")
+        return SCHEMA_UNREADABLE, 0, default
+    if isinstance(data, dict) and isinstance(data.get("revision"), int) and "items" in data:
+        return data.get("schema", 0), data["revision"], data["items"]
+    return 0, 0, data
+
+def _read_json(path: Path, default):
+    """读取 JSON 数据文件，返回 (revision, 数据)；文件缺失/为空/损坏时返回 (0, default)"""
+    _, revision, data = _read_versioned(path, default)
+    return revision, data
+
+def _write_json(path: Path, payload, revision: int):
+    """原子写入带版本号的 JSON 数据文件（调用方负责加锁），始终写为当前数据格式"""
+    data = serializer.dumps({"schema": DATA_SCHEMA_VERSION, "revision": revision, "items": payload})
+    with atomic_write(path, binary=True) as f:
+        f.write(data)
+    mark_written(path)
+
+def _baseline(revision: int, items: list):
+    """生成合并基线 (revision, {id: 深拷贝})，UI 之后对列表的原地修改不会影响基线"""
+    return revision, {
+        item["id"]: copy.deepcopy(item) for item in items if isinstance(item, dict) and "id" in item
+    }
+
+def _remember(path: Path, revision: int, items: list):
+    _snapshots[str(path)] = _baseline(revision, items)
+
+def adopt_baseline(kind: str, baseline):
     """
-    加载 scenes.json，兼容旧版默认名称
-    - 增加 try-except 和空文件处理，防止崩溃
+    UI 采用一次加载结果时调用（GUI 线程）：把该次加载的基线设为下次保存的合并基线
+    加载函数本身不修改基线，后台读取后被丢弃的结果不会让外部修改在下次保存时被覆盖
     """
-    scenes = {}
-    raw_data = {}
+    path = {"flags": FLAGS_FILE, "notes": NOTES_FILE}[kind]
+    _snapshots[str(path)] = baseline
 
-    if SCENES_FILE.exists():
-        try:
-            with open(SCENES_FILE, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:
-                    raw_data = {}  # 空文件
-                else:
-                    raw_data = json.loads(content)
-        except json.JSONDecodeError:
-            print(f"警告: scenes.json 格式错误，已使用默认数据")
-            raw_data = {}
-        except Exception as e:
-            print(f"加载 scenes.json 失败: {e}")
-            raw_data = {}
-    else:
+def merge_entities(base: dict, ours: list, theirs: list):
+    """
+    按实体 id 三方合并，返回 (合并结果, 采纳的外部修改数)
+    - 只有一方改动的实体取改动方；双方都改动时取 updated_at 较新者（相同或缺失时保留本地）
+    - 对方新增的实体追加到末尾；没有 id 的本地实体原样保留
+    - 删除与修改冲突时保留修改：本地删除、对方修改过的实体重新加入
+    """
+    theirs_by_id = {t["id"]: t for t in theirs if isinstance(t, dict) and "id" in t}
+    merged, external = [], 0
+    for item in ours:
+        item_id = item.get("id")
+        theirs_item = theirs_by_id.pop(item_id, None)
+        base_item = base.get(item_id)
+        if theirs_item is None or theirs_item == base_item or theirs_item == item:
+            merged.append(item)
+        elif item == base_item or theirs_item.get("updated_at", "") > item.get("updated_at", ""):
+            merged.append(theirs_item)
+            external += 1
+        else:
+            merged.append(item)
+    for theirs_item in theirs_by_id.values():
+        if theirs_item != base.get(theirs_item["id"]):
+            merged.append(theirs_item)
+            external += 1
+    return merged, external
+
+def _save_merged(path: Path, items: list, kind: str) -> int:
+    """
+    flags / notes 的保存流程：加锁 → 比较磁盘版本 → 必要时合并 → 原子写入
+    合并结果会原地写回 items（调用方持有的列表随之更新），返回采纳的外部修改数
+    """
+    external = 0
+    with locked(path):
+        disk_schema, disk_revision, disk_items = _read_versioned(path, [])
+        base_revision, base = _snapshots.get(str(path), (None, {}))
+        if base_revision is not None and disk_revision != base_revision:
+            merged, external = merge_entities(base, items, migrate(kind, disk_schema, disk_items))
+            items[:] = merged
+            if external:
+                print(f"提示: {path.name} 已被其他进程修改，合并了 {external} 项外部修改")
+        revision = disk_revision + 1
+        _write_json(path, items, revision)
+        _remember(path, revision, items)
+    return external
+
+# ===================== 数据格式迁移 =====================
+# MIGRATIONS[kind][v] 把 schema v 的数据升级到 v+1；只在文件版本落后时执行一次并回写，
+# 日常加载直接使用文件内容，不再逐项补全字段
+def _load_migrated(path: Path, kind: str, default):
+    """读取数据文件并确保为当前格式，返回 (revision, 数据)"""
+    schema, revision, data = _read_versioned(path, default)
+    if schema == DATA_SCHEMA_VERSION:
+        return revision, data
+    if schema == SCHEMA_UNREADABLE:
+        return revision, migrate(kind, 0, data)
+    with locked(path):
+        # 加锁后重读：其他实例可能刚完成迁移
+        schema, revision, data = _read_versioned(path, default)
+        if schema != DATA_SCHEMA_VERSION:
+            data = migrate(kind, schema, data)
+            revision += 1
+            _write_json(path, data, revision)
+            print(f"提示: {path.name} 已从数据格式 {schema} 升级到 {DATA_SCHEMA_VERSION}")
+    return revision, data
+
+def migrate(kind: str, schema: int, data):
+    """把 kind（scenes / flags / notes）的数据从 schema 逐级升级到当前版本"""
+    if schema > DATA_SCHEMA_VERSION:
+        print(f"警告: {kind} 数据格式 {schema} 比当前程序支持的 {DATA_SCHEMA_VERSION} 新，按原样使用")
+        return data
+    for version in range(max(schema, 0), DATA_SCHEMA_VERSION):
+        data = MIGRATIONS[kind][version](data)
+    return data
+
+# ===================== Scenes (Mode 0 数据表格) =====================
+@timed("load_scenes")
+def load_scenes():
+    """加载 scenes.json（旧格式在首次加载时迁移并回写）"""
+    _, scenes = _load_migrated(SCENES_FILE, "scenes", {})
+    return scenes if isinstance(scenes, dict) else {}
+
+def _migrate_scenes_v1(raw_data) -> dict:
+    """schema 0 → 1：旧版未命名场景改为地支命名，固定地支顺序并限制数量"""
+    if not isinstance(raw_data, dict):
         raw_data = {}
 
     # 兼容旧版未命名场景 → 地支命名
@@ -74,52 +236,148 @@ def load_scenes():
     # 限制最大数量
     return dict(list(final_scenes.items())[:MAX_SCENES])
 
+@timed("save_scenes")
 def save_scenes(scenes):
-    """保存 scenes.json"""
-    with open(SCENES_FILE, "w", encoding="utf-8") as f:
-        json.dump(scenes, f, ensure_ascii=False, indent=2)
+    """保存 scenes.json（场景定义整体写入，只加锁并递增版本号）"""
+    with locked(SCENES_FILE):
+        revision, _ = _read_json(SCENES_FILE, {})
+        _write_json(SCENES_FILE, scenes, revision + 1)
 
+def iter_records(scene_name: str, fields: list):
+    """逐行流式读取指定场景的 CSV 记录（查询引擎使用，不整表载入内存）"""
+    if get_scene_storage(scene_name) == "binary":
+        yield from iter_binary_records(get_scene_binary_file(scene_name))
+        return
+    path = get_scene_data_file(scene_name)
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+@timed("load_records")
 def load_records(scene_name: str, fields: list) -> list:
     """加载指定场景的 CSV 数据记录"""
-    path = get_scene_data_file(scene_name)
-    records = []
-    if path.exists():
-        with open(path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                records.append(row)
+    records = list(iter_records(scene_name, fields))
+    incr("load_records.rows", len(records))
     return records
 
+@timed("save_records")
 def save_records(scene_name: str, fields: list, records: list):
-    """保存指定场景的 CSV 数据"""
+    """保存指定场景的数据（按场景当前的存储格式）"""
+    if get_scene_storage(scene_name) == "binary":
+        save_scene_table(scene_name, SceneTable.from_records(fields, records))
+        return
     path = get_scene_data_file(scene_name)
-    with open(path, "w", encoding="utf-8", newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fields)
+    with locked(path), atomic_write(path, newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=field_names(fields))
         writer.writeheader()
         writer.writerows(records)
+    mark_written(path)
+
+def get_scene_stamp(scene_name: str):
+    """场景数据文件（CSV 或 .scol）的文件戳"""
+    return file_stamp(get_scene_file(scene_name))
+
+@timed("load_scene_table")
+def load_scene_table(scene_name: str, fields: list) -> SceneTable:
+    """加载指定场景为类型化列存储（数值/日期/枚举列使用紧凑缓冲区）"""
+    if get_scene_storage(scene_name) == "binary":
+        return read_scene_binary(get_scene_binary_file(scene_name), fields)
+    return SceneTable.from_records(fields, load_records(scene_name, fields))
+
+@timed("save_scene_table")
+def save_scene_table(scene_name: str, table: SceneTable):
+    """保存类型化场景表（按场景当前的存储格式）"""
+    if get_scene_storage(scene_name) == "binary":
+        path = get_scene_binary_file(scene_name)
+        with locked(path), atomic_write(path, binary=True) as f:
+            write_scene_binary(f, table)
+        mark_written(path)
+        return
+    save_records(scene_name, table.fields, table.to_records())
+
+def convert_scene_storage(scene_name: str, fields: list, storage: str):
+    """
+    在 CSV 与二进制格式之间转换场景（storage: "csv" / "binary"）
+    先完整写出新格式再删除旧文件，中途失败不会丢数据；索引文件随之失效重建
+    """
+    if storage == get_scene_storage(scene_name):
+        return
+    table = load_scene_table(scene_name, fields)
+    csv_path, bin_path = get_scene_data_file(scene_name), get_scene_binary_file(scene_name)
+    if storage == "binary":
+        with locked(bin_path), atomic_write(bin_path, binary=True) as f:
+            write_scene_binary(f, table)
+        mark_written(bin_path)
+        csv_path.unlink(missing_ok=True)
+    else:
+        with locked(csv_path), atomic_write(csv_path, newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=table.names)
+            writer.writeheader()
+            writer.writerows(table.to_records())
+        mark_written(csv_path)
+        bin_path.unlink(missing_ok=True)
+
+def get_scene_index_file(scene_name: str) -> Path:
+    """获取指定场景的二级索引文件路径（与 CSV 同目录）"""
+    return TABLES_DIR / f"{scene_name}.idx.json"
+
+def get_scene_pages_file(scene_name: str) -> Path:
+    """获取指定场景的分页偏移索引文件路径（见 scene_pages.py）"""
+    return TABLES_DIR / f"{scene_name}.pages.json"
+
+def load_scene_indexes(scene_name: str) -> dict:
+    """读取场景索引文件，不存在或损坏时返回空字典（索引会按需重建）"""
+    path = get_scene_index_file(scene_name)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "rb") as f:
+            return serializer.loads(f.read())
+    except (ValueError, OSError) as e:
+        print(f"警告: 索引文件 {path.name} 无法读取，将重建: {e}")
+        return {}
+
+def save_scene_indexes(scene_name: str, data: dict):
+    """保存场景索引文件（紧凑 JSON，机器读写）"""
+    with atomic_write(get_scene_index_file(scene_name), binary=True) as f:
+        f.write(serializer.dumps(data, compact=True))
 
 # ===================== Flags (Mode 1 Flag 任务) =====================
+@timed("load_flags")
 def load_flags():
-    """加载 flags.json，兼容旧版默认名称"""
+    """
+    加载 flags.json（旧格式在首次加载时迁移并回写），并重放检查点之后的计时事件
+    返回 (flags, 合并基线)；基线取自重放前的文件内容，采用时交给 adopt_baseline
+    """
     ensure_data_dir()
-    flags = []
-    if FLAGS_FILE.exists():
-        try:
-            with open(FLAGS_FILE, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:
-                    data = []  # 空文件
-                else:
-                    data = json.loads(content)
-        except json.JSONDecodeError:
-            print(f"警告: flags.json 格式错误，已使用默认数据")
-            data = []
-        except Exception as e:
-            print(f"加载 flags.json 失败: {e}")
-            data = []
-    else:
-        data = []
+    revision, flags = _load_migrated(FLAGS_FILE, "flags", [])
+    baseline = _baseline(revision, flags)
+    applied = flag_events.replay(flags, flag_events.read_events(FLAG_EVENTS_FILE))
+    incr("flag_events.replayed", applied)
+    backfill_history(flags, path=FLAG_HISTORY_FILE)  # 每个进程只检查一次
+    return flags, baseline
+
+def record_flag_event(flag: dict, kind: str) -> dict:
+    """Flag 计时操作：追加事件到日志（不重写 flags.json）并更新内存中的状态；结束时追加历史记录"""
+    was_active = flag.get("status") == "active"
+    event = flag_events.append_event(flag["id"], kind, path=FLAG_EVENTS_FILE)
+    mark_written(FLAG_EVENTS_FILE)
+    flag_events.apply_event(flag, event)
+    if was_active and flag.get("status") != "active":
+        append_history(flag, path=FLAG_HISTORY_FILE)
+    return event
+
+def checkpoint_flags(flags) -> int:
+    """把 Flag 状态写入 flags.json 后压缩事件日志，返回合并的外部修改数"""
+    external = save_flags(flags)
+    flag_events.compact(flags, path=FLAG_EVENTS_FILE)
+    mark_written(FLAG_EVENTS_FILE)
+    return external
 
+def _normalize_flags(data: list) -> list:
+    """schema 0 → 1：旧版 Flag* 名称改为地支，补全默认字段与 id（id 按位置生成，多个进程加载同一旧文件时结果一致）"""
+    flags = []
     # 补全到 MAX_FLAGS 个 Flag
     for i in range(MAX_FLAGS):
         item = data[i] if i < len(data) else {}
@@ -138,6 +396,7 @@ def load_flags():
         item.setdefault("paused", False)
         item.setdefault("paused_duration", 0)
         item.setdefault("pause_start_time", None)
+        item.setdefault("id", f"flag-{i}")
         flags.append(item)
 
     # 如果不足 MAX_FLAGS，补齐默认
@@ -147,50 +406,46 @@ def load_flags():
             "target_time": "", "start_time": "", "content": "",
             "status": "active", "finished_at": "", "discarded_at": "",
             "span_seconds": 0, "running": False, "paused": False,
-            "paused_duration": 0, "pause_start_time": None
+            "paused_duration": 0, "pause_start_time": None,
+            "id": f"flag-{len(flags)}"
         })
 
     return flags
 
+@timed("save_flags")
 def save_flags(flags):
-    """保存 flags.json"""
-    with open(FLAGS_FILE, "w", encoding="utf-8") as f:
-        json.dump(flags, f, ensure_ascii=False, indent=2)
+    """保存 flags.json（其他进程已修改时按 Flag 合并），返回合并的外部修改数"""
+    return _save_merged(FLAGS_FILE, flags, "flags")
 
 # ===================== Notes (Mode 2 便签笔记) =====================
+@timed("load_notes")
 def load_notes():
-    """加载 notes.json，兼容旧版 sticky_notes.json"""
+    """
+    加载 notes.json（只含元数据，正文按需由 note_store.get_note_content 读取；旧格式首次加载时迁移并回写）
+    返回 (notes, 合并基线)，采用时交给 adopt_baseline
+    """
     ensure_data_dir()
-    notes = []
-    if NOTES_FILE.exists():
-        try:
-            with open(NOTES_FILE, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:
-                    data = []  # 空文件
-                else:
-                    data = json.loads(content)
-        except json.JSONDecodeError:
-            print(f"警告: notes.json 格式错误，已使用默认数据")
-            data = []
-        except Exception as e:
-            print(f"加载 notes.json 失败: {e}")
-            data = []
-    else:
-        data = []
+    revision, notes = _load_migrated(NOTES_FILE, "notes", [])
+    return notes, _baseline(revision, notes)
 
+def _normalize_notes(data: list) -> list:
+    """schema 0 → 1：补全默认字段与 id（id 按位置生成，多个进程加载同一旧文件时结果一致），内联正文迁出为压缩文件"""
+    notes = []
     # 补全到 MAX_NOTES 个 Note
     for i in range(MAX_NOTES):
         item = data[i] if i < len(data) else {}
         default_label = TIANGAN[i]  # 使用天干：甲、乙、丙...
         item.setdefault("display_name", default_label)  # 优先使用天干作为默认显示名
         item.setdefault("title", "")
-        item.setdefault("content", "")
+        externalize_content(item)
+        item.setdefault("content_hash", "")
+        item.setdefault("content_size", 0)
         item.setdefault("status", "active")
         item.setdefault("created_at", datetime.now().isoformat())
         item.setdefault("updated_at", datetime.now().isoformat())
         item.setdefault("finished_at", "")
         item.setdefault("discarded_at", "")
+        item.setdefault("id", f"note-{i}")
         notes.append(item)
 
     # 如果不足 MAX_NOTES，补齐默认
@@ -199,17 +454,41 @@ def load_notes():
         notes.append({
             "display_name": f"便签{i+1}",
             "title": "",
-            "content": "",
+            "content_hash": "",
+            "content_size": 0,
             "status": "active",
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat(),
             "finished_at": "",
-            "discarded_at": ""
+            "discarded_at": "",
+            "id": f"note-{i}"
         })
 
     return notes
 
+@timed("save_notes")
 def save_notes(notes):
-    """保存 notes.json"""
-    with open(NOTES_FILE, "w", encoding="utf-8") as f:
-        json.dump(notes, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+    """保存 notes.json（其他进程已修改时按便签合并），返回合并的外部修改数"""
+    for note in notes:
+        externalize_content(note)
+    external = _save_merged(NOTES_FILE, notes, "notes")
+    prune_blobs(notes)
+    return external
+
+# ===================== 迁移表 =====================
+def _unchanged(data):
+    return data
+
+def _migrate_flags_v2(flags: list) -> list:
+    """schema 1 → 2：计时改由事件日志推导，补充运行起点与已应用事件序号"""
+    for flag in flags:
+        flag.setdefault("run_started_at", "")
+        flag.setdefault("event_seq", 0)
+    return flags
+
+# 新增数据格式时在对应列表末尾追加迁移函数并提高 config.DATA_SCHEMA_VERSION
+MIGRATIONS = {
+    "scenes": [_migrate_scenes_v1, _unchanged],
+    "flags": [_normalize_flags, _migrate_flags_v2],
+    "notes": [_normalize_notes, _unchanged],
+}
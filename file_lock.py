@@ -0,0 +1,81 @@
+# 跨进程文件锁与原子写入
+
+# file_lock.py
+"""
+跨进程文件锁与原子写入
+- locked(path)：对 path 旁的 path.lock 加建议锁（POSIX 用 fcntl.flock，Windows 用 msvcrt.locking）
+  每个数据文件各自一把锁，不同文件的写入互不阻塞
+- atomic_write(path)：先写同目录临时文件再 os.replace，读取方永远看不到写了一半的文件
+"""
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from config import LOCK_TIMEOUT_SECONDS
+
+if sys.platform.startswith('win'):
+    import msvcrt
+
+    def _try_lock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def lock_path_for(path) -> Path:
+    return Path(f"{path}.lock")
+
+@contextmanager
+def locked(path, timeout: float = LOCK_TIMEOUT_SECONDS):
+    """独占 path 的写锁，超时抛出 TimeoutError"""
+    lock_file = lock_path_for(path)
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_file, "a+b") as f:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                _try_lock(f)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"等待文件锁超时：{lock_file}（可能有其他 Systema 实例正在写入）")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            _unlock(f)
+
+@contextmanager
+def atomic_write(path, newline=None, binary=False):
+    """写入临时文件（默认 UTF-8 文本，binary=True 时为二进制），成功后替换目标文件；出错时目标文件保持不变"""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        if binary:
+            f = os.fdopen(fd, "wb")
+        else:
+            f = os.fdopen(fd, "w", encoding="utf-8", newline=newline)
+        with f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,226 @@
+# Flag 历史统计（完成率、超时、暂停占比、连续完成）
+
+# flag_analytics.py
+"""
+Flag 历史统计
+- 每个 Flag 完成 / 废止时向 data/flag_history.log 追加一行结束记录（由 data_utils.record_flag_event 调用）
+- 本功能之前已结束的 Flag 在首次加载时按 flags.json 一次性补录（backfill_history），写入标记行后不再执行
+- FlagHistory 把记录存为列式 array（结束时间、已运行、暂停、超时……），文件只追加，
+  刷新时从上次读到的位置继续解析新增行
+- summarize() 对整列一次计算（NumPy 可用时向量化），get_summary() 在没有新记录时直接返回缓存
+"""
+
+import math
+import os
+from array import array
+from datetime import datetime
+
+import serializer
+from config import FLAG_HISTORY_FILE, NUMPY_AVAILABLE
+from file_lock import locked
+from flag_events import elapsed_seconds
+from time_utils import calculate_span_seconds
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+SUMMARY_KEYS = (
+    "total", "completed", "discarded", "completion_rate",
+    "avg_overrun_seconds", "late_ratio", "paused_ratio", "current_streak", "longest_streak",
+)
+SUMMARY_LABELS = {
+    "total": "已结束", "completed": "已完成", "discarded": "已废止", "completion_rate": "完成率",
+    "avg_overrun_seconds": "平均超时", "late_ratio": "超时占比", "paused_ratio": "暂停占比",
+    "current_streak": "当前连续完成", "longest_streak": "最长连续完成",
+}
+
+
+def _timestamp(iso: str) -> float:
+    try:
+        return datetime.fromisoformat(iso).timestamp()
+    except (TypeError, ValueError):
+        return math.nan
+
+def history_record(flag: dict) -> dict:
+    """Flag 结束时的记录；overrun 为结束时间相对截止时间的秒数（提前为负，无截止时间为 None）"""
+    ended = flag.get("finished_at") or flag.get("discarded_at") or ""
+    target = flag.get("target_time", "")
+    overrun = None
+    if target and ended:
+        overrun = calculate_span_seconds(target, ended) - calculate_span_seconds(ended, target)
+    return {
+        "flag": flag.get("id"),
+        "name": flag.get("name", ""),
+        "status": flag.get("status"),
+        "ended_at": ended,
+        "elapsed": elapsed_seconds(flag),
+        "paused": flag.get("paused_duration", 0),
+        "span_seconds": flag.get("span_seconds", 0),
+        "overrun": overrun,
+    }
+
+def append_history(flag: dict, path=FLAG_HISTORY_FILE):
+    with open(path, "ab") as f:
+        f.write(serializer.dumps(history_record(flag), compact=True) + b"\n")
+
+BACKFILL_MARK = {"backfill": 1}  # 补录完成标记行（不是结束记录）
+_backfill_checked = set()        # 本进程已检查过的历史文件
+
+def backfill_history(flags: list, path=FLAG_HISTORY_FILE) -> int:
+    """
+    补录已结束但没有结束记录的 Flag（按 finished_at / discarded_at），返回补录条数
+    文件中已有标记行时直接返回；同一 Flag 同一结束时间的记录不重复写入
+    """
+    if str(path) in _backfill_checked:
+        return 0
+    _backfill_checked.add(str(path))
+    with locked(path):
+        existing = set()
+        if path.exists():
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        rec = serializer.loads(line)
+                    except ValueError:
+                        continue
+                    if rec.get("backfill"):
+                        return 0
+                    existing.add((rec.get("flag"), rec.get("ended_at")))
+        added = 0
+        with open(path, "ab") as f:
+            for flag in flags:
+                if flag.get("status") not in ("completed", "discarded"):
+                    continue
+                rec = history_record(flag)
+                if not rec["ended_at"] or (rec["flag"], rec["ended_at"]) in existing:
+                    continue
+                f.write(serializer.dumps(rec, compact=True) + b"\n")
+                added += 1
+            f.write(serializer.dumps(BACKFILL_MARK, compact=True) + b"\n")
+    if added:
+        print(f"提示: 已为 {added} 个此前结束的 Flag 补录历史统计记录")
+    return added
+
+
+class FlagHistory:
+    """结束记录的列式存储，支持增量读取"""
+    def __init__(self, path=FLAG_HISTORY_FILE):
+        self.path = path
+        self.offset = 0
+        self.completed = array("b")  # 1 完成 / 0 废止
+        self.ended = array("d")      # 结束时间（epoch 秒）
+        self.elapsed = array("d")
+        self.paused = array("d")
+        self.overrun = array("d")    # 无截止时间为 NaN
+        self._inode = None
+
+    def __len__(self):
+        return len(self.completed)
+
+    def _reset(self):
+        self.__init__(self.path)
+
+    def refresh(self) -> int:
+        """读取上次之后追加的记录，返回新增条数；文件被替换或截断时全部重读"""
+        if not self.path.exists():
+            if len(self):
+                self._reset()
+            return 0
+        st = os.stat(self.path)
+        if st.st_ino != self._inode or st.st_size < self.offset:
+            self._reset()
+            self._inode = st.st_ino
+        if st.st_size == self.offset:
+            return 0
+        added = 0
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 另一个进程正在写入的半行，下次再读
+                self.offset += len(line)
+                try:
+                    rec = serializer.loads(line)
+                except ValueError:
+                    continue
+                if "status" not in rec:
+                    continue  # 补录标记行
+                self.completed.append(1 if rec.get("status") == "completed" else 0)
+                self.ended.append(_timestamp(rec.get("ended_at")))
+                self.elapsed.append(float(rec.get("elapsed") or 0))
+                self.paused.append(float(rec.get("paused") or 0))
+                overrun = rec.get("overrun")
+                self.overrun.append(math.nan if overrun is None else float(overrun))
+                added += 1
+        return added
+
+
+def _streaks(completed_in_order) -> tuple:
+    """(当前连续完成数, 最长连续完成数)"""
+    current = longest = 0
+    for done in completed_in_order:
+        current = current + 1 if done else 0
+        longest = max(longest, current)
+    return current, longest
+
+def summarize(history: FlagHistory) -> dict:
+    """对全部结束记录一次计算汇总指标"""
+    total = len(history)
+    result = dict.fromkeys(SUMMARY_KEYS)
+    result.update(total=total, completed=0, discarded=0, current_streak=0, longest_streak=0)
+    if not total:
+        return result
+
+    if NUMPY_AVAILABLE:
+        completed = np.frombuffer(history.completed, dtype=np.int8).astype(bool)
+        ended = np.frombuffer(history.ended, dtype=np.float64)
+        elapsed = np.frombuffer(history.elapsed, dtype=np.float64)
+        paused = np.frombuffer(history.paused, dtype=np.float64)
+        overrun = np.frombuffer(history.overrun, dtype=np.float64)
+
+        done = int(completed.sum())
+        late = overrun[completed & ~np.isnan(overrun)]
+        busy = elapsed.sum() + paused.sum()
+        result.update(
+            completed=done,
+            avg_overrun_seconds=float(late.mean()) if late.size else None,
+            late_ratio=float((late > 0).mean()) if late.size else None,
+            paused_ratio=float(paused.sum() / busy) if busy else None,
+        )
+        # 连续完成：按结束时间排序后统计 1 的游程
+        ordered = completed[np.argsort(ended, kind="stable")].astype(np.int8)
+        padded = np.concatenate(([0], ordered, [0]))
+        edges = np.flatnonzero(np.diff(padded))
+        runs = edges[1::2] - edges[::2]
+        result["longest_streak"] = int(runs.max()) if runs.size else 0
+        result["current_streak"] = int(runs[-1]) if runs.size and ordered[-1] else 0
+        del completed, ended, elapsed, paused, overrun, ordered  # 释放 array 缓冲区视图
+    else:
+        done = sum(history.completed)
+        late = [o for o, c in zip(history.overrun, history.completed) if c and not math.isnan(o)]
+        busy = sum(history.elapsed) + sum(history.paused)
+        result.update(
+            completed=done,
+            avg_overrun_seconds=sum(late) / len(late) if late else None,
+            late_ratio=sum(1 for o in late if o > 0) / len(late) if late else None,
+            paused_ratio=sum(history.paused) / busy if busy else None,
+        )
+        order = sorted(range(total), key=lambda i: history.ended[i])
+        result["current_streak"], result["longest_streak"] = _streaks(history.completed[i] for i in order)
+
+    result["discarded"] = total - result["completed"]
+    result["completion_rate"] = result["completed"] / total
+    return result
+
+
+_history = None
+_summary = None
+
+def get_summary() -> dict:
+    """带缓存的汇总：历史文件没有新增记录时不重新计算"""
+    global _history, _summary
+    if _history is None:
+        _history = FlagHistory()
+    if _history.refresh() or _summary is None or _summary["total"] != len(_history):
+        _summary = summarize(_history)
+    return _summary
@@ -0,0 +1,80 @@
+# Flag 截止时间事件队列（最小堆）
+
+# flag_deadlines.py
+"""
+Flag 截止提醒的事件队列
+- 每个进行中且设置了 target_time 的 Flag 产生两个事件：提前 FLAG_REMINDER_BEFORE_SECONDS 的提醒、到期
+- DeadlineQueue 用 heapq 最小堆按时间排列全部未来事件，只需查看堆顶即可知道下一次何时触发
+- Flag 修改后重新登记：旧事件不从堆中删除，而是通过版本号失效（弹出时丢弃），失效条目过多时整体压缩
+"""
+
+import heapq
+import itertools
+from datetime import datetime
+
+from config import FLAG_REMINDER_BEFORE_SECONDS
+
+EVENT_KINDS = ("reminder", "due")
+EVENT_LABELS = {"reminder": "即将截止", "due": "已到截止时间"}
+
+
+def deadline_events(flag: dict) -> list:
+    """Flag 的 [(时间戳, 类型)]；已结束或没有截止时间时为空"""
+    if flag.get("status") != "active" or not flag.get("target_time"):
+        return []
+    try:
+        target = datetime.fromisoformat(flag["target_time"]).timestamp()
+    except (TypeError, ValueError):
+        return []
+    events = [(target, "due")]
+    if FLAG_REMINDER_BEFORE_SECONDS > 0:
+        events.insert(0, (target - FLAG_REMINDER_BEFORE_SECONDS, "reminder"))
+    return events
+
+
+class DeadlineQueue:
+    """未来截止事件的最小堆，条目为 (时间戳, 序号, Flag id, 类型, 版本)"""
+    def __init__(self):
+        self._heap = []
+        self._versions = {}  # Flag id → 当前版本，堆中版本不同的条目已失效
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return sum(1 for entry in self._heap if self._live(entry))
+
+    def _live(self, entry) -> bool:
+        return self._versions.get(entry[2]) == entry[4]
+
+    def schedule(self, flag: dict, now: float):
+        """登记（或重新登记）一个 Flag 的未来事件，之前登记的事件全部失效"""
+        flag_id = flag.get("id")
+        version = self._versions.get(flag_id, 0) + 1
+        self._versions[flag_id] = version
+        for when, kind in deadline_events(flag):
+            if when > now:
+                heapq.heappush(self._heap, (when, next(self._seq), flag_id, kind, version))
+        if len(self._heap) > 64 and len(self._heap) > 4 * len(self._versions):
+            self._heap = [entry for entry in self._heap if self._live(entry)]
+            heapq.heapify(self._heap)
+
+    def rebuild(self, flags: list, now: float):
+        """按全部 Flag 重新建堆（加载、外部修改后）"""
+        self._heap = []
+        self._versions = {}
+        for flag in flags:
+            self.schedule(flag, now)
+
+    def next_time(self):
+        """下一个有效事件的时间戳，没有时为 None"""
+        while self._heap and not self._live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> list:
+        """弹出所有已到时间的有效事件 [(Flag id, 类型, 时间戳)]"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, _, flag_id, kind, version = heapq.heappop(self._heap)
+            if self._versions.get(flag_id) == version:
+                due.append((flag_id, kind, when))
+        return due
@@ -0,0 +1,154 @@
+# Flag 计时事件日志（追加写入 + 检查点）
+
+# flag_events.py
+"""
+Flag 计时状态的增量持久化
+- 每次开始 / 暂停 / 继续 / 完成 / 废止只向 data/flag_events.log 追加一行 JSON 并 fsync，
+  不重写 flags.json；程序崩溃后重启时重放日志即可精确恢复已运行时间
+- 每个 Flag 记录已应用到的事件序号 event_seq；flags.json 保存（检查点）后，
+  compact() 删除已写入检查点的事件，日志保持很小
+- 事件行：{"seq": 序号, "flag": Flag id, "event": 类型, "at": ISO 时间}
+  压缩后首行为 {"seq": 最大序号, "event": "checkpoint"}，保证序号不回退
+"""
+
+import os
+from datetime import datetime
+
+import serializer
+from config import FLAG_EVENTS_FILE
+from file_lock import locked, atomic_write
+
+EVENT_KINDS = ("start", "pause", "resume", "finish", "discard")
+EVENT_LABELS = {"start": "开始", "pause": "暂停", "resume": "继续", "finish": "完成", "discard": "废止"}
+_TAIL_BYTES = 4096
+
+
+def read_events(path=FLAG_EVENTS_FILE) -> list:
+    """读取全部事件；崩溃时写了一半的行会被跳过"""
+    if not path.exists():
+        return []
+    events = []
+    with open(path, "rb") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(serializer.loads(line))
+            except ValueError:
+                print(f"警告: {path.name} 第 {line_no} 行无法解析，已跳过")
+    return events
+
+def _last_seq(path) -> int:
+    """只读文件末尾取最大序号（调用方持有锁）"""
+    if not path.exists():
+        return 0
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - _TAIL_BYTES))
+        tail = f.read().splitlines()
+    for line in reversed(tail):
+        try:
+            return int(serializer.loads(line)["seq"])
+        except (ValueError, KeyError, TypeError):
+            continue
+    # 末尾 4KB 内没有完整行（极端情况）：退回全量扫描
+    return max((e.get("seq", 0) for e in read_events(path)), default=0)
+
+def _ends_without_newline(f) -> bool:
+    f.seek(-1, os.SEEK_END)
+    last = f.read(1)
+    f.seek(0, os.SEEK_END)
+    return last != b"\n"
+
+def append_event(flag_id: str, kind: str, at: str = None, path=FLAG_EVENTS_FILE) -> dict:
+    """追加一个事件并落盘，返回事件"""
+    if kind not in EVENT_KINDS:
+        raise ValueError(f"未知的 Flag 事件：{kind}")
+    with locked(path):
+        event = {
+            "seq": _last_seq(path) + 1,
+            "flag": flag_id,
+            "event": kind,
+            "at": at or datetime.now().isoformat(),
+        }
+        with open(path, "ab+") as f:
+            if f.tell() and _ends_without_newline(f):
+                f.write(b"\n")  # 崩溃时写了一半的末行：另起一行，新事件不会与它粘在一起而无法解析
+            f.write(serializer.dumps(event, compact=True) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+    return event
+
+# ===================== 状态推导 =====================
+def _seconds_between(start_iso: str, end_iso: str) -> float:
+    try:
+        return max(0.0, (datetime.fromisoformat(end_iso) - datetime.fromisoformat(start_iso)).total_seconds())
+    except (TypeError, ValueError):
+        return 0.0
+
+def apply_event(flag: dict, event: dict):
+    """把一个事件应用到 Flag 状态（原地修改）；不合法的状态转换忽略"""
+    kind, at = event["event"], event["at"]
+    flag["event_seq"] = max(flag.get("event_seq", 0), event["seq"])
+    if kind == "start" and not flag.get("running") and flag.get("status") == "active":
+        flag.update(running=True, paused=False, run_started_at=at,
+                    paused_duration=0, pause_start_time=None)
+    elif kind == "pause" and flag.get("running") and not flag.get("paused"):
+        flag.update(paused=True, pause_start_time=at)
+    elif kind == "resume" and flag.get("running") and flag.get("paused"):
+        flag["paused_duration"] = flag.get("paused_duration", 0) + _seconds_between(flag["pause_start_time"], at)
+        flag.update(paused=False, pause_start_time=None)
+    elif kind in ("finish", "discard") and flag.get("status") == "active":
+        if flag.get("paused"):
+            flag["paused_duration"] = flag.get("paused_duration", 0) + _seconds_between(flag["pause_start_time"], at)
+        flag.update(running=False, paused=False, pause_start_time=None)
+        if kind == "finish":
+            flag.update(status="completed", finished_at=at)
+        else:
+            flag.update(status="discarded", discarded_at=at)
+    else:
+        return
+    flag["updated_at"] = at
+
+def elapsed_seconds(flag: dict, now: datetime = None) -> float:
+    """已运行时间（不含暂停）；结束后固定为结束时刻的值"""
+    started = flag.get("run_started_at")
+    if not started:
+        return 0.0
+    end = flag.get("finished_at") or flag.get("discarded_at")
+    if not end:
+        end = flag.get("pause_start_time") if flag.get("paused") else (now or datetime.now()).isoformat()
+    return max(0.0, _seconds_between(started, end) - flag.get("paused_duration", 0))
+
+def replay(flags: list, events: list) -> int:
+    """把检查点之后的事件应用到 flags，返回应用的事件数"""
+    by_id = {flag.get("id"): flag for flag in flags}
+    applied = 0
+    for event in sorted(events, key=lambda e: e.get("seq", 0)):
+        flag = by_id.get(event.get("flag"))
+        if flag is None or event["seq"] <= flag.get("event_seq", 0):
+            continue
+        apply_event(flag, event)
+        applied += 1
+    return applied
+
+def compact(flags: list, path=FLAG_EVENTS_FILE):
+    """flags 已写入 flags.json 后调用：删除检查点已包含的事件"""
+    if not path.exists():
+        return
+    checkpoint = {flag.get("id"): flag.get("event_seq", 0) for flag in flags}
+    with locked(path):
+        events = read_events(path)
+        last = max((e.get("seq", 0) for e in events), default=0)
+        keep = [
+            e for e in events
+            if e.get("event") in EVENT_KINDS and e["seq"] > checkpoint.get(e.get("flag"), 0)
+        ]
+        if len(keep) == sum(1 for e in events if e.get("event") in EVENT_KINDS):
+            return  # 没有可删除的事件
+        with atomic_write(path, binary=True) as f:
+            f.write(serializer.dumps({"seq": last, "event": "checkpoint"}, compact=True) + b"\n")
+            for e in keep:
+                f.write(serializer.dumps(e, compact=True) + b"\n")
@@ -8,6 +8,7 @@ Systema 程序唯一入口
 
 import sys
 import traceback
+import startup  # 最先导入：启动计时的起点
 from config import PYQT6_AVAILABLE, get_default_font
 
 if not PYQT6_AVAILABLE:
@@ -19,6 +20,8 @@ from PyQt6.QtGui import QFont
 
 from ui.personal_db_gui import PersonalDBGUI
 
+startup.mark("import")
+
 def get_qapp():
     """获取或创建唯一的 QApplication 实例"""
     app = QApplication.instance()
@@ -39,6 +42,7 @@ def exception_hook(exctype, value, tb):
 if __name__ == "__main__":
     sys.excepthook = exception_hook
     app = get_qapp()
+    startup.mark("qapp")
     if app:
         window = PersonalDBGUI()
         window.show()
@@ -0,0 +1,127 @@
+# 便签正文压缩存储与 LRU 缓存
+
+# note_store.py
+"""
+便签正文与元数据分离存储
+- notes.json 中每个便签只保存 content_hash / content_size，正文以 zlib 压缩后存为
+  data/notes/<sha1>.z（按内容寻址：相同正文只存一份，写入后不再修改）
+- 正文在选中便签时才读取，读过的正文放入 LRU 缓存，超过 NOTE_CACHE_MAX_BYTES 时淘汰最久未用的
+- 旧版 notes.json 中内联的 content 在加载/保存时自动迁出
+"""
+
+import hashlib
+import time
+import zlib
+from collections import OrderedDict
+
+from config import NOTES_CONTENT_DIR, NOTE_CACHE_MAX_BYTES
+from file_lock import atomic_write
+from profiler import incr
+
+BLOB_SUFFIX = ".z"
+BLOB_GRACE_SECONDS = 60  # 未被引用的正文文件至少保留这么久，避免删掉其他进程刚写入、尚未登记的正文
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def blob_path(digest: str):
+    return NOTES_CONTENT_DIR / f"{digest}{BLOB_SUFFIX}"
+
+def write_blob(text: str) -> str:
+    """写入正文（已存在则跳过），返回哈希"""
+    digest = content_hash(text)
+    path = blob_path(digest)
+    if not path.exists():
+        NOTES_CONTENT_DIR.mkdir(parents=True, exist_ok=True)
+        with atomic_write(path, binary=True) as f:
+            f.write(zlib.compress(text.encode("utf-8"), 6))
+    return digest
+
+def read_blob(digest: str) -> str:
+    with open(blob_path(digest), "rb") as f:
+        return zlib.decompress(f.read()).decode("utf-8")
+
+
+class ContentCache:
+    """按 UTF-8 字节数限额的 LRU 缓存（哈希 → 正文）；最近使用的一条即使超限也保留"""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self.nbytes = 0
+
+    def get(self, digest: str):
+        text = self._items.get(digest)
+        if text is not None:
+            self._items.move_to_end(digest)
+            incr("note_content.cache_hit")
+        return text
+
+    def put(self, digest: str, text: str):
+        if digest in self._items:
+            self._items.move_to_end(digest)
+            return
+        self._items[digest] = text
+        self.nbytes += len(text.encode("utf-8"))
+        while self.nbytes > self.max_bytes and len(self._items) > 1:
+            _, old = self._items.popitem(last=False)
+            self.nbytes -= len(old.encode("utf-8"))
+            incr("note_content.evicted")
+
+    def clear(self):
+        self._items.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+_cache = ContentCache(NOTE_CACHE_MAX_BYTES)
+
+
+# ===================== 便签正文读写 =====================
+def get_note_content(note: dict) -> str:
+    """读取便签正文（缓存未命中时从压缩文件加载）"""
+    if "content" in note:  # 尚未迁出的旧格式
+        return note["content"]
+    digest = note.get("content_hash", "")
+    if not digest:
+        return ""
+    text = _cache.get(digest)
+    if text is None:
+        try:
+            text = read_blob(digest)
+        except (OSError, zlib.error, UnicodeDecodeError) as e:
+            print(f"警告: 便签正文 {digest} 读取失败: {e}")
+            return ""
+        incr("note_content.loaded")
+        _cache.put(digest, text)
+    return text
+
+def set_note_content(note: dict, text: str):
+    """写入便签正文：正文落盘为压缩文件，便签中只更新哈希与长度（随后由 save_notes 保存元数据）"""
+    digest = write_blob(text) if text else ""
+    note.pop("content", None)
+    note["content_hash"] = digest
+    note["content_size"] = len(text)
+    if digest:
+        _cache.put(digest, text)
+
+def externalize_content(note: dict):
+    """把内联在便签中的旧版 content 迁出为压缩文件"""
+    if "content" in note:
+        set_note_content(note, note.get("content") or "")
+
+def prune_blobs(notes: list):
+    """删除不再被任何便签引用、且已超过保留期的正文文件"""
+    if not NOTES_CONTENT_DIR.exists():
+        return
+    referenced = {note.get("content_hash") for note in notes}
+    cutoff = time.time() - BLOB_GRACE_SECONDS
+    for path in NOTES_CONTENT_DIR.glob(f"*{BLOB_SUFFIX}"):
+        if path.stem in referenced:
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,132 @@
+# 轻量性能埋点（计时装饰器 / 上下文管理器、计数器、耗时直方图）
+
+# profiler.py
+"""
+轻量性能埋点
+- 设置环境变量 SYSTEMA_PROFILE=1 启用；未启用时埋点只多一次布尔判断
+- @timed("名称") 装饰函数，with span("名称"): 包裹代码块，incr("名称") 计数
+- 每个名称记录次数、总耗时、最小/最大值和按 2 的幂划分的毫秒直方图
+- snapshot() 供诊断窗口显示，dump_json() 导出；启用时退出程序自动导出到 data/profile.json
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from config import DATA_DIR, PROFILE_ENV
+
+# 直方图上界（毫秒），最后一个桶收纳所有更慢的调用
+HISTOGRAM_BOUNDS_MS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+PROFILE_FILE = DATA_DIR / "profile.json"
+
+_enabled = os.environ.get(PROFILE_ENV, "").strip() not in ("", "0", "false", "False")
+_lock = threading.Lock()
+_timings = {}   # 名称 → {"count", "total", "min", "max", "buckets"}
+_counters = {}  # 名称 → 次数
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+def set_enabled(enabled: bool):
+    """运行时开关（诊断窗口使用）"""
+    global _enabled
+    _enabled = bool(enabled)
+
+def reset():
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+
+def record(name: str, seconds: float):
+    """记录一次耗时"""
+    ms = seconds * 1000
+    with _lock:
+        stat = _timings.get(name)
+        if stat is None:
+            stat = _timings[name] = {
+                "count": 0, "total": 0.0, "min": ms, "max": ms,
+                "buckets": [0] * (len(HISTOGRAM_BOUNDS_MS) + 1),
+            }
+        stat["count"] += 1
+        stat["total"] += ms
+        stat["min"] = min(stat["min"], ms)
+        stat["max"] = max(stat["max"], ms)
+        for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if ms < bound:
+                stat["buckets"][i] += 1
+                break
+        else:
+            stat["buckets"][-1] += 1
+
+def incr(name: str, n: int = 1):
+    """计数器累加"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+@contextmanager
+def span(name: str):
+    """计时代码块：with span("load_records"): ..."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+def timed(name: str = None):
+    """计时装饰器，默认使用函数的限定名"""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def snapshot() -> dict:
+    """当前统计的副本：{"enabled", "timings": {名称: {..., "mean"}}, "counters", "histogram_bounds_ms"}"""
+    with _lock:
+        timings = {}
+        for name, stat in _timings.items():
+            item = dict(stat, buckets=list(stat["buckets"]))
+            item["mean"] = stat["total"] / stat["count"] if stat["count"] else 0.0
+            timings[name] = item
+        counters = dict(_counters)
+    return {
+        "enabled": _enabled,
+        "histogram_bounds_ms": list(HISTOGRAM_BOUNDS_MS),
+        "timings": timings,
+        "counters": counters,
+    }
+
+def dump_json(path=None):
+    """导出统计为 JSON，返回写入路径"""
+    path = path or PROFILE_FILE
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, ensure_ascii=False, indent=2)
+    return path
+
+def _dump_at_exit():
+    if _enabled and _timings:
+        try:
+            dump_json()
+        except OSError as e:
+            print(f"导出性能数据失败: {e}")
+
+atexit.register(_dump_at_exit)
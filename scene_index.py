@@ -0,0 +1,231 @@
+# 场景字段二级索引（哈希 / 有序）
+
+# scene_index.py
+"""
+场景字段二级索引
+- 在 scenes.json 的字段定义中声明 "index": "hash"（等值 O(1)）或 "sorted"（范围 O(log n)）
+- 首次使用时才构建；保存场景时写入 tables/<场景名>.idx.json，并记录 CSV 文件戳
+- 下次加载若文件戳一致直接读取索引文件，否则按需重建
+- 单元格编辑 / 排序时增量维护，保存时只写已加载或仍然有效的索引
+"""
+
+from bisect import bisect_left, bisect_right
+
+from data_utils import load_scene_indexes, save_scene_indexes
+from scene_types import field_name, field_index, parse_value, format_value
+
+
+class HashIndex:
+    """等值索引：值 → 行号列表"""
+    kind = "hash"
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.buckets = {}
+
+    def build(self, column):
+        buckets = {}
+        for row in range(len(column)):
+            value = column.get(row)
+            if value is not None:
+                buckets.setdefault(value, []).append(row)
+        self.buckets = buckets
+
+    def add(self, value, row):
+        if value is not None:
+            self.buckets.setdefault(value, []).append(row)
+
+    def remove(self, value, row):
+        rows = self.buckets.get(value)
+        if rows:
+            rows.remove(row)
+            if not rows:
+                del self.buckets[value]
+
+    def lookup(self, value) -> list:
+        return sorted(self.buckets.get(value, ()))
+
+    def range(self, lo=None, hi=None) -> list:
+        raise ValueError("哈希索引不支持范围查找，请将索引类型设为“有序”")
+
+    def remap(self, new_pos):
+        self.buckets = {v: [new_pos[r] for r in rows] for v, rows in self.buckets.items()}
+
+    def dump(self) -> dict:
+        return {format_value(self.spec, v): rows for v, rows in self.buckets.items()}
+
+    def load(self, data: dict):
+        self.buckets = {parse_value(self.spec, text): rows for text, rows in data.items()}
+
+
+class SortedIndex:
+    """有序索引：按值排序的 (keys, rows) 平行列表，bisect 查找"""
+    kind = "sorted"
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.keys = []
+        self.rows = []
+
+    def build(self, column):
+        pairs = sorted(
+            (value, row) for row, value in ((r, column.get(r)) for r in range(len(column)))
+            if value is not None
+        )
+        self.keys = [v for v, _ in pairs]
+        self.rows = [r for _, r in pairs]
+
+    def add(self, value, row):
+        if value is not None:
+            i = bisect_right(self.keys, value)
+            self.keys.insert(i, value)
+            self.rows.insert(i, row)
+
+    def remove(self, value, row):
+        i = bisect_left(self.keys, value)
+        while i < len(self.keys) and self.keys[i] == value:
+            if self.rows[i] == row:
+                del self.keys[i]
+                del self.rows[i]
+                return
+            i += 1
+
+    def lookup(self, value) -> list:
+        return sorted(self.rows[bisect_left(self.keys, value):bisect_right(self.keys, value)])
+
+    def range(self, lo=None, hi=None) -> list:
+        """闭区间 [lo, hi] 内的行号（按值排序）；边界为 None 表示不限"""
+        start = 0 if lo is None else bisect_left(self.keys, lo)
+        end = len(self.keys) if hi is None else bisect_right(self.keys, hi)
+        return self.rows[start:end]
+
+    def remap(self, new_pos):
+        self.rows = [new_pos[r] for r in self.rows]
+
+    def dump(self) -> dict:
+        return {"keys": [format_value(self.spec, v) for v in self.keys], "rows": self.rows}
+
+    def load(self, data: dict):
+        self.keys = [parse_value(self.spec, text) for text in data["keys"]]
+        self.rows = list(data["rows"])
+
+
+INDEX_CLASSES = {"hash": HashIndex, "sorted": SortedIndex}
+
+
+class SceneIndexes:
+    """一个已加载场景的全部二级索引（挂载到 SceneTable.indexes）"""
+    def __init__(self, scene_name: str, table, stamp=None):
+        self.scene_name = scene_name
+        self.table = table
+        self._indexes = {}      # 字段名 → 已加载的索引
+        self._touched = set()   # 加载后被编辑过的字段（磁盘上的旧索引已失效）
+        self._reordered = False
+        persisted = load_scene_indexes(scene_name)
+        valid = stamp is not None and persisted.get("stamp") == list(stamp)
+        self._persisted = persisted.get("indexes", {}) if valid else {}
+
+    def declared(self) -> dict:
+        """字段名 → 声明的索引类型"""
+        return {
+            field_name(spec): field_index(spec) for spec in self.table.fields if field_index(spec)
+        }
+
+    def get(self, name: str):
+        """取得字段索引，首次使用时从索引文件读取或从内存列构建；未声明索引时返回 None"""
+        kind = self.declared().get(name)
+        if kind is None:
+            return None
+        index = self._indexes.get(name)
+        if index is not None and index.kind == kind:
+            return index
+        col = self.table.names.index(name)
+        spec = self.table.fields[col]
+        index = INDEX_CLASSES[kind](spec)
+        saved = self._persisted.get(name)
+        if saved and saved.get("kind") == kind and name not in self._touched and not self._reordered:
+            try:
+                index.load(saved["data"])
+            except (ValueError, KeyError, TypeError):
+                index.build(self.table.columns[col])
+        else:
+            index.build(self.table.columns[col])
+        self._indexes[name] = index
+        return index
+
+    # ===================== 查找 =====================
+    def lookup(self, name: str, text) -> list:
+        """等值查找，返回行号列表；字段未声明索引时退化为全列扫描"""
+        value = parse_value(self._spec(name), text)
+        index = self.get(name)
+        if index is None:
+            column = self.table.columns[self.table.names.index(name)]
+            return [r for r in range(len(column)) if column.get(r) == value]
+        return index.lookup(value)
+
+    def range(self, name: str, lo_text=None, hi_text=None) -> list:
+        """范围查找（需要 sorted 索引）"""
+        spec = self._spec(name)
+        index = self.get(name)
+        if index is None:
+            raise ValueError(f"字段「{name}」未建立索引")
+        lo = parse_value(spec, lo_text) if lo_text not in (None, "") else None
+        hi = parse_value(spec, hi_text) if hi_text not in (None, "") else None
+        return index.range(lo, hi)
+
+    def _spec(self, name: str):
+        return self.table.fields[self.table.names.index(name)]
+
+    # ===================== 增量维护（由 SceneTable 回调） =====================
+    def on_cell_changed(self, name: str, row: int, old, new):
+        self._touched.add(name)
+        index = self._indexes.get(name)
+        if index is not None and old != new:
+            if old is not None:
+                index.remove(old, row)
+            index.add(new, row)
+
+    def on_reorder(self, order):
+        """行被重排：order[新行号] = 旧行号"""
+        self._reordered = True
+        new_pos = [0] * len(order)
+        for new, old in enumerate(order):
+            new_pos[old] = new
+        for index in self._indexes.values():
+            index.remap(new_pos)
+
+    def on_column_replaced(self, name: str):
+        """列类型变化，丢弃旧索引，下次使用时重建"""
+        self._touched.add(name)
+        self._indexes.pop(name, None)
+
+    def on_rows_changed(self):
+        """插入或删除了行：行号整体错位，丢弃全部索引，下次使用时重建"""
+        self._reordered = True
+        self._indexes.clear()
+
+    def on_block_changed(self, names: list):
+        """批量写入了若干列（粘贴等），丢弃这些列的索引，下次使用时重建"""
+        for name in names:
+            self.on_column_replaced(name)
+
+    # ===================== 持久化 =====================
+    def save(self, stamp):
+        """
+        保存场景 CSV 之后调用：写入已加载的索引，未加载但仍有效的旧索引原样保留
+        stamp 为刚写入的 CSV 文件戳
+        """
+        declared = self.declared()
+        indexes = {}
+        for name, kind in declared.items():
+            index = self._indexes.get(name)
+            if index is not None and index.kind == kind:
+                indexes[name] = {"kind": kind, "data": index.dump()}
+            elif not self._reordered and name not in self._touched:
+                saved = self._persisted.get(name)
+                if saved and saved.get("kind") == kind:
+                    indexes[name] = saved
+        save_scene_indexes(self.scene_name, {"stamp": list(stamp) if stamp else None, "indexes": indexes})
+        self._persisted = indexes
+        self._touched.clear()
+        self._reordered = False
@@ -0,0 +1,89 @@
+# 跨场景查找列（按键关联另一个场景的字段）
+
+# scene_lookup.py
+"""
+跨场景查找列
+- 字段定义：{"name": 列名, "lookup": {"scene": 目标场景, "key": 目标场景的键字段,
+                                      "value": 目标场景的取值字段, "match": 本场景用于匹配的字段}}
+  每行取本场景 match 字段的文本，在目标场景 key 字段中查找，显示同一行 value 字段的文本
+- 查找列是文本列，计算结果随场景一起保存（分组汇总等流式查询可直接使用），加载后重新计算
+- 目标场景的「键 → 值」哈希表按 (场景, 键, 值) 缓存，目标数据文件戳变化时才重新读取
+- 本场景编辑时只重算改动的行；目标场景变化时只改写取值发生变化的行
+"""
+
+from data_utils import iter_records, get_scene_stamp
+from scene_types import field_name
+
+_key_maps = {}  # (场景, 键字段, 取值字段) → (文件戳, {键文本: 值文本})
+
+
+def field_lookup(spec):
+    """字段的查找定义，普通字段返回 None"""
+    if isinstance(spec, dict) and isinstance(spec.get("lookup"), dict):
+        lookup = spec["lookup"]
+        if all(lookup.get(k) for k in ("scene", "key", "value", "match")):
+            return lookup
+    return None
+
+def make_lookup_field(name: str, scene: str, key: str, value: str, match: str) -> dict:
+    return {"name": name, "lookup": {"scene": scene, "key": key, "value": value, "match": match}}
+
+def lookup_targets(fields: list) -> set:
+    """字段列表引用的目标场景名"""
+    return {lookup["scene"] for lookup in map(field_lookup, fields) if lookup}
+
+def get_key_map(scenes: dict, lookup: dict) -> dict:
+    """目标场景的「键 → 值」表（同一个键出现多次时取第一行）；目标场景或字段不存在时为空表"""
+    scene = lookup["scene"]
+    cache_key = (scene, lookup["key"], lookup["value"])
+    stamp = get_scene_stamp(scene)
+    cached = _key_maps.get(cache_key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    mapping = {}
+    if scene in scenes:
+        key_name, value_name = lookup["key"], lookup["value"]
+        for record in iter_records(scene, scenes[scene]):
+            key = record.get(key_name)
+            if key and key not in mapping:
+                mapping[key] = record.get(value_name) or ""
+    _key_maps[cache_key] = (stamp, mapping)
+    return mapping
+
+def compute_column(table, col: int, mapping: dict, rows=None) -> list:
+    """
+    按 mapping 计算查找列（rows 为 None 时整列），返回取值发生变化的行号
+    匹配字段不存在时整列为空
+    """
+    lookup = field_lookup(table.fields[col])
+    target = table.columns[col]
+    names = table.names
+    source = table.columns[names.index(lookup["match"])] if lookup["match"] in names else None
+    changed = []
+    for row in (range(table.row_count()) if rows is None else rows):
+        value = mapping.get(source.text(row), "") if source is not None else ""
+        if target.values[row] != value:
+            target.values[row] = value
+            changed.append(row)
+    return changed
+
+def lookup_columns(table, match_names=None, scene=None) -> list:
+    """
+    查找列的列号
+    match_names：只返回匹配字段在其中的列（本场景编辑后使用）；scene：只返回引用该场景的列
+    """
+    result = []
+    for col, spec in enumerate(table.fields):
+        lookup = field_lookup(spec)
+        if lookup is None:
+            continue
+        if match_names is not None and lookup["match"] not in match_names:
+            continue
+        if scene is not None and lookup["scene"] != scene:
+            continue
+        result.append(col)
+    return result
+
+def describe(spec) -> str:
+    lookup = field_lookup(spec)
+    return f"{field_name(spec)} = {lookup['scene']}.{lookup['value']}（{lookup['match']} → {lookup['key']}）"
@@ -0,0 +1,137 @@
+# 超大场景的分页读取（行偏移索引 + 滑动窗口）
+
+# scene_pages.py
+"""
+超大场景的分页浏览（只支持 CSV 存储；.scol 按列整体压缩，无法按行定位）
+- 页偏移索引：扫描一次 CSV，记录每 SCENE_PAGE_ROWS 行的起始字节偏移与总行数，
+  保存到 tables/<场景名>.pages.json，CSV 文件戳不变时直接复用（总行数也从这里读取）
+- read_page：seek 到页起点，只读取并解析这一页的字节，得到该页的 SceneTable
+- PageWindow：只常驻当前页 ± SCENE_PAGE_PREFETCH 页，其余页淘汰，内存占用与场景大小无关
+"""
+
+import csv
+import io
+from array import array
+
+import serializer
+from config import SCENE_PAGE_ROWS, SCENE_PAGE_PREFETCH
+from data_utils import get_scene_data_file, get_scene_pages_file, file_stamp
+from file_lock import atomic_write
+from scene_types import SceneTable
+
+
+def build_page_index(path, page_rows: int = SCENE_PAGE_ROWS) -> dict:
+    """
+    扫描 CSV 建立页偏移索引
+    按引号奇偶判断行是否结束（单元格内的换行不算新行），与 csv 模块的解析一致
+    """
+    stamp = file_stamp(path)
+    offsets = array("Q")
+    rows = 0
+    in_quotes = False
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        pos = len(header_line)
+        for line in f:
+            if not in_quotes and not line.strip(b"\r\n"):
+                pos += len(line)
+                continue  # 空行：csv 模块同样跳过
+            if not in_quotes:
+                if rows % page_rows == 0:
+                    offsets.append(pos)
+                rows += 1
+            if line.count(b'"') % 2:
+                in_quotes = not in_quotes
+            pos += len(line)
+    header = next(csv.reader([header_line.decode("utf-8")]), [])
+    return {
+        "stamp": list(stamp) if stamp else None,
+        "page_rows": page_rows,
+        "rows": rows,
+        "header": header,
+        "offsets": offsets.tolist(),
+        "end": pos,
+    }
+
+def load_page_index(scene_name: str, page_rows: int = SCENE_PAGE_ROWS) -> dict:
+    """读取页偏移索引；CSV 已变化或分页大小不同时重新扫描并保存（可在后台线程调用）"""
+    path = get_scene_data_file(scene_name)
+    stamp = file_stamp(path)
+    if stamp is None:
+        return {"stamp": None, "page_rows": page_rows, "rows": 0, "header": [], "offsets": [], "end": 0}
+    index_path = get_scene_pages_file(scene_name)
+    try:
+        with open(index_path, "rb") as f:
+            meta = serializer.loads(f.read())
+        if meta.get("stamp") == list(stamp) and meta.get("page_rows") == page_rows:
+            return meta
+    except (OSError, ValueError):
+        pass
+    meta = build_page_index(path, page_rows)
+    with atomic_write(index_path, binary=True) as f:
+        f.write(serializer.dumps(meta, compact=True))
+    return meta
+
+def page_count(meta: dict) -> int:
+    return len(meta["offsets"])
+
+def read_page(scene_name: str, meta: dict, page: int, fields: list) -> SceneTable:
+    """只读取第 page 页（从 0 开始）；CSV 在建立索引后被修改时抛出 ValueError"""
+    path = get_scene_data_file(scene_name)
+    if list(file_stamp(path) or []) != meta["stamp"]:
+        raise ValueError(f"场景「{scene_name}」的数据文件已变化，请重新加载")
+    offsets = meta["offsets"]
+    start = offsets[page]
+    end = offsets[page + 1] if page + 1 < len(offsets) else meta["end"]
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    header = meta["header"]
+    records = [dict(zip(header, row)) for row in csv.reader(io.StringIO(text, newline="")) if row]
+    return SceneTable.from_records(fields, records)
+
+
+class PageWindow:
+    """分页浏览状态：当前页与常驻内存的相邻页"""
+    def __init__(self, scene_name: str, fields: list, meta: dict, prefetch: int = SCENE_PAGE_PREFETCH):
+        self.scene_name = scene_name
+        self.fields = fields
+        self.meta = meta
+        self.prefetch = prefetch
+        self.current = 0
+        self.pages = {}       # 页号 → SceneTable
+        self.loading = set()  # 正在后台读取的页号
+
+    @property
+    def page_count(self) -> int:
+        return page_count(self.meta)
+
+    @property
+    def total_rows(self) -> int:
+        return self.meta["rows"]
+
+    @property
+    def page_rows(self) -> int:
+        return self.meta["page_rows"]
+
+    def wanted(self) -> list:
+        """应常驻的页号，按与当前页的距离排序（先加载近的）"""
+        pages = range(max(0, self.current - self.prefetch), min(self.page_count, self.current + self.prefetch + 1))
+        return sorted(pages, key=lambda p: abs(p - self.current))
+
+    def move_to(self, page: int) -> list:
+        """切换当前页并淘汰窗口外的页，返回还需要读取的页号"""
+        self.current = max(0, min(page, self.page_count - 1))
+        wanted = self.wanted()
+        for p in list(self.pages):
+            if p not in wanted:
+                del self.pages[p]
+        return [p for p in wanted if p not in self.pages and p not in self.loading]
+
+    def put(self, page: int, table: SceneTable) -> bool:
+        """后台读取完成；页已不在窗口内时丢弃，返回是否保留"""
+        self.loading.discard(page)
+        if page not in self.wanted():
+            return False
+        self.pages[page] = table
+        return True
@@ -0,0 +1,187 @@
+# 场景分组汇总查询引擎（filter / group-by / aggregate）
+
+# scene_query.py
+"""
+场景记录的轻量查询引擎
+- 逐行流式读取一个或多个场景的 CSV（不整表载入内存）
+- 过滤 → 哈希分组 → 聚合，结果为 QueryResult（表头 + 行）
+- 供 TableWorkspace 的“分组汇总”视图和 Python 脚本直接调用
+
+示例：
+    from scene_query import run_query
+    result = run_query(scenes, ["子", "丑"],
+                       where=[("类别", "==", "餐饮")],
+                       group_by=[("日期", "month")],
+                       aggregates=[("count", None), ("sum", "金额")])
+    for row in result.rows: print(row)
+"""
+
+from data_utils import iter_records
+from scene_types import field_name, field_type, parse_value, format_value, MATCH_OPS
+
+SCENE_FIELD = "_scene"  # 伪字段：记录所属场景，可用于过滤或分组
+
+AGGREGATES = ("count", "sum", "mean", "min", "max", "distinct")
+AGGREGATE_LABELS = {
+    "count": "计数", "sum": "求和", "mean": "平均",
+    "min": "最小", "max": "最大", "distinct": "去重数",
+}
+
+# 分组粒度：对 ISO 日期/时间文本取前缀
+GRAINS = {
+    None: None, "day": 10, "month": 7, "year": 4,
+}
+GRAIN_LABELS = {None: "原值", "day": "按日", "month": "按月", "year": "按年"}
+
+
+class QueryResult:
+    """查询结果：columns 为表头文本，rows 为文本行"""
+    def __init__(self, columns: list, rows: list):
+        self.columns = columns
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def to_records(self) -> list:
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+
+# ===================== 聚合器 =====================
+class _Agg:
+    """单个分组的单个聚合状态（流式累加）"""
+    __slots__ = ("func", "count", "total", "lo", "hi", "seen")
+
+    def __init__(self, func):
+        self.func = func
+        self.count = 0
+        self.total = 0
+        self.lo = self.hi = None
+        self.seen = set() if func == "distinct" else None
+
+    def add(self, value):
+        if value is None or value == "":
+            return
+        if self.func in ("sum", "mean") and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return  # 非数值字段不参与求和/平均
+        self.count += 1
+        if self.func in ("sum", "mean"):
+            self.total += value
+        elif self.func in ("min", "max"):
+            if self.lo is None or value < self.lo:
+                self.lo = value
+            if self.hi is None or value > self.hi:
+                self.hi = value
+        elif self.func == "distinct":
+            self.seen.add(value)
+
+    def result(self):
+        if self.func == "count":
+            return self.count
+        if self.func == "sum":
+            return self.total if self.count else None
+        if self.func == "mean":
+            return self.total / self.count if self.count else None
+        if self.func == "min":
+            return self.lo
+        if self.func == "max":
+            return self.hi
+        return len(self.seen)
+
+
+# ===================== 查询执行 =====================
+def _field_specs(scenes: dict, scene_names: list) -> dict:
+    """字段名 → 字段定义（多个场景同名字段以第一个为准）"""
+    specs = {SCENE_FIELD: SCENE_FIELD}
+    for name in scene_names:
+        for spec in scenes.get(name, []):
+            specs.setdefault(field_name(spec), spec)
+    return specs
+
+def _typed(specs: dict, name: str, text):
+    """解析为类型值；不合法的旧数据视为空值，不中断查询"""
+    try:
+        return parse_value(specs.get(name, name), text)
+    except ValueError:
+        return None
+
+def _normalize_group(item):
+    """group_by 项既可以是字段名，也可以是 (字段名, 粒度)"""
+    if isinstance(item, (tuple, list)):
+        return item[0], item[1]
+    return item, None
+
+def stream_rows(scenes: dict, scene_names: list):
+    """依次流式产出各场景的记录，附加 _scene 伪字段"""
+    for name in scene_names:
+        if name not in scenes:
+            continue
+        for rec in iter_records(name, scenes[name]):
+            rec[SCENE_FIELD] = name
+            yield rec
+
+def run_query(scenes: dict, scene_names: list, where=None, group_by=None, aggregates=None) -> QueryResult:
+    """
+    在一个或多个场景上执行 过滤 / 分组 / 聚合
+    - where: [(字段, 运算符, 值文本)]，运算符见 scene_types.MATCH_OPS，多个条件为“且”
+    - group_by: [字段 或 (字段, "day"/"month"/"year")]，为空时整体汇总为一行
+    - aggregates: [(聚合函数, 字段)]，count 的字段可为 None（计行数）
+    """
+    specs = _field_specs(scenes, scene_names)
+    where = [(f, op, _typed(specs, f, v)) for f, op, v in (where or [])]
+    groups = [_normalize_group(g) for g in (group_by or [])]
+    aggregates = list(aggregates or [("count", None)])
+    for func, _ in aggregates:
+        if func not in AGGREGATES:
+            raise ValueError(f"不支持的聚合函数：{func}")
+
+    table = {}  # 分组键 → [_Agg, ...]（哈希聚合）
+    for rec in stream_rows(scenes, scene_names):
+        if where and not all(
+            value is not None and _matches(op, _typed(specs, f, rec.get(f) or ""), value)
+            for f, op, value in where
+        ):
+            continue
+        key = tuple(
+            (rec.get(f) or "")[:GRAINS[grain]] if grain else (rec.get(f) or "")
+            for f, grain in groups
+        )
+        accs = table.get(key)
+        if accs is None:
+            accs = table[key] = [_Agg(func) for func, _ in aggregates]
+        for acc, (func, f) in zip(accs, aggregates):
+            if f is None:
+                acc.add(1)
+            else:
+                acc.add(_typed(specs, f, rec.get(f) or ""))
+
+    columns = [f if not grain else f"{f}({GRAIN_LABELS[grain]})" for f, grain in groups]
+    columns += [f"{AGGREGATE_LABELS[func]}:{f}" if f else AGGREGATE_LABELS[func] for func, f in aggregates]
+    rows = []
+    for key in sorted(table, key=lambda k: tuple((v == "", v) for v in k)):
+        row = list(key)
+        for acc, (func, f) in zip(table[key], aggregates):
+            value = acc.result()
+            if value is None:
+                row.append("")
+            elif func in ("count", "distinct"):
+                row.append(str(value))
+            elif func == "mean":
+                row.append(f"{value:.4g}")
+            else:
+                row.append(format_value(specs.get(f, f), value))
+        rows.append(row)
+    return QueryResult(columns, rows)
+
+def _matches(op: str, a, b) -> bool:
+    if a is None:
+        return False
+    try:
+        return bool(MATCH_OPS[op](a, b))
+    except TypeError:
+        return False
+
+def numeric_fields(scenes: dict, scene_names: list) -> list:
+    """可做求和/平均的字段名（int / float）"""
+    specs = _field_specs(scenes, scene_names)
+    return [name for name, spec in specs.items() if field_type(spec) in ("int", "float")]
@@ -0,0 +1,117 @@
+# 场景列统计（计数/求和/平均/最小/最大/去重）与缓存
+
+# scene_stats.py
+"""
+场景列统计
+- 对 SceneTable 的每一列做一次整列扫描（NumPy 可用时向量化，否则走 array 内建函数）
+- StatsCache 按场景缓存结果，编辑只使对应列失效；CSV 文件戳变化时整场景失效
+"""
+
+from config import NUMPY_AVAILABLE
+from scene_types import INT_MAX, SceneTable, field_name, field_type
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+STAT_KEYS = ("count", "sum", "mean", "min", "max", "distinct")
+STAT_LABELS = {
+    "count": "计数", "sum": "求和", "mean": "平均",
+    "min": "最小", "max": "最大", "distinct": "去重数",
+}
+
+def _empty_stats(total: int) -> dict:
+    return {"rows": total, "count": 0, "sum": None, "mean": None,
+            "min": None, "max": None, "distinct": 0}
+
+def _int_sum(present, lo: int, hi: int) -> int:
+    """整数列求和：int64 累加可能溢出回绕，按极值判断安全时走向量化，否则按 Python 整数累加"""
+    if max(abs(lo), abs(hi)) * present.size <= INT_MAX:
+        return present.sum().item()
+    return int(present.sum(dtype=object))
+
+def column_stats(column) -> dict:
+    """
+    计算单列统计，返回 {rows, count, sum, mean, min, max, distinct}
+    - count 为非空单元格数；sum/mean 仅对 int/float 列有意义，其余为 None
+    - min/max 为类型值（日期为 date，枚举按 options 顺序，文本按字典序）
+    """
+    total = len(column)
+    stats = _empty_stats(total)
+    ftype = field_type(column.spec)
+
+    if column.numeric:
+        if NUMPY_AVAILABLE:
+            values, valid = column.numpy_view()
+            present = values[valid]
+            del values, valid  # 及时释放缓冲区视图，避免 array 无法扩容
+            if not present.size:
+                return stats
+            lo, hi = present.min().item(), present.max().item()
+            stats["count"] = int(present.size)
+            stats["distinct"] = int(np.unique(present).size)
+            if ftype == "int":
+                stats["sum"] = _int_sum(present, lo, hi)
+            elif ftype == "float":
+                stats["sum"] = present.sum().item()
+            if stats["sum"] is not None:
+                stats["mean"] = stats["sum"] / stats["count"]
+        else:
+            present = [v for v, ok in zip(column.values, column.mask) if ok]
+            if not present:
+                return stats
+            lo, hi = min(present), max(present)
+            stats["count"] = len(present)
+            stats["distinct"] = len(set(present))
+            if ftype in ("int", "float"):
+                stats["sum"] = sum(present)
+                stats["mean"] = stats["sum"] / stats["count"]
+        stats["min"] = column._decode(lo)
+        stats["max"] = column._decode(hi)
+        return stats
+
+    present = [v for v in column.values if v]
+    if present:
+        stats["count"] = len(present)
+        stats["distinct"] = len(set(present))
+        stats["min"] = min(present)
+        stats["max"] = max(present)
+    return stats
+
+
+class StatsCache:
+    """按场景缓存列统计；键为字段名，排序不影响结果因此无需失效"""
+    def __init__(self):
+        self._scenes = {}  # scene_name -> {"stamp": ..., "columns": {field_name: stats}}
+
+    def bind(self, scene_name: str, stamp):
+        """关联场景的数据文件戳；文件戳变化（外部修改/重新加载）时清空该场景缓存"""
+        entry = self._scenes.get(scene_name)
+        if entry is None or entry["stamp"] != stamp:
+            self._scenes[scene_name] = {"stamp": stamp, "columns": {}}
+
+    def restamp(self, scene_name: str, stamp):
+        """保存后更新文件戳但保留已计算结果（内容与内存一致）"""
+        self._scenes.setdefault(scene_name, {"stamp": stamp, "columns": {}})["stamp"] = stamp
+
+    def invalidate(self, scene_name: str, names=None):
+        """使指定列（默认全部）的缓存失效"""
+        entry = self._scenes.get(scene_name)
+        if entry is None:
+            return
+        if names is None:
+            entry["columns"].clear()
+        else:
+            for name in names:
+                entry["columns"].pop(name, None)
+
+    def get(self, scene_name: str, table: SceneTable) -> list:
+        """返回 [(字段定义, 统计)]，只重新计算缓存缺失的列"""
+        entry = self._scenes.setdefault(scene_name, {"stamp": None, "columns": {}})
+        cached = entry["columns"]
+        result = []
+        for spec, column in zip(table.fields, table.columns):
+            name = field_name(spec)
+            if name not in cached:
+                cached[name] = column_stats(column)
+            result.append((spec, cached[name]))
+        return result
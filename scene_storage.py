@@ -0,0 +1,179 @@
+# 场景表二进制列式存储（.scol）
+
+# scene_storage.py
+"""
+场景表的紧凑二进制列式格式（tables/<场景名>.scol），可按场景替代 CSV
+文件布局：
+    b"SCOL" | 版本(1 字节) | 压缩方式(1 字节) | 头部长度(uint32 小端) | 头部 JSON | 各列数据块
+- 头部记录字段定义、行数、字节序和每个数据块的压缩前后长度
+- 文本列：每个值的字符数（array "I"）+ 全部文本拼接后的 UTF-8；读取时整体解码一次再切片
+- 数值/日期/枚举列：空值掩码 + array 原始字节，读取即 frombytes，无需逐格解析
+- 压缩：zlib（标准库）或 zstd（安装 zstandard 时可选），逐块压缩
+"""
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+
+from config import SCENE_BINARY_COMPRESSION
+from scene_types import SceneTable, field_name, field_type, field_options
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+MAGIC = b"SCOL"
+FORMAT_VERSION = 1
+COMPRESSIONS = {"none": 0, "zlib": 1, "zstd": 2}
+_HEADER = struct.Struct("<4sBBI")
+# 截断 / 损坏的文件在解析中可能抛出的异常，统一转换为 ValueError
+_CORRUPT_ERRORS = (ValueError, struct.error, KeyError, IndexError, TypeError, zlib.error) + (
+    (zstandard.ZstdError,) if ZSTD_AVAILABLE else ())
+
+
+def _compress(data: bytes, method: str) -> bytes:
+    if method == "zlib":
+        return zlib.compress(data, 1)
+    if method == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+def _decompress(data: bytes, method: str) -> bytes:
+    if method == "zlib":
+        return zlib.decompress(data)
+    if method == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise ValueError("该场景文件使用 zstd 压缩，请先安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+def resolve_compression(method=None) -> str:
+    """默认取 config.SCENE_BINARY_COMPRESSION；zstd 不可用时退回 zlib"""
+    method = method or SCENE_BINARY_COMPRESSION
+    if method == "zstd" and not ZSTD_AVAILABLE:
+        return "zlib"
+    return method if method in COMPRESSIONS else "none"
+
+# ===================== 列编码 =====================
+def _encode_column(column) -> tuple:
+    """返回 (列类型码, 数据块列表)"""
+    if column.numeric:
+        return column.typecode, [bytes(column.mask), column.values.tobytes()]
+    texts = [v or "" for v in column.values]
+    lengths = array("I", map(len, texts))
+    return "str", [lengths.tobytes(), "".join(texts).encode("utf-8")]
+
+def _decode_column(column, kind: str, blocks: list, swap: bool):
+    """把数据块直接灌入空列"""
+    if kind == "str":
+        lengths = array("I")
+        lengths.frombytes(blocks[0])
+        if swap:
+            lengths.byteswap()
+        text = blocks[1].decode("utf-8")
+        ends = list(accumulate(lengths))
+        starts = [0] + ends[:-1]
+        column.values = [text[s:e] for s, e in zip(starts, ends)]
+        return
+    column.mask = bytearray(blocks[0])
+    values = array(kind)
+    values.frombytes(blocks[1])
+    if swap:
+        values.byteswap()
+    column.values = values
+
+# ===================== 读写 =====================
+def write_scene_binary(f, table: SceneTable, compression=None):
+    """将场景表写入已打开的二进制文件对象"""
+    method = resolve_compression(compression)
+    blocks, columns = [], []
+    for column in table.columns:
+        kind, raw_blocks = _encode_column(column)
+        entry = {"kind": kind, "blocks": []}
+        for raw in raw_blocks:
+            packed = _compress(raw, method)
+            entry["blocks"].append([len(packed), len(raw)])
+            blocks.append(packed)
+        columns.append(entry)
+    header = json.dumps({
+        "fields": table.fields,
+        "rows": table.row_count(),
+        "byteorder": sys.byteorder,
+        "columns": columns,
+    }, ensure_ascii=False).encode("utf-8")
+    f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, COMPRESSIONS[method], len(header)))
+    f.write(header)
+    for packed in blocks:
+        f.write(packed)
+
+def _read_exact(f, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError(f"文件不完整（需要 {size} 字节，只剩 {len(data)} 字节）")
+    return data
+
+def _read_stored(f) -> SceneTable:
+    magic, version, method_code, header_len = _HEADER.unpack(_read_exact(f, _HEADER.size))
+    if magic != MAGIC or version > FORMAT_VERSION:
+        raise ValueError("不是可识别的场景二进制文件")
+    method = {v: k for k, v in COMPRESSIONS.items()}[method_code]
+    header = json.loads(_read_exact(f, header_len).decode("utf-8"))
+    swap = header["byteorder"] != sys.byteorder
+    rows = header["rows"]
+
+    stored = SceneTable(header["fields"])
+    if len(header["columns"]) != len(stored.columns):
+        raise ValueError("列数与字段定义不一致")
+    for column, entry in zip(stored.columns, header["columns"]):
+        blocks = []
+        for packed_len, raw_len in entry["blocks"]:
+            raw = _decompress(_read_exact(f, packed_len), method)
+            if len(raw) != raw_len:
+                raise ValueError(f"列「{field_name(column.spec)}」数据块长度不符")
+            blocks.append(raw)
+        _decode_column(column, entry["kind"], blocks, swap)
+        if len(column.values) != rows or (column.numeric and len(column.mask) != rows):
+            raise ValueError(f"列「{field_name(column.spec)}」行数与头部记录不符")
+    return stored
+
+def read_scene_binary(path, fields: list = None) -> SceneTable:
+    """
+    读取 .scol 文件为 SceneTable
+    fields 为 scenes.json 中的当前字段定义：类型与文件一致时直接使用文件中的缓冲区，
+    不一致（例如刚修改了列类型）时按文本重新解析
+    文件截断或损坏时抛出 ValueError（附带文件名与原因）
+    """
+    with open(path, "rb") as f:
+        try:
+            stored = _read_stored(f)
+        except _CORRUPT_ERRORS as e:
+            raise ValueError(f"场景文件 {path} 已损坏或不完整：{e}") from e
+
+    if fields is None:
+        return stored
+    if [_layout(s) for s in fields] == [_layout(s) for s in stored.fields]:
+        stored.fields = list(fields)
+        for column, spec in zip(stored.columns, stored.fields):
+            column.spec = spec
+        return stored
+    return SceneTable.from_records(fields, stored.to_records())
+
+def _layout(spec) -> tuple:
+    """决定存储布局的部分：字段名、类型、枚举选项（索引等其他声明不影响）"""
+    return field_name(spec), field_type(spec), field_options(spec)
+
+def iter_binary_records(path):
+    """
+    以 {字段名: 文本} 形式逐行产出（供查询引擎 / load_records 使用）
+    注意：不是流式读取。每个数据块包含整列的值，必须先解码全部列才能拼出第一行，
+    内存占用与 read_scene_binary 相同；只是把文本化推迟到逐行产出时
+    """
+    table = read_scene_binary(path)
+    names = table.names
+    for row in range(table.row_count()):
+        yield {name: column.text(row) for name, column in zip(names, table.columns)}
@@ -0,0 +1,524 @@
+# 场景字段类型与紧凑列存储
+
+# scene_types.py
+"""
+场景字段类型定义与紧凑列式存储
+- scenes.json 中的字段既可以是字符串（旧版写法，类型为 str），
+  也可以是 {"name": ..., "type": ..., "options": [...]} 字典
+- int / float / date / enum 列用 array 紧凑缓冲区保存，str 列仍是 Python 列表
+- 安装 NumPy 时排序/筛选走向量化路径（对 array 缓冲区零拷贝）
+"""
+
+import math
+from array import array
+from datetime import date
+
+from config import NUMPY_AVAILABLE
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+# ===================== 字段定义 =====================
+FIELD_TYPES = ("str", "int", "float", "date", "enum")
+FIELD_TYPE_LABELS = {
+    "str": "文本", "int": "整数", "float": "小数", "date": "日期", "enum": "枚举"
+}
+INDEX_KINDS = ("hash", "sorted")
+INT_MIN, INT_MAX = -2 ** 63, 2 ** 63 - 1  # 整数列以 int64（array "q"）保存
+INDEX_KIND_LABELS = {None: "无索引", "hash": "哈希（等值查找）", "sorted": "有序（范围查找）"}
+
+def field_name(spec) -> str:
+    """字段名（兼容字符串与字典两种写法）"""
+    if isinstance(spec, dict):
+        return spec.get("name", "")
+    return str(spec)
+
+def field_type(spec) -> str:
+    """字段类型，未声明或未知类型一律视为 str"""
+    if isinstance(spec, dict) and spec.get("type") in FIELD_TYPES:
+        return spec["type"]
+    return "str"
+
+def field_options(spec) -> list:
+    """枚举字段的可选值"""
+    if isinstance(spec, dict):
+        return list(spec.get("options", []))
+    return []
+
+def field_names(fields: list) -> list:
+    """字段定义列表 → 字段名列表（CSV 表头使用）"""
+    return [field_name(f) for f in fields]
+
+def field_index(spec):
+    """字段声明的索引类型："hash" / "sorted" / None"""
+    if isinstance(spec, dict) and spec.get("index") in INDEX_KINDS:
+        return spec["index"]
+    return None
+
+def make_field(name: str, ftype: str = "str", options=None):
+    """构造字段定义；str 类型仍保存为纯字符串，保持 scenes.json 与旧版兼容"""
+    if ftype == "str" or ftype not in FIELD_TYPES:
+        return name
+    spec = {"name": name, "type": ftype}
+    if ftype == "enum":
+        spec["options"] = list(options or [])
+    return spec
+
+def update_field(spec, **changes):
+    """
+    返回修改后的字段定义副本，保留未改动的键（如 index）
+    - 值为 None 的键会被删除；只剩 name 的 str 字段折叠回纯字符串
+    """
+    new = dict(spec) if isinstance(spec, dict) else {"name": field_name(spec)}
+    for key, value in changes.items():
+        if value is None:
+            new.pop(key, None)
+        else:
+            new[key] = value
+    if new.get("type") in (None, "str"):
+        new.pop("type", None)
+        new.pop("options", None)
+    if set(new) == {"name"}:
+        return new["name"]
+    return new
+
+# ===================== 值解析 / 格式化 =====================
+def parse_value(spec, text):
+    """
+    将单元格文本解析为字段类型对应的值
+    - 空文本返回 None（空值）
+    - 不合法时抛出 ValueError，消息可直接展示给用户
+    """
+    text = "" if text is None else str(text).strip()
+    ftype = field_type(spec)
+    if ftype == "str":
+        return text
+    if not text:
+        return None
+    try:
+        if ftype == "int":
+            value = int(text)
+        elif ftype == "float":
+            value = float(text)
+        elif ftype == "date":
+            return date.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"字段「{field_name(spec)}」需要{FIELD_TYPE_LABELS[ftype]}，无法识别：{text}")
+    if ftype == "int":
+        if not INT_MIN <= value <= INT_MAX:
+            raise ValueError(f"字段「{field_name(spec)}」的整数超出 64 位范围：{text}")
+        return value
+    if ftype == "float":
+        if not math.isfinite(value):  # nan 无法比较排序，inf 会让求和等统计失去意义
+            raise ValueError(f"字段「{field_name(spec)}」需要有限的小数，不支持：{text}")
+        return value
+    # enum
+    if text not in field_options(spec):
+        raise ValueError(f"字段「{field_name(spec)}」只允许：{'、'.join(field_options(spec))}")
+    return text
+
+def format_value(spec, value) -> str:
+    """将类型值格式化为单元格 / CSV 文本"""
+    if value is None:
+        return ""
+    if field_type(spec) == "float":
+        text = repr(value)
+        return text[:-2] if text.endswith(".0") else text  # 3.0 → "3"，与手写 CSV 保持一致
+    if field_type(spec) == "date":
+        return value.isoformat()
+    return str(value)
+
+# ===================== 列存储 =====================
+class Column:
+    """文本列（基类）：值保存在 Python 列表中"""
+    numeric = False
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def append_text(self, text):
+        self.values.append(parse_value(self.spec, text))
+
+    def get(self, row):
+        """返回类型值（空值为 None）"""
+        return self.values[row] or None
+
+    def set(self, row, value):
+        self.values[row] = "" if value is None else value
+
+    def text(self, row) -> str:
+        return format_value(self.spec, self.get(row))
+
+    def set_text(self, row, text):
+        """校验后写入，不合法时抛出 ValueError"""
+        self.set(row, parse_value(self.spec, text))
+
+    def take(self, order):
+        """按行号序列重排（排序 / 筛选后使用）"""
+        self.values = [self.values[i] for i in order]
+
+    def insert_empty(self, row, count):
+        """在 row 前插入 count 个空值"""
+        self.values[row:row] = [""] * count
+
+    def delete(self, row, count):
+        del self.values[row:row + count]
+
+    def move(self, row, count, dest):
+        """把 [row, row+count) 移到移动前的第 dest 行之前（整段切片操作，不逐行搬移）"""
+        block = self.values[row:row + count]
+        del self.values[row:row + count]
+        pos = dest if dest <= row else dest - count
+        self.values[pos:pos] = block
+
+    def copy(self) -> "Column":
+        """数据副本（后台保存使用，之后对原列的修改不影响副本）"""
+        column = make_column(self.spec)
+        column.values = self.values[:]
+        return column
+
+    def argsort(self, reverse=False) -> list:
+        """返回排序后的行号列表，空值始终排在最后"""
+        rows = range(len(self))
+        non_null = [r for r in rows if self.get(r) is not None]
+        nulls = [r for r in rows if self.get(r) is None]
+        non_null.sort(key=self.get, reverse=reverse)
+        return non_null + nulls
+
+    def match(self, op: str, value) -> list:
+        """返回满足条件的行号列表；op 取值见 MATCH_OPS"""
+        test = MATCH_OPS[op]
+        return [r for r in range(len(self)) if _safe_test(test, self.get(r), value)]
+
+    def nbytes(self) -> int:
+        """估算数据占用字节数"""
+        return sum(len(v) * 2 + 49 for v in self.values)
+
+
+class NumericColumn(Column):
+    """数值类列：array 缓冲区 + 空值掩码（1 = 有值）"""
+    numeric = True
+    typecode = "d"
+    np_dtype = "float64"
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.values = array(self.typecode)
+        self.mask = bytearray()
+
+    def _encode(self, value):
+        return value
+
+    def _decode(self, raw):
+        return raw
+
+    def append_text(self, text):
+        value = parse_value(self.spec, text)
+        self.values.append(0 if value is None else self._encode(value))
+        self.mask.append(0 if value is None else 1)
+
+    def get(self, row):
+        if not self.mask[row]:
+            return None
+        return self._decode(self.values[row])
+
+    def set(self, row, value):
+        self.values[row] = 0 if value is None else self._encode(value)
+        self.mask[row] = 0 if value is None else 1
+
+    def take(self, order):
+        self.values = array(self.typecode, (self.values[i] for i in order))
+        self.mask = bytearray(self.mask[i] for i in order)
+
+    def insert_empty(self, row, count):
+        self.values[row:row] = array(self.typecode, bytes(self.values.itemsize * count))
+        self.mask[row:row] = bytes(count)
+
+    def delete(self, row, count):
+        del self.values[row:row + count]
+        del self.mask[row:row + count]
+
+    def move(self, row, count, dest):
+        pos = dest if dest <= row else dest - count
+        for name in ("values", "mask"):
+            data = getattr(self, name)
+            block = data[row:row + count]
+            del data[row:row + count]
+            data[pos:pos] = block
+
+    def copy(self) -> "NumericColumn":
+        column = super().copy()
+        column.mask = bytearray(self.mask)
+        return column
+
+    def numpy_view(self):
+        """返回 (values, valid) 两个 NumPy 视图，与 array 共享内存"""
+        values = np.frombuffer(self.values, dtype=self.np_dtype) if len(self) else np.empty(0, self.np_dtype)
+        valid = np.frombuffer(self.mask, dtype=np.bool_) if len(self) else np.empty(0, np.bool_)
+        return values, valid
+
+    def argsort(self, reverse=False) -> list:
+        if not NUMPY_AVAILABLE:
+            return super().argsort(reverse)
+        values, valid = self.numpy_view()
+        rows = np.flatnonzero(valid)
+        if reverse:
+            # 不对数值取负（INT_MIN 取负会溢出）：倒序输入做稳定升序再整体反转，
+            # 得到降序且相等值保持原顺序，与 list.sort(reverse=True) 一致
+            rows = rows[::-1]
+            rows = rows[np.argsort(values[rows], kind="stable")][::-1]
+        else:
+            rows = rows[np.argsort(values[rows], kind="stable")]
+        return rows.tolist() + np.flatnonzero(~valid).tolist()  # 空值始终排在最后
+
+    def match(self, op: str, value) -> list:
+        if not NUMPY_AVAILABLE or op not in NUMPY_OPS or value is None:
+            return super().match(op, value)
+        values, valid = self.numpy_view()
+        hits = NUMPY_OPS[op](values, self._encode(value)) & valid
+        return np.flatnonzero(hits).tolist()
+
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values) + len(self.mask)
+
+
+class IntColumn(NumericColumn):
+    typecode = "q"
+    np_dtype = "int64"
+
+
+class FloatColumn(NumericColumn):
+    typecode = "d"
+    np_dtype = "float64"
+
+
+class DateColumn(NumericColumn):
+    """日期列：以 proleptic 公历序号（date.toordinal）保存为 int32"""
+    typecode = "i"
+    np_dtype = "int32"
+
+    def _encode(self, value):
+        return value.toordinal()
+
+    def _decode(self, raw):
+        return date.fromordinal(raw)
+
+
+class EnumColumn(NumericColumn):
+    """枚举列：保存 options 下标（int16）"""
+    typecode = "h"
+    np_dtype = "int16"
+
+    def _encode(self, value):
+        return field_options(self.spec).index(value)
+
+    def _decode(self, raw):
+        return field_options(self.spec)[raw]
+
+    def match(self, op: str, value) -> list:
+        # 枚举按文本比较（值可能不在 options 中）；排序仍按 options 声明顺序
+        return Column.match(self, op, value)
+
+
+COLUMN_CLASSES = {
+    "str": Column, "int": IntColumn, "float": FloatColumn,
+    "date": DateColumn, "enum": EnumColumn,
+}
+
+MATCH_OPS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "contains": lambda a, b: str(b) in str(a),
+}
+
+if NUMPY_AVAILABLE:
+    NUMPY_OPS = {
+        "==": np.equal, "!=": np.not_equal, "<": np.less,
+        "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+    }
+else:
+    NUMPY_OPS = {}
+
+def _safe_test(test, a, b) -> bool:
+    """空值不满足任何比较条件"""
+    if a is None:
+        return False
+    try:
+        return bool(test(a, b))
+    except TypeError:
+        return False
+
+def make_column(spec) -> Column:
+    return COLUMN_CLASSES[field_type(spec)](spec)
+
+# ===================== 场景表 =====================
+class SceneTable:
+    """
+    一个场景的全部数据（列式）
+    fields 保存字段定义（字符串或字典），columns 与之一一对应
+    """
+    def __init__(self, fields: list):
+        self.fields = list(fields)
+        self.columns = [make_column(spec) for spec in self.fields]
+        self.indexes = None  # 可选的 scene_index.SceneIndexes，由调用方挂载
+
+    @classmethod
+    def from_records(cls, fields: list, records: list) -> "SceneTable":
+        """
+        由 load_records 的结果构建
+        - 某个类型列中出现无法解析的旧数据时，该列退化为 str 并打印警告，保证不丢数据
+        """
+        table = cls(fields)
+        for col, spec in enumerate(table.fields):
+            name = field_name(spec)
+            column = table.columns[col]
+            try:
+                for rec in records:
+                    column.append_text(rec.get(name, ""))
+            except ValueError as e:
+                print(f"警告: {e}，该列已按文本加载")
+                table.fields[col] = update_field(spec, type=None)
+                column = table.columns[col] = Column(table.fields[col])
+                for rec in records:
+                    column.append_text(rec.get(name, ""))
+        return table
+
+    @property
+    def names(self) -> list:
+        return field_names(self.fields)
+
+    def row_count(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def column_count(self) -> int:
+        return len(self.columns)
+
+    def get(self, row: int, col: int):
+        return self.columns[col].get(row)
+
+    def text(self, row: int, col: int) -> str:
+        return self.columns[col].text(row)
+
+    def set_text(self, row: int, col: int, text):
+        """校验后写入单元格，不合法时抛出 ValueError"""
+        column = self.columns[col]
+        old = column.get(row)
+        column.set_text(row, text)
+        if self.indexes is not None:
+            self.indexes.on_cell_changed(field_name(self.fields[col]), row, old, column.get(row))
+
+    def set_block(self, top: int, left: int, block: list):
+        """
+        批量写入矩形区域（粘贴 / 剪切），block 为按列存放的已校验类型值
+        涉及列的索引整体失效后重建，不逐格增量维护
+        """
+        for offset, values in enumerate(block):
+            column = self.columns[left + offset]
+            for row, value in enumerate(values, top):
+                column.set(row, value)
+        if self.indexes is not None:
+            self.indexes.on_block_changed(self.names[left:left + len(block)])
+
+    def sort_rows(self, col: int, reverse=False):
+        """按指定列原地排序全部行"""
+        order = self.columns[col].argsort(reverse)
+        for column in self.columns:
+            column.take(order)
+        if self.indexes is not None:
+            self.indexes.on_reorder(order)
+
+    # ===================== 行列结构调整（每次调用处理一整段，供模型批量操作使用） =====================
+    def insert_rows(self, row: int, count: int):
+        """在 row 前插入 count 个空行"""
+        for column in self.columns:
+            column.insert_empty(row, count)
+        if self.indexes is not None:
+            self.indexes.on_rows_changed()
+
+    def remove_rows(self, row: int, count: int):
+        for column in self.columns:
+            column.delete(row, count)
+        if self.indexes is not None:
+            self.indexes.on_rows_changed()
+
+    def move_rows(self, row: int, count: int, dest: int):
+        """把 [row, row+count) 移到移动前的第 dest 行之前"""
+        for column in self.columns:
+            column.move(row, count, dest)
+        if self.indexes is not None:
+            order = list(range(row)) + list(range(row + count, self.row_count()))
+            pos = dest if dest <= row else dest - count
+            order[pos:pos] = range(row, row + count)
+            self.indexes.on_reorder(order)
+
+    def check_new_fields(self, specs: list):
+        """新字段名与已有字段或彼此重复时抛出 ValueError"""
+        names = field_names(specs)
+        duplicated = (set(names) & set(self.names)) | {n for n in names if names.count(n) > 1}
+        if duplicated:
+            raise ValueError(f"字段名已存在：{'、'.join(sorted(duplicated))}")
+
+    def insert_columns(self, col: int, specs: list):
+        """在 col 前插入若干空列"""
+        self.check_new_fields(specs)
+        rows = self.row_count()
+        new_columns = []
+        for spec in specs:
+            column = make_column(spec)
+            column.insert_empty(0, rows)
+            new_columns.append(column)
+        self.fields[col:col] = specs
+        self.columns[col:col] = new_columns
+
+    def remove_columns(self, col: int, count: int):
+        names = self.names[col:col + count]
+        del self.fields[col:col + count]
+        del self.columns[col:col + count]
+        if self.indexes is not None:
+            self.indexes.on_block_changed(names)
+
+    def move_columns(self, col: int, count: int, dest: int):
+        """把 [col, col+count) 列移到移动前的第 dest 列之前（索引按字段名保存，不受影响）"""
+        pos = dest if dest <= col else dest - count
+        for items in (self.fields, self.columns):
+            block = items[col:col + count]
+            del items[col:col + count]
+            items[pos:pos] = block
+
+    def retype_column(self, col: int, spec):
+        """修改列类型，已有数据不符合新类型时抛出 ValueError（原列保持不变）"""
+        old = self.columns[col]
+        new = make_column(spec)
+        for row in range(len(old)):
+            new.append_text(old.text(row))
+        self.fields[col] = spec
+        self.columns[col] = new
+        if self.indexes is not None:
+            self.indexes.on_column_replaced(field_name(spec))
+
+    def copy(self) -> "SceneTable":
+        """数据快照（不含索引）：数值列整块复制缓冲区，代价远低于 to_records"""
+        table = SceneTable.__new__(SceneTable)
+        table.fields = list(self.fields)
+        table.columns = [column.copy() for column in self.columns]
+        table.indexes = None
+        return table
+
+    def to_records(self) -> list:
+        """转换回 save_records 使用的 [{字段名: 文本}] 结构"""
+        names = self.names
+        return [
+            {name: column.text(row) for name, column in zip(names, self.columns)}
+            for row in range(self.row_count())
+        ]
+
+    def nbytes(self) -> int:
+        return sum(column.nbytes() for column in self.columns)
@@ -0,0 +1,198 @@
+# 场景字段校验规则（必填 / 唯一 / 范围 / 正则）与按列批量校验
+
+# scene_validation.py
+"""
+场景字段校验
+- 规则保存在 scenes.json 的字段定义中：{"name": ..., "rules": {"required": true, "min": "0", ...}}
+  min / max 以单元格文本保存（与 CSV 一致），只对 int / float / date 字段有效；pattern 只对文本字段有效
+- 类型本身由列存储保证（编辑 / 粘贴时即按类型校验），这里不重复检查
+- validate_column 对整列一次计算（NumPy 可用时对 array 缓冲区向量化），
+  SceneValidator 按列缓存结果，编辑后只重新校验改动的列 / 行
+"""
+
+import re
+from collections import Counter
+
+from config import NUMPY_AVAILABLE
+from scene_types import field_name, field_type, parse_value, format_value
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+RULE_KEYS = ("required", "unique", "min", "max", "pattern")
+RULE_LABELS = {"required": "必填", "unique": "唯一", "min": "最小值", "max": "最大值", "pattern": "正则格式"}
+RANGE_TYPES = ("int", "float", "date")
+
+
+def field_rules(spec) -> dict:
+    """字段声明的校验规则（未声明时为空字典）"""
+    if isinstance(spec, dict) and isinstance(spec.get("rules"), dict):
+        return {k: v for k, v in spec["rules"].items() if k in RULE_KEYS and v not in (None, "", False)}
+    return {}
+
+def normalize_rules(spec, rules: dict) -> dict:
+    """
+    校验并规范化用户输入的规则，返回可写入字段定义的字典
+    不适用于该字段类型的规则被丢弃；min / max / pattern 不合法时抛出 ValueError
+    """
+    result = {}
+    for key in ("required", "unique"):
+        if rules.get(key):
+            result[key] = True
+    if field_type(spec) in RANGE_TYPES:
+        for key in ("min", "max"):
+            text = str(rules.get(key) or "").strip()
+            if text:
+                result[key] = format_value(spec, parse_value(spec, text))
+        if "min" in result and "max" in result and parse_value(spec, result["min"]) > parse_value(spec, result["max"]):
+            raise ValueError(f"字段「{field_name(spec)}」的最小值大于最大值")
+    elif field_type(spec) == "str" and rules.get("pattern"):
+        try:
+            re.compile(rules["pattern"])
+        except re.error as e:
+            raise ValueError(f"正则表达式无效：{e}")
+        result["pattern"] = rules["pattern"]
+    return result
+
+def _add(errors: dict, rows, message: str):
+    for row in rows:
+        errors[row] = f"{errors[row]}；{message}" if row in errors else message
+
+def _bounds(spec, rules: dict) -> tuple:
+    """(最小值, 最大值) 类型值；字段已不是范围类型（例如加载时退化为文本）时忽略"""
+    if field_type(spec) not in RANGE_TYPES:
+        return None, None
+    try:
+        lo = parse_value(spec, rules["min"]) if "min" in rules else None
+        hi = parse_value(spec, rules["max"]) if "max" in rules else None
+    except ValueError:
+        return None, None
+    return lo, hi
+
+def validate_column(column, spec) -> dict:
+    """整列校验，返回 {行号: 错误消息}"""
+    rules = field_rules(spec)
+    if not rules:
+        return {}
+    errors = {}
+    lo, hi = _bounds(spec, rules)
+
+    if column.numeric and NUMPY_AVAILABLE:
+        values, valid = column.numpy_view()
+        if rules.get("required"):
+            _add(errors, np.flatnonzero(~valid).tolist(), "必填")
+        if lo is not None:
+            _add(errors, np.flatnonzero(valid & (values < column._encode(lo))).tolist(), f"小于最小值 {rules['min']}")
+        if hi is not None:
+            _add(errors, np.flatnonzero(valid & (values > column._encode(hi))).tolist(), f"大于最大值 {rules['max']}")
+        if rules.get("unique"):
+            present = np.flatnonzero(valid)
+            _, inverse, counts = np.unique(values[present], return_inverse=True, return_counts=True)
+            _add(errors, present[counts[inverse] > 1].tolist(), "与其他行重复")
+        del values, valid  # 及时释放缓冲区视图，避免 array 无法扩容
+        return errors
+
+    values = [column.get(row) for row in range(len(column))] if column.numeric else column.values
+    if rules.get("required"):
+        _add(errors, [r for r, v in enumerate(values) if v is None or v == ""], "必填")
+    if lo is not None:
+        _add(errors, [r for r, v in enumerate(values) if v is not None and v < lo], f"小于最小值 {rules['min']}")
+    if hi is not None:
+        _add(errors, [r for r, v in enumerate(values) if v is not None and v > hi], f"大于最大值 {rules['max']}")
+    if "pattern" in rules and field_type(spec) == "str":
+        match = re.compile(rules["pattern"]).fullmatch
+        _add(errors, [r for r, v in enumerate(values) if v and not match(v)], "不符合格式要求")
+    if rules.get("unique"):
+        counts = Counter(values)
+        _add(errors, [r for r, v in enumerate(values) if v not in (None, "") and counts[v] > 1], "与其他行重复")
+    return errors
+
+def validate_cells(column, spec, rows) -> dict:
+    """只校验指定行（不含唯一性，唯一性需要整列）"""
+    rules = field_rules(spec)
+    errors = {}
+    lo, hi = _bounds(spec, rules)
+    match = re.compile(rules["pattern"]).fullmatch if "pattern" in rules and field_type(spec) == "str" else None
+    for row in rows:
+        value = column.get(row)
+        if value is None or value == "":
+            if rules.get("required"):
+                _add(errors, (row,), "必填")
+            continue
+        if lo is not None and value < lo:
+            _add(errors, (row,), f"小于最小值 {rules['min']}")
+        if hi is not None and value > hi:
+            _add(errors, (row,), f"大于最大值 {rules['max']}")
+        if match is not None and not match(value):
+            _add(errors, (row,), "不符合格式要求")
+    return errors
+
+
+class SceneValidator:
+    """一个已加载场景的校验结果缓存（按列对象保存，列移动不影响）"""
+    def __init__(self, table):
+        self.table = table
+        self.errors = {}     # Column → {行号: 错误消息}
+        self._by_row = None  # 行号 → [(字段名, 消息)]，按需从 errors 汇总
+
+    def validate_all(self) -> int:
+        """整表重新校验（加载、增删行、排序后），返回错误单元格数"""
+        self.errors = {}
+        for spec, column in zip(self.table.fields, self.table.columns):
+            result = validate_column(column, spec)
+            if result:
+                self.errors[column] = result
+        self._by_row = None
+        return self.count()
+
+    def revalidate(self, cols, rows=None):
+        """
+        编辑后重新校验 cols 列；给出 rows 且该列没有唯一性规则时只检查这些行
+        """
+        for col in cols:
+            spec, column = self.table.fields[col], self.table.columns[col]
+            if rows is not None and not field_rules(spec).get("unique"):
+                current = self.errors.get(column, {})
+                for row in rows:
+                    current.pop(row, None)
+                current.update(validate_cells(column, spec, rows))
+                result = current
+            else:
+                result = validate_column(column, spec)
+            if result:
+                self.errors[column] = result
+            else:
+                self.errors.pop(column, None)
+        self._by_row = None
+
+    def prune(self):
+        """删除已不在表中的列（删列、改类型后）的结果"""
+        live = {id(column) for column in self.table.columns}
+        self.errors = {c: e for c, e in self.errors.items() if id(c) in live}
+        self._by_row = None
+
+    def cell_error(self, row: int, col: int):
+        errors = self.errors.get(self.table.columns[col])
+        return errors.get(row) if errors else None
+
+    def count(self) -> int:
+        return sum(len(e) for e in self.errors.values())
+
+    def row_errors(self, row: int) -> list:
+        """某一行的全部错误 [(字段名, 消息)]"""
+        if self._by_row is None:
+            by_row = {}
+            for spec, column in zip(self.table.fields, self.table.columns):
+                for r, message in self.errors.get(column, {}).items():
+                    by_row.setdefault(r, []).append((field_name(spec), message))
+            self._by_row = by_row
+        return self._by_row.get(row, [])
+
+    def first_error(self):
+        """行号最小的错误 (行号, 字段名, 消息)，没有错误时为 None"""
+        rows = [min(e) for e in self.errors.values() if e]
+        if not rows:
+            return None
+        row = min(rows)
+        name, message = self.row_errors(row)[0]
+        return row, name, message
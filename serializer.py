@@ -0,0 +1,174 @@
+# JSON 序列化（可选 orjson、紧凑模式、流式解析）
+
+# serializer.py
+"""
+数据文件统一的 JSON 序列化入口
+- 安装了 orjson 时优先使用（编解码快数倍），否则使用标准库 json；config.JSON_BACKEND 可强制指定
+- compact=True 时不缩进、不加空格（程序读写的数据文件默认使用，见 config.JSON_COMPACT）
+- iter_events / load_streaming：按块读取大文件，逐个解析 "items" 数组元素，
+  不需要先把整个文件读成一个字符串
+"""
+
+import json
+
+from config import JSON_BACKEND, JSON_COMPACT
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+BACKENDS = ("stdlib", "orjson")
+STREAM_CHUNK_SIZE = 64 * 1024
+_DELIMITERS = " \t\r\n,]}"
+
+
+def resolve_backend(backend=None) -> str:
+    """backend / config.JSON_BACKEND 为 "auto" 时按是否安装 orjson 选择"""
+    backend = backend or JSON_BACKEND
+    if backend == "orjson" and not ORJSON_AVAILABLE:
+        print("警告: 未安装 orjson，已改用标准库 json。可运行：pip install orjson")
+        return "stdlib"
+    if backend not in BACKENDS:
+        return "orjson" if ORJSON_AVAILABLE else "stdlib"
+    return backend
+
+def dumps(obj, compact: bool = None, backend=None) -> bytes:
+    """序列化为 UTF-8 字节（中文不转义）"""
+    compact = JSON_COMPACT if compact is None else compact
+    if resolve_backend(backend) == "orjson":
+        try:
+            return orjson.dumps(obj, option=0 if compact else orjson.OPT_INDENT_2)
+        except TypeError:
+            pass  # 超出 64 位的整数、非字符串键等，交给标准库
+    if compact:
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(obj, ensure_ascii=False, indent=2)
+    return text.encode("utf-8")
+
+def loads(data, backend=None):
+    """解析 bytes 或 str"""
+    if resolve_backend(backend) == "orjson":
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+# ===================== 流式解析 =====================
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def iter_events(f, array_key: str = "items", chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    流式解析文本文件对象 f，产出事件：
+    - ("start", "object" / "array" / "value")：顶层类型，总是第一个事件
+    - ("field", 键, 值)：顶层对象中除 array_key 以外的字段
+    - ("array", array_key)：开始逐个产出顶层对象中 array_key 数组的元素
+    - ("item", 值)：顶层数组（或顶层对象 array_key 数组）中的每个元素
+    - ("value", 值)：顶层既不是对象也不是数组
+    格式错误时抛出 json.JSONDecodeError
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def peek() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return ""
+
+    def expect(char: str):
+        nonlocal pos
+        if peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", buf, pos)
+        pos += 1
+
+    def value():
+        nonlocal pos
+        peek()
+        while True:
+            try:
+                result, end = decoder.raw_decode(buf, pos)
+                # 数字可能恰好被块边界截断（如 "3." + "25"），后面不是分隔符时读入更多再解析
+                if eof or (end < len(buf) and (buf[end] in _DELIMITERS or not _is_number(result))):
+                    pos = end
+                    return result
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+
+    def items():
+        nonlocal pos
+        expect("[")
+        if peek() == "]":
+            pos += 1
+            return
+        while True:
+            yield value()
+            char = peek()
+            pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos - 1)
+
+    top = peek()
+    yield "start", {"[": "array", "{": "object"}.get(top, "value")
+    if top == "[":
+        for item in items():
+            yield "item", item
+    elif top == "{":
+        pos += 1
+        if peek() == "}":
+            return
+        while True:
+            key = value()
+            expect(":")
+            if key == array_key and peek() == "[":
+                yield "array", key
+                for item in items():
+                    yield "item", item
+            else:
+                yield "field", key, value()
+            char = peek()
+            pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos - 1)
+    else:
+        yield "value", value()
+
+def load_streaming(f, array_key: str = "items"):
+    """用 iter_events 组装出与 json.load 相同的结果"""
+    result = None
+    for event in iter_events(f, array_key):
+        kind = event[0]
+        if kind == "start":
+            result = {"object": {}, "array": []}.get(event[1])
+        elif kind == "field":
+            result[event[1]] = event[2]
+        elif kind == "array":
+            result[event[1]] = []
+        elif kind == "item":
+            (result[array_key] if isinstance(result, dict) else result).append(event[1])
+        else:
+            result = event[1]
+    return result
@@ -0,0 +1,71 @@
+# 启动阶段计时
+
+# startup.py
+"""
+启动阶段计时
+- main.py 最先导入本模块，以导入时刻为起点；每个阶段结束时 mark("阶段")，记录与上一阶段结束的间隔
+  （模块导入 → 创建 QApplication → 数据加载 → 主窗口初始化 → 欢迎页首次绘制）
+- 不与前一阶段相连的耗时（后台预读、主界面构建）用 mark_duration 直接记录
+- 主界面构建完成时 report() 打印一行汇总，并向 data/startup.log 追加一条 JSON 记录；
+  各阶段同时记入 profiler（startup.<阶段>），诊断窗口中可查看
+"""
+
+import time
+from datetime import datetime
+
+import serializer
+from config import STARTUP_LOG_FILE
+from profiler import record
+
+PHASE_LABELS = {
+    "import": "模块导入", "qapp": "创建 QApplication", "data_load": "数据加载", "window": "主窗口初始化",
+    "first_paint": "首次绘制", "prefetch": "预读首个场景", "ui_build": "主界面构建",
+}
+
+_start = time.perf_counter()
+_last = _start
+_phases = {}  # 阶段 → 秒
+_reported = False
+
+
+def mark(phase: str):
+    """阶段结束：记录距上一阶段结束（或启动）的时间；同一阶段只记录第一次"""
+    global _last
+    if phase in _phases:
+        return
+    now = time.perf_counter()
+    mark_duration(phase, now - _last)
+    _last = now
+
+def mark_duration(phase: str, seconds: float):
+    if phase in _phases:
+        return
+    _phases[phase] = seconds
+    record(f"startup.{phase}", seconds)
+
+def elapsed() -> float:
+    """距启动的秒数"""
+    return time.perf_counter() - _start
+
+def report():
+    """打印并记录本次启动的各阶段耗时（只执行一次）"""
+    global _reported
+    if _reported:
+        return
+    _reported = True
+    parts = [f"{PHASE_LABELS.get(k, k)} {v * 1000:.0f} ms" for k, v in _phases.items()]
+    print(f"启动耗时：{'，'.join(parts)}（距启动共 {elapsed() * 1000:.0f} ms）")
+    entry = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "phases_ms": {k: round(v * 1000, 1) for k, v in _phases.items()},
+    }
+    try:
+        with open(STARTUP_LOG_FILE, "ab") as f:
+            f.write(serializer.dumps(entry, compact=True) + b"\n")
+    except OSError as e:
+        print(f"警告: 启动耗时记录写入失败: {e}")
+
+def report_click(seconds: float, prebuilt: bool):
+    """点击“开始使用”到主界面可用的耗时"""
+    record("startup.click_to_usable", seconds)
+    print(f"开始使用 → 主界面可用：{seconds * 1000:.1f} ms（{'已在欢迎页预构建' if prebuilt else '点击后构建'}）")
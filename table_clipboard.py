@@ -0,0 +1,65 @@
+# 场景表格与剪贴板之间的 TSV 转换（分块、限制内存）
+
+# table_clipboard.py
+"""
+场景表格选区 ↔ TSV 文本（与 Excel / WPS 互相粘贴的格式）
+- 复制：按 CLIPBOARD_CHUNK_ROWS 行一块生成 TSV，累计超过 CLIPBOARD_MAX_BYTES 时中止，
+  不会为几十万个单元格先构建完整的二维列表
+- 粘贴：逐行读取 TSV（csv 模块处理引号、单元格内换行），按目标列类型解析成类型值，
+  全部通过校验后才交给 SceneTable.set_block 一次写入；任何一格不合法都不修改表格
+"""
+
+import csv
+import io
+
+from config import CLIPBOARD_MAX_BYTES, CLIPBOARD_CHUNK_ROWS
+from scene_types import parse_value
+
+
+def iter_tsv_chunks(table, rows, cols, chunk_rows: int = CLIPBOARD_CHUNK_ROWS):
+    """按块产出选区的 TSV 文本；rows / cols 为升序的行号、列号序列"""
+    columns = [table.columns[c] for c in cols]
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter="\t", lineterminator="\n")
+    for start in range(0, len(rows), chunk_rows):
+        for row in rows[start:start + chunk_rows]:
+            writer.writerow([column.text(row) for column in columns])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+
+def selection_to_tsv(table, rows, cols, max_bytes: int = CLIPBOARD_MAX_BYTES) -> str:
+    """选区转 TSV，超过 max_bytes（UTF-8 字节）时抛出 ValueError"""
+    chunks, size = [], 0
+    for chunk in iter_tsv_chunks(table, rows, cols):
+        size += len(chunk.encode("utf-8"))
+        if size > max_bytes:
+            raise ValueError(f"选区过大（超过 {max_bytes // (1024 * 1024)} MB），请缩小范围后分次复制")
+        chunks.append(chunk)
+    return "".join(chunks)
+
+def parse_tsv_block(text: str, fields: list, max_rows: int, max_bytes: int = CLIPBOARD_MAX_BYTES):
+    """
+    把 TSV 文本解析为按列存放的类型值，fields 为目标列（从粘贴起点列开始）的字段定义
+    返回 (列值列表, 行数, 被截掉的行数, 被截掉的列数)；超出表格范围的部分丢弃
+    不合法的单元格抛出 ValueError（消息含粘贴块中的行列位置）
+    """
+    if len(text) > max_bytes:
+        raise ValueError(f"剪贴板内容过大（超过 {max_bytes // (1024 * 1024)} MB），请分次粘贴")
+    width = len(fields)
+    values = [[] for _ in fields]
+    rows = block_width = dropped_rows = dropped_cols = 0
+    for line_no, cells in enumerate(csv.reader(io.StringIO(text), delimiter="\t"), 1):
+        if rows >= max_rows:
+            dropped_rows += 1
+            continue
+        dropped_cols = max(dropped_cols, len(cells) - width)
+        block_width = max(block_width, min(len(cells), width))
+        cells += [""] * (width - len(cells))  # 参差不齐的行按空单元格补齐
+        for col, (spec, cell) in enumerate(zip(fields, cells)):
+            try:
+                values[col].append(parse_value(spec, cell))
+            except ValueError as e:
+                raise ValueError(f"第 {line_no} 行第 {col + 1} 列：{e}")
+        rows += 1
+    return values[:block_width], rows, dropped_rows, dropped_cols
@@ -0,0 +1,38 @@
+# data_backup 快照恢复测试
+
+# tests/test_data_backup.py
+"""
+快照恢复：已达到 BACKUP_KEEP 个快照时恢复最旧的快照，恢复前的安全快照不能把它清理掉
+"""
+
+import data_backup
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_restore_oldest_snapshot_when_keep_reached(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # DATA_DIR / BACKUP_DIR 均为相对路径
+    keep = data_backup.BACKUP_KEEP
+    data = tmp_path / "data"
+    ids = []
+    for i in range(keep):
+        _write(data / "scenes.json", f"version {i}" + " " * i)
+        _write(data / "tables" / "子.csv", f"a\n{i}\n")
+        ids.append(data_backup.create_snapshot()["id"])
+    _write(data / "scenes.json", "modified after the last snapshot")
+    _write(data / "tables" / "丑.csv", "b\n1\n")
+
+    result = data_backup.restore_snapshot(ids[0])
+
+    assert (data / "scenes.json").read_text(encoding="utf-8") == "version 0"
+    assert (data / "tables" / "子.csv").read_text(encoding="utf-8") == "a\n0\n"
+    assert not (data / "tables" / "丑.csv").exists()
+    assert result["removed"] == 1
+    remaining = {snap["id"] for snap in data_backup.list_snapshots()}
+    assert ids[0] in remaining and result["safety"] in remaining
+    # 安全快照记录的是恢复前的内容，可以再恢复回来
+    data_backup.restore_snapshot(result["safety"])
+    assert (data / "scenes.json").read_text(encoding="utf-8") == "modified after the last snapshot"
@@ -0,0 +1,157 @@
+# flags / notes 合并保存测试
+
+# tests/test_data_merge.py
+"""
+flags / notes 的三方合并
+- 加载结果只有被采用时才成为合并基线，被丢弃的重新加载不能让外部修改在下次保存时被覆盖
+- merge_entities：并发修改、删除与修改冲突、单方修改与新增
+- _save_merged：磁盘 revision 与基线不一致（包括回退）时合并
+"""
+
+import pytest
+
+import data_utils
+from config import NOTES_FILE
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # DATA_DIR 为相对路径
+    monkeypatch.setattr(data_utils, "_snapshots", {})
+    return tmp_path / "data"
+
+
+def _external_write(path, update):
+    """模拟其他进程：读取磁盘内容、修改后以 revision + 1 写回"""
+    with data_utils.locked(path):
+        _, revision, items = data_utils._read_versioned(path, [])
+        update(items)
+        data_utils._write_json(path, items, revision + 1)
+
+
+def test_discarded_reload_keeps_merge_baseline(data_dir):
+    notes, baseline = data_utils.load_notes()
+    data_utils.adopt_baseline("notes", baseline)
+    data_utils.save_notes(notes)  # 落盘迁移后的格式
+
+    def rename_second(items):
+        items[1]["title"] = "外部修改"
+        items[1]["updated_at"] = "2099-01-01T00:00:00"
+    _external_write(NOTES_FILE, rename_second)
+
+    # 后台重新加载，但 UI 有未保存的编辑而丢弃了结果：不调用 adopt_baseline
+    data_utils.load_notes()
+    notes[0]["title"] = "本地修改"
+    external = data_utils.save_notes(notes)
+
+    assert external == 1
+    saved, _ = data_utils.load_notes()
+    assert saved[0]["title"] == "本地修改"
+    assert saved[1]["title"] == "外部修改"
+    assert notes[1]["title"] == "外部修改"  # 合并结果原地写回调用方的列表
+
+
+def test_adopted_reload_moves_baseline(data_dir):
+    notes, baseline = data_utils.load_notes()
+    data_utils.adopt_baseline("notes", baseline)
+    data_utils.save_notes(notes)
+    _external_write(NOTES_FILE, lambda items: items[1].update(title="外部修改"))
+
+    notes, baseline = data_utils.load_notes()
+    data_utils.adopt_baseline("notes", baseline)
+    notes[0]["title"] = "本地修改"
+
+    assert data_utils.save_notes(notes) == 0  # 基线已是最新版本，无需合并
+    saved, _ = data_utils.load_notes()
+    assert [saved[0]["title"], saved[1]["title"]] == ["本地修改", "外部修改"]
+
+
+def _note(note_id, title, updated_at="2026-01-01T00:00:00"):
+    return {"id": note_id, "title": title, "updated_at": updated_at}
+
+
+def test_merge_concurrent_edits_prefers_newer_updated_at():
+    base = {"a": _note("a", "原始"), "b": _note("b", "原始")}
+    ours = [_note("a", "本地", "2026-01-03T00:00:00"), _note("b", "本地", "2026-01-02T00:00:00")]
+    theirs = [_note("a", "外部", "2026-01-02T00:00:00"), _note("b", "外部", "2026-01-03T00:00:00")]
+
+    merged, external = data_utils.merge_entities(base, ours, theirs)
+
+    assert [n["title"] for n in merged] == ["本地", "外部"]
+    assert external == 1
+
+
+def test_merge_concurrent_edits_tie_keeps_local():
+    base = {"a": _note("a", "原始")}
+    merged, external = data_utils.merge_entities(
+        base, [_note("a", "本地", "2026-01-02T00:00:00")], [_note("a", "外部", "2026-01-02T00:00:00")])
+    assert merged == [_note("a", "本地", "2026-01-02T00:00:00")]
+    assert external == 0
+
+
+def test_merge_one_sided_changes_and_additions():
+    base = {"a": _note("a", "原始"), "b": _note("b", "原始")}
+    ours = [_note("a", "本地"), _note("b", "原始"), {"title": "无 id"}]
+    theirs = [_note("a", "原始"), _note("b", "外部"), _note("c", "外部新增")]
+
+    merged, external = data_utils.merge_entities(base, ours, theirs)
+
+    assert [n["title"] for n in merged] == ["本地", "外部", "无 id", "外部新增"]
+    assert external == 2
+
+
+def test_merge_delete_vs_edit_keeps_the_edit():
+    base = {"a": _note("a", "原始"), "b": _note("b", "原始"), "c": _note("c", "原始")}
+    ours = [_note("a", "本地修改"), _note("c", "原始")]          # 本地删除 b
+    theirs = [_note("b", "外部修改"), _note("c", "原始")]        # 外部删除 a
+
+    merged, external = data_utils.merge_entities(base, ours, theirs)
+
+    assert sorted(n["id"] for n in merged) == ["a", "b", "c"]
+    assert {n["id"]: n["title"] for n in merged}["b"] == "外部修改"
+    assert external == 1
+
+
+def test_merge_unchanged_delete_is_not_resurrected():
+    base = {"a": _note("a", "原始"), "b": _note("b", "原始")}
+    merged, external = data_utils.merge_entities(base, [_note("a", "原始")], [_note("a", "原始"), _note("b", "原始")])
+    assert merged == [_note("a", "原始")]
+    assert external == 0
+
+
+def test_save_merged_revision_skew(data_dir):
+    """磁盘版本落后或领先于基线时都按三方合并，写入后 revision 为磁盘版本 + 1"""
+    path = data_dir / "items.json"
+    data_dir.mkdir()
+    with data_utils.locked(path):
+        data_utils._write_json(path, [_note("a", "原始"), _note("b", "原始")], 5)
+    _, revision, items = data_utils._read_versioned(path, [])
+    data_utils._remember(path, revision, items)
+
+    # 其他进程回滚到旧版本（如同步盘恢复），且修改了 b
+    with data_utils.locked(path):
+        data_utils._write_json(path, [_note("a", "原始"), _note("b", "外部", "2026-02-01T00:00:00")], 3)
+    ours = [_note("a", "本地", "2026-02-01T00:00:00"), _note("b", "原始")]
+    assert data_utils._save_merged(path, ours, "notes") == 1
+
+    _, revision, saved = data_utils._read_versioned(path, [])
+    assert revision == 4
+    assert [n["title"] for n in saved] == ["本地", "外部"]
+    assert ours == saved
+
+    # 基线与磁盘版本一致时直接写入，不合并
+    ours[1]["title"] = "本地"
+    assert data_utils._save_merged(path, ours, "notes") == 0
+    _, revision, saved = data_utils._read_versioned(path, [])
+    assert revision == 5 and saved[1]["title"] == "本地"
+
+
+def test_save_merged_without_baseline_overwrites(data_dir):
+    """从未加载过（没有基线）时无从判断外部修改，直接覆盖写入"""
+    path = data_dir / "items.json"
+    data_dir.mkdir()
+    with data_utils.locked(path):
+        data_utils._write_json(path, [_note("a", "外部")], 7)
+    assert data_utils._save_merged(path, [_note("a", "本地")], "notes") == 0
+    _, revision, saved = data_utils._read_versioned(path, [])
+    assert revision == 8 and saved == [_note("a", "本地")]
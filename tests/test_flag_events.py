@@ -0,0 +1,105 @@
+# Flag 事件日志测试
+
+# tests/test_flag_events.py
+"""
+flag_events 的重放与压缩：重放幂等、压缩后重放结果不变、检查点已包含的事件不重复应用、崩溃时写了一半的末行
+"""
+
+import copy
+
+import flag_events
+
+
+def _flag(flag_id):
+    return {"id": flag_id, "status": "active", "running": False, "paused": False, "event_seq": 0}
+
+
+def _record(path, flag_id, kind, at):
+    return flag_events.append_event(flag_id, kind, at=at, path=path)
+
+
+def _timeline(path):
+    _record(path, "a", "start", "2026-01-01T10:00:00")
+    _record(path, "b", "start", "2026-01-01T10:00:00")
+    _record(path, "a", "pause", "2026-01-01T10:10:00")
+    _record(path, "a", "resume", "2026-01-01T10:15:00")
+    _record(path, "b", "finish", "2026-01-01T11:00:00")
+
+
+def test_replay_is_idempotent(tmp_path):
+    path = tmp_path / "flag_events.log"
+    _timeline(path)
+    flags = [_flag("a"), _flag("b")]
+
+    assert flag_events.replay(flags, flag_events.read_events(path)) == 5
+    once = copy.deepcopy(flags)
+    assert flag_events.replay(flags, flag_events.read_events(path)) == 0
+    assert flags == once
+    assert flags[0]["paused_duration"] == 300
+    assert flags[1]["status"] == "completed"
+
+
+def test_replay_skips_events_folded_into_checkpoint(tmp_path):
+    path = tmp_path / "flag_events.log"
+    _timeline(path)
+    checkpoint = [_flag("a"), _flag("b")]
+    flag_events.replay(checkpoint, flag_events.read_events(path)[:3])  # 检查点只包含前 3 个事件
+    assert checkpoint[0]["event_seq"] == 3 and checkpoint[0]["paused"]
+
+    # 压缩前：日志中仍有已写入检查点的事件，重放时不能再次应用
+    flags = copy.deepcopy(checkpoint)
+    assert flag_events.replay(flags, flag_events.read_events(path)) == 2
+    assert flags[0]["paused_duration"] == 300 and not flags[0]["paused"]
+    assert flags[1]["status"] == "completed"
+
+
+def test_compact_then_replay_matches_full_replay(tmp_path):
+    path = tmp_path / "flag_events.log"
+    _timeline(path)
+    expected = [_flag("a"), _flag("b")]
+    flag_events.replay(expected, flag_events.read_events(path))
+
+    checkpoint = [_flag("a"), _flag("b")]
+    flag_events.replay(checkpoint, flag_events.read_events(path)[:3])
+    flag_events.compact(checkpoint, path=path)
+
+    events = flag_events.read_events(path)
+    assert events[0] == {"seq": 5, "event": "checkpoint"}
+    assert [e["seq"] for e in events[1:]] == [4, 5]
+    flags = copy.deepcopy(checkpoint)
+    assert flag_events.replay(flags, events) == 2
+    assert flags == expected
+
+    # 压缩后序号不回退
+    assert _record(path, "a", "finish", "2026-01-01T12:00:00")["seq"] == 6
+
+
+def test_compact_everything_keeps_sequence(tmp_path):
+    path = tmp_path / "flag_events.log"
+    _timeline(path)
+    flags = [_flag("a"), _flag("b")]
+    flag_events.replay(flags, flag_events.read_events(path))
+    flag_events.compact(flags, path=path)
+
+    assert flag_events.read_events(path) == [{"seq": 5, "event": "checkpoint"}]
+    assert flag_events.replay(flags, flag_events.read_events(path)) == 0
+    assert _record(path, "a", "pause", "2026-01-01T12:00:00")["seq"] == 6
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    path = tmp_path / "flag_events.log"
+    _timeline(path)
+    with open(path, "ab") as f:
+        f.write(b'{"seq": 6, "flag": "a", "ev')  # 崩溃时写了一半
+
+    flags = [_flag("a"), _flag("b")]
+    assert flag_events.replay(flags, flag_events.read_events(path)) == 5
+    assert flags[1]["event_seq"] == 5
+
+    # 之后追加的事件不能与残缺行粘在一起
+    event = _record(path, "a", "finish", "2026-01-01T12:00:00")
+    assert event["seq"] == 6
+    events = flag_events.read_events(path)
+    assert events[-1] == event
+    assert flag_events.replay(flags, events) == 1
+    assert flags[0]["status"] == "completed"
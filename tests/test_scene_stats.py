@@ -0,0 +1,38 @@
+# 场景列统计测试
+
+# tests/test_scene_stats.py
+"""
+列统计：整数求和不能因 int64 溢出回绕，结果与 Python 整数运算一致
+"""
+
+import pytest
+
+from scene_stats import column_stats
+from scene_types import INT_MAX, INT_MIN, SceneTable, make_field
+
+INT_FIELD = make_field("数量", "int")
+
+
+def _stats(texts):
+    table = SceneTable.from_records([INT_FIELD], [{"数量": t} for t in texts])
+    return column_stats(table.columns[0])
+
+
+@pytest.mark.parametrize("values", [
+    [INT_MAX, INT_MAX, 1],
+    [INT_MIN, INT_MIN],
+    [INT_MAX, INT_MIN, -1],
+    [1, 2, 3, -4],
+])
+def test_int_sum_does_not_wrap(values):
+    stats = _stats([str(v) for v in values] + [""])
+    assert stats["count"] == len(values)
+    assert stats["sum"] == sum(values)
+    assert isinstance(stats["sum"], int)
+    assert stats["mean"] == pytest.approx(sum(values) / len(values))
+    assert (stats["min"], stats["max"]) == (min(values), max(values))
+
+
+def test_empty_int_column():
+    stats = _stats(["", ""])
+    assert stats["count"] == 0 and stats["sum"] is None and stats["mean"] is None
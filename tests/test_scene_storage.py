@@ -0,0 +1,98 @@
+# 场景二进制存储测试
+
+# tests/test_scene_storage.py
+"""
+.scol 读写：空值 / 枚举 / 日期 / 极值往返不变；截断或损坏的文件抛出带原因的 ValueError
+"""
+
+import io
+
+import pytest
+
+import scene_storage
+from scene_types import SceneTable, make_field
+
+FIELDS = [
+    make_field("名称"),
+    make_field("数量", "int"),
+    make_field("金额", "float"),
+    make_field("日期", "date"),
+    make_field("状态", "enum", ["进行中", "已完成"]),
+]
+RECORDS = [
+    {"名称": "甲", "数量": "1", "金额": "1.5", "日期": "2026-01-02", "状态": "进行中"},
+    {"名称": "", "数量": "", "金额": "", "日期": "", "状态": ""},
+    {"名称": "含,逗号\n换行", "数量": "-9223372036854775808", "金额": "-0.25", "日期": "1900-01-01", "状态": "已完成"},
+    {"名称": "丁", "数量": "9223372036854775807", "金额": "1e300", "日期": "2999-12-31", "状态": ""},
+]
+
+
+def _encode(compression="zlib") -> bytes:
+    buffer = io.BytesIO()
+    scene_storage.write_scene_binary(buffer, SceneTable.from_records(FIELDS, RECORDS), compression)
+    return buffer.getvalue()
+
+
+def _write(tmp_path, data: bytes):
+    path = tmp_path / "场景.scol"
+    path.write_bytes(data)
+    return path
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_round_trip_keeps_nulls_enums_and_dates(tmp_path, compression):
+    path = _write(tmp_path, _encode(compression))
+    original = SceneTable.from_records(FIELDS, RECORDS)
+
+    table = scene_storage.read_scene_binary(path, FIELDS)
+
+    assert table.to_records() == original.to_records()
+    assert table.columns[1].mask == original.columns[1].mask
+    assert table.columns[3].get(1) is None and table.columns[4].get(3) is None
+    assert list(scene_storage.iter_binary_records(path)) == original.to_records()
+
+
+def test_round_trip_reparses_when_field_type_changed(tmp_path):
+    path = _write(tmp_path, _encode())
+    fields = list(FIELDS)
+    fields[1] = make_field("数量", "str")
+
+    table = scene_storage.read_scene_binary(path, fields)
+
+    assert [table.text(row, 1) for row in range(len(RECORDS))] == [r["数量"] for r in RECORDS]
+
+
+@pytest.mark.parametrize("cut", [0, 5, scene_storage._HEADER.size + 3, -1])
+def test_truncated_file_raises_value_error(tmp_path, cut):
+    data = _encode()
+    path = _write(tmp_path, data[:cut] if cut >= 0 else data[:-7])
+    with pytest.raises(ValueError, match="已损坏或不完整"):
+        scene_storage.read_scene_binary(path, FIELDS)
+
+
+def test_corrupt_block_raises_value_error(tmp_path):
+    data = bytearray(_encode())
+    data[-20:-10] = b"\xff" * 10  # 破坏最后一个压缩块
+    path = _write(tmp_path, bytes(data))
+    with pytest.raises(ValueError, match="已损坏或不完整"):
+        scene_storage.read_scene_binary(path, FIELDS)
+
+
+def test_unknown_compression_raises_value_error(tmp_path):
+    data = bytearray(_encode())
+    magic, version, _, header_len = scene_storage._HEADER.unpack_from(data)
+    data[:scene_storage._HEADER.size] = scene_storage._HEADER.pack(magic, version, 9, header_len)
+    path = _write(tmp_path, bytes(data))
+    with pytest.raises(ValueError, match="已损坏或不完整") as info:
+        scene_storage.read_scene_binary(path, FIELDS)
+    assert isinstance(info.value.__cause__, KeyError)
+
+
+def test_row_count_mismatch_raises_value_error(tmp_path):
+    table = SceneTable.from_records(FIELDS[:2], RECORDS)
+    table.columns[1].mask.pop()  # 掩码比值少一项
+    buffer = io.BytesIO()
+    scene_storage.write_scene_binary(buffer, table, "none")
+    path = _write(tmp_path, buffer.getvalue())
+    with pytest.raises(ValueError, match="行数"):
+        scene_storage.read_scene_binary(path)
@@ -0,0 +1,51 @@
+# 场景字段类型测试
+
+# tests/test_scene_types.py
+"""
+数值列排序与取值解析：INT_MIN / INT_MAX 降序不溢出、相等值保持原顺序（与纯 Python 路径一致），小数拒绝 nan / inf
+"""
+
+import pytest
+
+import scene_types
+from scene_types import Column, INT_MAX, INT_MIN, SceneTable, make_field, parse_value
+
+INT_FIELD = make_field("数量", "int")
+FLOAT_FIELD = make_field("金额", "float")
+
+
+def _column(spec, texts):
+    return SceneTable.from_records([spec], [{scene_types.field_name(spec): t} for t in texts]).columns[0]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_int_argsort_handles_extremes(reverse):
+    texts = [str(INT_MIN), "", "0", str(INT_MAX), "-1", str(INT_MIN), ""]
+    column = _column(INT_FIELD, texts)
+
+    order = column.argsort(reverse)
+
+    assert order == Column.argsort(column, reverse)  # 与纯 Python 实现一致
+    assert order[-2:] == [1, 6]  # 空值始终排在最后
+    if reverse:
+        assert order[:5] == [3, 2, 4, 0, 5]  # 相等的 INT_MIN 保持原顺序
+    else:
+        assert order[:5] == [0, 5, 4, 2, 3]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_float_argsort_matches_python_with_ties(reverse):
+    column = _column(FLOAT_FIELD, ["1.5", "-2", "1.5", "", "0", "-2"])
+    assert column.argsort(reverse) == Column.argsort(column, reverse)
+
+
+@pytest.mark.parametrize("text", ["nan", "NaN", "inf", "-inf", "1e999"])
+def test_float_rejects_non_finite(text):
+    with pytest.raises(ValueError, match="有限的小数"):
+        parse_value(FLOAT_FIELD, text)
+
+
+def test_int_range_check():
+    assert parse_value(INT_FIELD, str(INT_MIN)) == INT_MIN
+    with pytest.raises(ValueError, match="64 位"):
+        parse_value(INT_FIELD, str(INT_MAX + 1))
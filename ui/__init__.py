@@ -3,6 +3,7 @@
 # ui/__init__.py
 from .base_workspace import BaseWorkspace
 from .table_workspace import TableWorkspace
+from .scene_table_model import SceneTableModel
 from .flag_workspace import FlagWorkspace
 from .note_workspace import NoteWorkspace
 from .personal_db_gui import PersonalDBGUI
@@ -0,0 +1,59 @@
+# 后台任务（QThreadPool）
+
+# ui/background.py
+"""
+在 QThreadPool 中执行耗时函数，结果通过信号回到 UI 线程
+用法：run_in_background(load_notes, on_done=lambda notes: ..., on_error=print)
+"""
+
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+_active = set()  # 持有运行中的任务，防止信号对象被提前回收
+
+
+class _TaskSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class BackgroundTask(QRunnable):
+    """包装一个普通函数的 QRunnable"""
+    def __init__(self, func, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = _TaskSignals()
+
+    def run(self):
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            print("后台任务失败：\n", traceback.format_exc())
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+
+def run_in_background(func, *args, on_done=None, on_error=None, pool=None, **kwargs) -> BackgroundTask:
+    """提交后台任务；回调在 UI 线程执行。pool 为空时使用全局线程池"""
+    task = BackgroundTask(func, *args, **kwargs)
+    task.setAutoDelete(False)
+    _active.add(task)
+
+    def _finish(result):
+        _active.discard(task)
+        if on_done:
+            on_done(result)
+
+    def _fail(message):
+        _active.discard(task)
+        if on_error:
+            on_error(message)
+
+    task.signals.finished.connect(_finish)
+    task.signals.failed.connect(_fail)
+    (pool if pool is not None else QThreadPool.globalInstance()).start(task)
+    return task
@@ -10,6 +10,7 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout
 from PyQt6.QtCore import Qt
 
 from config import PYQT6_AVAILABLE
+from profiler import incr
 
 if not PYQT6_AVAILABLE:
     # 占位符（PyQt6 未安装时）
@@ -24,6 +25,7 @@ else:
             self.current_mode = None  # 由主窗口设置：0=table, 1=flag, 2=note
             self.current_index = 0    # 当前选中的项索引（场景/Flag/Note）
             self.ui_built = False     # 是否已构建 UI（避免重复构建）
+            self.shown_key = None     # 最近一次 refresh_ui 显示的数据版本（见 view_key）
 
         def build_ui(self):
             """子类必须实现：构建工作区 UI"""
@@ -33,6 +35,23 @@ else:
             """子类必须实现：刷新当前选中项的数据"""
             raise NotImplementedError("子类必须实现 refresh_ui()")
 
+        def view_key(self):
+            """
+            当前应显示内容的版本标识（选中项 + 数据版本），子类按需实现
+            与上次显示时相同则 refresh_if_changed 跳过刷新；返回 None 表示无法判断，总是刷新
+            """
+            return None
+
+        def refresh_if_changed(self) -> bool:
+            """数据版本变化时才刷新（切换模式 / 切换选中项时使用），返回是否刷新"""
+            key = self.view_key()
+            if key is not None and key == self.shown_key:
+                incr("workspace.refresh_skipped")
+                return False
+            self.refresh_ui()
+            self.shown_key = self.view_key()
+            return True
+
         # ===================== 四个通用操作（左侧按钮调用） =====================
         def rename_current(self):
             """重命名当前项"""
@@ -50,11 +69,24 @@ else:
             """清空当前项"""
             pass  # 子类实现
 
+        # ===================== 剪贴板（全局快捷键 Ctrl+C/X/V/A 调用） =====================
+        def copy_selection(self):
+            pass  # 子类按需实现
+
+        def cut_selection(self):
+            pass  # 子类按需实现
+
+        def paste_clipboard(self):
+            pass  # 子类按需实现
+
+        def select_all(self):
+            pass  # 子类按需实现
+
         # ===================== 通用辅助方法 =====================
         def set_current_index(self, index: int):
             """设置当前选中索引"""
             self.current_index = index
-            self.refresh_ui()
+            self.refresh_if_changed()
 
         def get_current_data(self):
             """获取当前选中项的数据（子类实现）"""
@@ -1 +1,434 @@
-# 可复用小组件（按钮、对话框等）
\ No newline at end of file
+# 可复用小组件（按钮、对话框等）
+
+# ui/components.py
+"""
+可复用小组件
+- QueryDialog：场景分组汇总（过滤 / 分组 / 聚合）结果视图
+- DiagnosticsDialog：性能埋点统计（次数 / 耗时 / 直方图），可导出 JSON
+- FieldRulesDialog：字段校验规则（必填 / 唯一 / 范围 / 正则）
+- LookupFieldDialog：添加跨场景查找列
+- BackupDialog：data/ 快照备份与恢复（后台线程执行）
+"""
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QGridLayout, QGroupBox, QLabel,
+    QComboBox, QLineEdit, QPushButton, QListWidget, QListWidgetItem,
+    QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox, QHBoxLayout,
+    QCheckBox, QFileDialog
+)
+from PyQt6.QtCore import Qt
+
+import profiler
+from config import PYQT6_AVAILABLE, PROFILE_ENV
+from scene_types import field_names, field_name, field_type, MATCH_OPS
+from scene_validation import field_rules, normalize_rules, RULE_LABELS, RANGE_TYPES
+from scene_lookup import make_lookup_field
+from data_backup import list_snapshots, create_snapshot, restore_snapshot
+from time_utils import format_datetime
+from .background import run_in_background
+from scene_query import (
+    run_query, SCENE_FIELD, AGGREGATES, AGGREGATE_LABELS, GRAINS, GRAIN_LABELS
+)
+
+if PYQT6_AVAILABLE:
+    class QueryDialog(QDialog):
+        """分组汇总对话框：一组条件 → 结果表"""
+        def __init__(self, scenes: dict, current_scene: str, parent=None):
+            super().__init__(parent)
+            self.setWindowTitle("分组汇总")
+            self.resize(760, 520)
+            self.scenes = scenes
+
+            layout = QVBoxLayout(self)
+
+            # 场景选择（可多选，同名字段合并统计）
+            scene_group = QGroupBox("场景")
+            scene_layout = QVBoxLayout(scene_group)
+            self.scene_list = QListWidget()
+            self.scene_list.setMaximumHeight(90)
+            self.scene_list.setFlow(QListWidget.Flow.LeftToRight)
+            for name in scenes:
+                item = QListWidgetItem(name)
+                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                item.setCheckState(Qt.CheckState.Checked if name == current_scene else Qt.CheckState.Unchecked)
+                self.scene_list.addItem(item)
+            self.scene_list.itemChanged.connect(self.refresh_fields)
+            scene_layout.addWidget(self.scene_list)
+            layout.addWidget(scene_group)
+
+            # 条件
+            cond_group = QGroupBox("条件")
+            grid = QGridLayout(cond_group)
+            grid.addWidget(QLabel("过滤："), 0, 0)
+            self.where_field = QComboBox()
+            self.where_op = QComboBox()
+            self.where_op.addItems(list(MATCH_OPS))
+            self.where_value = QLineEdit()
+            grid.addWidget(self.where_field, 0, 1)
+            grid.addWidget(self.where_op, 0, 2)
+            grid.addWidget(self.where_value, 0, 3)
+
+            grid.addWidget(QLabel("分组："), 1, 0)
+            self.group_field = QComboBox()
+            self.group_grain = QComboBox()
+            for grain in GRAINS:
+                self.group_grain.addItem(GRAIN_LABELS[grain], grain)
+            grid.addWidget(self.group_field, 1, 1)
+            grid.addWidget(self.group_grain, 1, 2)
+
+            grid.addWidget(QLabel("聚合："), 2, 0)
+            self.agg_func = QComboBox()
+            for func in AGGREGATES:
+                self.agg_func.addItem(AGGREGATE_LABELS[func], func)
+            self.agg_field = QComboBox()
+            grid.addWidget(self.agg_func, 2, 1)
+            grid.addWidget(self.agg_field, 2, 2)
+
+            btn_run = QPushButton("执行")
+            btn_run.clicked.connect(self.run)
+            grid.addWidget(btn_run, 2, 3)
+            layout.addWidget(cond_group)
+
+            # 结果
+            self.result_view = QTableWidget()
+            self.result_view.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+            self.result_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+            layout.addWidget(self.result_view, stretch=1)
+            self.summary_label = QLabel("")
+            self.summary_label.setStyleSheet("color: gray;")
+            layout.addWidget(self.summary_label)
+
+            self.refresh_fields()
+
+        def selected_scenes(self) -> list:
+            return [
+                self.scene_list.item(i).text() for i in range(self.scene_list.count())
+                if self.scene_list.item(i).checkState() == Qt.CheckState.Checked
+            ]
+
+        def refresh_fields(self, *args):
+            """按所选场景更新字段下拉框"""
+            names = []
+            for scene in self.selected_scenes():
+                for name in field_names(self.scenes[scene]):
+                    if name not in names:
+                        names.append(name)
+            names.append(SCENE_FIELD)
+            for combo, first in ((self.where_field, "（无）"), (self.group_field, "（不分组）"),
+                                 (self.agg_field, "（行数）")):
+                current = combo.currentText()
+                combo.clear()
+                combo.addItem(first)
+                combo.addItems(names)
+                if current in names:
+                    combo.setCurrentText(current)
+
+        def build_query(self) -> dict:
+            where, group_by = [], []
+            if self.where_field.currentIndex() > 0:
+                where.append((self.where_field.currentText(), self.where_op.currentText(), self.where_value.text()))
+            if self.group_field.currentIndex() > 0:
+                group_by.append((self.group_field.currentText(), self.group_grain.currentData()))
+            agg_field = self.agg_field.currentText() if self.agg_field.currentIndex() > 0 else None
+            return {"where": where, "group_by": group_by, "aggregates": [(self.agg_func.currentData(), agg_field)]}
+
+        def run(self):
+            scene_names = self.selected_scenes()
+            if not scene_names:
+                QMessageBox.information(self, "提示", "请至少选择一个场景")
+                return
+            try:
+                result = run_query(self.scenes, scene_names, **self.build_query())
+            except ValueError as e:
+                QMessageBox.warning(self, "查询失败", str(e))
+                return
+            self.result_view.clear()
+            self.result_view.setColumnCount(len(result.columns))
+            self.result_view.setHorizontalHeaderLabels(result.columns)
+            self.result_view.setRowCount(len(result.rows))
+            for r, row in enumerate(result.rows):
+                for c, text in enumerate(row):
+                    self.result_view.setItem(r, c, QTableWidgetItem(text))
+            self.summary_label.setText(f"共 {len(result)} 组，来自 {len(scene_names)} 个场景（基于已保存数据）")
+
+
+    class DiagnosticsDialog(QDialog):
+        """性能诊断窗口"""
+        COLUMNS = ("名称", "次数", "总耗时(ms)", "平均(ms)", "最小(ms)", "最大(ms)", "分布")
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self.setWindowTitle("性能诊断")
+            self.resize(860, 480)
+
+            layout = QVBoxLayout(self)
+            top = QHBoxLayout()
+            self.enable_box = QCheckBox(f"启用埋点（启动时可设置环境变量 {PROFILE_ENV}=1）")
+            self.enable_box.setChecked(profiler.is_enabled())
+            self.enable_box.toggled.connect(profiler.set_enabled)
+            top.addWidget(self.enable_box)
+            top.addStretch()
+            for text, slot in (("刷新", self.refresh), ("清零", self.reset), ("导出 JSON", self.export)):
+                btn = QPushButton(text)
+                btn.clicked.connect(slot)
+                top.addWidget(btn)
+            layout.addLayout(top)
+
+            self.timing_view = QTableWidget(0, len(self.COLUMNS))
+            self.timing_view.setHorizontalHeaderLabels(self.COLUMNS)
+            self.timing_view.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+            self.timing_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+            self.timing_view.horizontalHeader().setStretchLastSection(True)
+            layout.addWidget(self.timing_view, stretch=1)
+
+            self.counter_label = QLabel("")
+            self.counter_label.setStyleSheet("color: gray;")
+            self.counter_label.setWordWrap(True)
+            layout.addWidget(self.counter_label)
+
+            self.refresh()
+
+        @staticmethod
+        def histogram_text(buckets: list, bounds: list) -> str:
+            """非空桶显示为 “<4ms:3 <8ms:1 ≥2048ms:0”"""
+            parts = []
+            for i, n in enumerate(buckets):
+                if n:
+                    label = f"<{bounds[i]}ms" if i < len(bounds) else f"≥{bounds[-1]}ms"
+                    parts.append(f"{label}:{n}")
+            return " ".join(parts)
+
+        def refresh(self):
+            snap = profiler.snapshot()
+            rows = sorted(snap["timings"].items(), key=lambda kv: kv[1]["total"], reverse=True)
+            self.timing_view.setRowCount(len(rows))
+            for r, (name, stat) in enumerate(rows):
+                values = (
+                    name, str(stat["count"]), f"{stat['total']:.1f}", f"{stat['mean']:.2f}",
+                    f"{stat['min']:.2f}", f"{stat['max']:.2f}",
+                    self.histogram_text(stat["buckets"], snap["histogram_bounds_ms"]),
+                )
+                for c, text in enumerate(values):
+                    self.timing_view.setItem(r, c, QTableWidgetItem(text))
+            counters = "  ".join(f"{k}={v}" for k, v in sorted(snap["counters"].items()))
+            self.counter_label.setText(f"计数器：{counters}" if counters else "计数器：无")
+
+        def reset(self):
+            profiler.reset()
+            self.refresh()
+
+        def export(self):
+            path, _ = QFileDialog.getSaveFileName(self, "导出性能数据", str(profiler.PROFILE_FILE), "JSON (*.json)")
+            if path:
+                profiler.dump_json(path)
+
+
+    class FieldRulesDialog(QDialog):
+        """字段校验规则编辑（范围只对整数 / 小数 / 日期，正则只对文本字段）"""
+        def __init__(self, spec, parent=None):
+            super().__init__(parent)
+            self.spec = spec
+            self.result_rules = None  # 确定后为规范化的规则
+            self.setWindowTitle(f"校验规则：{field_name(spec)}")
+            rules = field_rules(spec)
+            ftype = field_type(spec)
+
+            layout = QVBoxLayout(self)
+            grid = QGridLayout()
+            self.required_box = QCheckBox(RULE_LABELS["required"])
+            self.required_box.setChecked(bool(rules.get("required")))
+            self.unique_box = QCheckBox(RULE_LABELS["unique"])
+            self.unique_box.setChecked(bool(rules.get("unique")))
+            grid.addWidget(self.required_box, 0, 0)
+            grid.addWidget(self.unique_box, 0, 1)
+            self.edits = {}
+            for row, key in enumerate(("min", "max", "pattern"), 1):
+                edit = QLineEdit(str(rules.get(key, "")))
+                edit.setEnabled(ftype in RANGE_TYPES if key != "pattern" else ftype == "str")
+                grid.addWidget(QLabel(RULE_LABELS[key] + "："), row, 0)
+                grid.addWidget(edit, row, 1)
+                self.edits[key] = edit
+            layout.addLayout(grid)
+
+            buttons = QHBoxLayout()
+            buttons.addStretch()
+            for text, slot in (("确定", self.accept), ("取消", self.reject)):
+                btn = QPushButton(text)
+                btn.clicked.connect(slot)
+                buttons.addWidget(btn)
+            layout.addLayout(buttons)
+
+        def accept(self):
+            try:
+                self.result_rules = self.rules()
+            except ValueError as e:
+                QMessageBox.warning(self, "规则无效", str(e))
+                return
+            super().accept()
+
+        def rules(self) -> dict:
+            """规范化后的规则（不合法时抛出 ValueError）"""
+            raw = {key: edit.text() for key, edit in self.edits.items() if edit.isEnabled()}
+            raw.update(required=self.required_box.isChecked(), unique=self.unique_box.isChecked())
+            return normalize_rules(self.spec, raw)
+
+
+    class LookupFieldDialog(QDialog):
+        """添加跨场景查找列：本场景的匹配字段 → 目标场景的键字段，取目标场景的取值字段"""
+        def __init__(self, scenes: dict, current_scene: str, match_names: list, existing_names: list, parent=None):
+            super().__init__(parent)
+            self.setWindowTitle("添加查找列")
+            self.scenes = scenes
+            self.existing_names = set(existing_names)
+            self.result_field = None  # 确定后为新字段定义
+
+            layout = QVBoxLayout(self)
+            grid = QGridLayout()
+            self.scene_box = QComboBox()
+            self.scene_box.addItems([name for name in scenes if name != current_scene])
+            self.key_box = QComboBox()
+            self.value_box = QComboBox()
+            self.match_box = QComboBox()
+            self.match_box.addItems(match_names)
+            self.name_edit = QLineEdit()
+            for row, (label, widget) in enumerate((
+                ("目标场景：", self.scene_box), ("目标键字段：", self.key_box), ("取值字段：", self.value_box),
+                ("本场景匹配字段：", self.match_box), ("新列名：", self.name_edit),
+            )):
+                grid.addWidget(QLabel(label), row, 0)
+                grid.addWidget(widget, row, 1)
+            layout.addLayout(grid)
+            self.scene_box.currentTextChanged.connect(self.refresh_fields)
+            self.value_box.currentTextChanged.connect(lambda text: self.name_edit.setText(text))
+            self.refresh_fields()
+
+            buttons = QHBoxLayout()
+            buttons.addStretch()
+            for text, slot in (("确定", self.accept), ("取消", self.reject)):
+                btn = QPushButton(text)
+                btn.clicked.connect(slot)
+                buttons.addWidget(btn)
+            layout.addLayout(buttons)
+
+        def refresh_fields(self, *args):
+            names = field_names(self.scenes.get(self.scene_box.currentText(), []))
+            for box in (self.key_box, self.value_box):
+                box.clear()
+                box.addItems(names)
+
+        def accept(self):
+            name = self.name_edit.text().strip()
+            if not all((self.scene_box.currentText(), self.key_box.currentText(),
+                        self.value_box.currentText(), self.match_box.currentText(), name)):
+                QMessageBox.warning(self, "信息不完整", "请选择目标场景、各字段并填写新列名")
+                return
+            if name in self.existing_names:
+                QMessageBox.warning(self, "列名重复", f"字段名已存在：{name}")
+                return
+            self.result_field = make_lookup_field(
+                name, self.scene_box.currentText(), self.key_box.currentText(),
+                self.value_box.currentText(), self.match_box.currentText(),
+            )
+            super().accept()
+
+
+    class BackupDialog(QDialog):
+        """快照备份与恢复；备份 / 恢复在后台线程执行，期间按钮不可用"""
+        COLUMNS = ("时间", "说明", "文件数", "大小")
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self.setWindowTitle("备份与恢复")
+            self.resize(640, 420)
+
+            layout = QVBoxLayout(self)
+            self.view = QTableWidget(0, len(self.COLUMNS))
+            self.view.setHorizontalHeaderLabels(self.COLUMNS)
+            self.view.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+            self.view.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+            self.view.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+            self.view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+            self.view.horizontalHeader().setStretchLastSection(True)
+            layout.addWidget(self.view, stretch=1)
+
+            self.status_label = QLabel("")
+            self.status_label.setStyleSheet("color: gray;")
+            layout.addWidget(self.status_label)
+
+            buttons = QHBoxLayout()
+            self.backup_btn = QPushButton("立即备份")
+            self.backup_btn.clicked.connect(self.backup)
+            self.restore_btn = QPushButton("恢复所选")
+            self.restore_btn.clicked.connect(self.restore)
+            close_btn = QPushButton("关闭")
+            close_btn.clicked.connect(self.accept)
+            buttons.addWidget(self.backup_btn)
+            buttons.addWidget(self.restore_btn)
+            buttons.addStretch()
+            buttons.addWidget(close_btn)
+            layout.addLayout(buttons)
+
+            self.snapshots = []
+            self.refresh()
+
+        def refresh(self):
+            self.snapshots = list_snapshots()
+            self.view.setRowCount(len(self.snapshots))
+            for r, snap in enumerate(self.snapshots):
+                values = (
+                    format_datetime(snap.get("created_at", "")), snap.get("label", ""),
+                    str(len(snap["files"])), f"{snap.get('size', 0) / 1024:.1f} KB",
+                )
+                for c, text in enumerate(values):
+                    self.view.setItem(r, c, QTableWidgetItem(text))
+
+        def set_busy(self, message: str):
+            self.status_label.setText(message)
+            self.backup_btn.setEnabled(not message)
+            self.restore_btn.setEnabled(not message)
+
+        def _flush_pending(self):
+            """先写完待保存的数据，快照才包含最新内容"""
+            if hasattr(self.parent(), "save_all"):
+                self.parent().save_all()
+
+        def backup(self):
+            self._flush_pending()
+            self.set_busy("正在备份...")
+            run_in_background(create_snapshot, "手动备份", on_done=self.on_backup_done, on_error=self.on_failed)
+
+        def on_backup_done(self, manifest: dict):
+            self.set_busy("")
+            self.refresh()
+            if manifest.get("unchanged"):
+                self.status_label.setText("数据与最新快照相同，未创建新快照")
+            else:
+                self.status_label.setText(
+                    f"已备份 {len(manifest['files'])} 个文件（新写入 {manifest['new_objects']} 个，"
+                    f"未修改沿用 {manifest['reused']} 个）")
+
+        def restore(self):
+            row = self.view.currentRow()
+            if row < 0:
+                QMessageBox.information(self, "恢复", "请先选择一个快照")
+                return
+            snap = self.snapshots[row]
+            answer = QMessageBox.question(
+                self, "恢复快照",
+                f"将数据恢复到 {format_datetime(snap.get('created_at', ''))} 的快照？\n"
+                "恢复前会自动备份当前数据，恢复后可再恢复回来。")
+            if answer != QMessageBox.StandardButton.Yes:
+                return
+            self._flush_pending()
+            self.set_busy("正在恢复...")
+            run_in_background(restore_snapshot, snap["id"], on_done=self.on_restore_done, on_error=self.on_failed)
+
+        def on_restore_done(self, result: dict):
+            # 改写的文件由 DataWatcher 检测到后重新加载对应实体
+            self.set_busy("")
+            self.refresh()
+            self.status_label.setText(f"已恢复 {result['restored']} 个文件，删除 {result['removed']} 个快照之后新增的文件")
+
+        def on_failed(self, message: str):
+            self.set_busy("")
+            QMessageBox.warning(self, "操作失败", message)
@@ -0,0 +1,109 @@
+# data/ 目录外部修改监视
+
+# ui/data_watcher.py
+"""
+监视 data/ 下的 scenes.json / flags.json / flag_events.log / notes.json / tables/*.csv 与 *.scol
+- 基于 QFileSystemWatcher（Linux 下即 inotify），连续事件合并防抖
+- 本进程自己写入的文件（data_utils.is_own_write）不会触发重载
+- 只重载受影响的实体，读取在后台线程完成，结果交给主窗口应用
+"""
+
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer
+
+from config import DATA_DIR, SCENES_FILE, FLAGS_FILE, FLAG_EVENTS_FILE, NOTES_FILE, TABLES_DIR, WATCH_DEBOUNCE_MS
+from data_utils import load_scenes, load_flags, load_notes, is_own_write, file_stamp
+from .background import run_in_background
+
+TABLE_SUFFIXES = (".csv", ".scol")
+DATA_FILES = (SCENES_FILE, FLAGS_FILE, FLAG_EVENTS_FILE, NOTES_FILE)
+
+
+class DataWatcher(QObject):
+    """外部修改监视器（由 PersonalDBGUI 创建）"""
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_path_changed)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self._pending = set()
+        self._table_stamps = {}  # 场景数据文件路径 → 上次看到的文件戳（目录事件时找出变化的表）
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self.flush)
+
+    def start(self):
+        # 同时监视 data/ 目录本身：启动后才创建的数据文件（如首次计时生成的 flag_events.log）也能登记
+        if DATA_DIR.exists():
+            self.watcher.addPath(str(DATA_DIR))
+        self._scan_data_files()
+
+    def _scan_data_files(self) -> list:
+        """登记 data/ 下尚未监视的数据文件与 tables/ 目录，返回新登记的数据文件路径"""
+        added = []
+        for path in DATA_FILES:
+            key = str(path)
+            if path.exists() and key not in self.watcher.files():
+                self.watcher.addPath(key)
+                added.append(key)
+        if TABLES_DIR.exists() and str(TABLES_DIR) not in self.watcher.directories():
+            self.watcher.addPath(str(TABLES_DIR))
+            added.extend(self._scan_tables())
+        return added
+
+    def _scan_tables(self) -> list:
+        """登记 tables/ 下的场景数据文件，返回新增或文件戳变化的路径"""
+        changed = []
+        for path in TABLES_DIR.iterdir():
+            if path.suffix not in TABLE_SUFFIXES:
+                continue
+            key = str(path)
+            stamp = file_stamp(path)
+            if self._table_stamps.get(key) != stamp:
+                if key in self._table_stamps:
+                    changed.append(key)
+                self._table_stamps[key] = stamp
+            if key not in self.watcher.files():
+                self.watcher.addPath(key)
+        return changed
+
+    # ===================== 事件 =====================
+    def on_path_changed(self, path: str):
+        self._pending.add(path)
+        self._debounce.start(WATCH_DEBOUNCE_MS)
+
+    def on_directory_changed(self, path: str):
+        # 新建 / 替换文件（脚本常见的“写临时文件再改名”）只会触发目录事件
+        if Path(path) == DATA_DIR:
+            new_files = self._scan_data_files()
+            if not new_files:
+                return  # 锁文件、临时文件等无关变化
+            self._pending.update(new_files)
+        else:
+            self._pending.update(self._scan_tables())
+        self._debounce.start(WATCH_DEBOUNCE_MS)
+
+    def flush(self):
+        pending, self._pending = self._pending, set()
+        for path in pending:
+            # 原子替换后 inotify 会丢失监视，重新登记
+            if Path(path).exists() and path not in self.watcher.files():
+                self.watcher.addPath(path)
+            if is_own_write(path):
+                continue
+            self.dispatch(Path(path))
+
+    def dispatch(self, path: Path):
+        """按文件类型只重载对应实体"""
+        main = self.main_window
+        if path == SCENES_FILE:
+            run_in_background(load_scenes, on_done=lambda data: main.apply_external_change("scenes", data))
+        elif path in (FLAGS_FILE, FLAG_EVENTS_FILE):
+            run_in_background(load_flags, on_done=lambda data: main.apply_external_change("flags", data))
+        elif path == NOTES_FILE:
+            run_in_background(load_notes, on_done=lambda data: main.apply_external_change("notes", data))
+        elif path.parent == TABLES_DIR and path.suffix in TABLE_SUFFIXES:
+            self._table_stamps[str(path)] = file_stamp(path)
+            main.apply_external_change("table", path.stem)
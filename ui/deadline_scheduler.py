@@ -0,0 +1,52 @@
+# Flag 截止提醒调度（单个 QTimer）
+
+# ui/deadline_scheduler.py
+"""
+Flag 截止提醒调度器
+- 只用一个单次 QTimer，间隔设为距堆顶事件（flag_deadlines.DeadlineQueue）的时间，
+  两次事件之间不轮询任何 Flag
+- Flag 计时操作、截止时间修改、外部修改后重新登记并重新设定定时器
+- 定时器最长间隔 MAX_WAIT_SECONDS：系统休眠或调整时钟后也能在合理时间内校正
+"""
+
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from flag_deadlines import DeadlineQueue
+from profiler import incr
+
+MAX_WAIT_SECONDS = 6 * 3600
+
+
+class DeadlineScheduler(QObject):
+    deadline_reached = pyqtSignal(str, str)  # Flag id, 类型（reminder / due）
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.queue = DeadlineQueue()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._fire)
+
+    def reschedule(self, flags: list):
+        self.queue.rebuild(flags, time.time())
+        self._arm()
+
+    def update_flag(self, flag: dict):
+        self.queue.schedule(flag, time.time())
+        self._arm()
+
+    def _arm(self):
+        next_time = self.queue.next_time()
+        if next_time is None:
+            self.timer.stop()
+            return
+        delay = min(max(0.0, next_time - time.time()), MAX_WAIT_SECONDS)
+        self.timer.start(int(delay * 1000) + 1)
+        incr("deadline.armed")
+
+    def _fire(self):
+        for flag_id, kind, _ in self.queue.pop_due(time.time()):
+            self.deadline_reached.emit(flag_id, kind)
+        self._arm()  # 定时器略早触发或到达最长间隔时，这里重新等待剩余时间
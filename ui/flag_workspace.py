@@ -6,16 +6,20 @@ Mode 1 - Flag 任务工作区
 包含时间设置、运行控制、进度条、倒计时、内容编辑等
 """
 
+from datetime import datetime
+
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox,
-    QLabel, QPushButton, QProgressBar, QTextEdit, QScrollArea
+    QLabel, QPushButton, QProgressBar, QTextEdit, QScrollArea, QMessageBox, QInputDialog
 )
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QFont
 
 from config import PYQT6_AVAILABLE
-from data_utils import save_flags
 from time_utils import format_datetime, format_timedelta, seconds_to_span_str
+from flag_events import elapsed_seconds
+from flag_analytics import get_summary, SUMMARY_KEYS, SUMMARY_LABELS
+from profiler import timed
 from .base_workspace import BaseWorkspace
 
 if not PYQT6_AVAILABLE:
@@ -71,7 +75,9 @@ else:
                 self.core_widgets[key] = lbl
                 time_layout.addWidget(lbl, i, 1)
                 btn = QPushButton("设置")
-                # 后续在 personal_db_gui 中连接具体设置方法
+                if key == 'target':
+                    btn.clicked.connect(self.set_target_time)
+                # 其余设置方法后续在 personal_db_gui 中连接
                 time_layout.addWidget(btn, i, 2)
             time_group.setLayout(time_layout)
             main_layout.addWidget(time_group)
@@ -82,8 +88,14 @@ else:
             run_layout = QHBoxLayout()
             self.run_btn = QPushButton("开始运行")
             self.run_btn.setEnabled(False)
-            # 后续在 personal_db_gui 中连接 self.window().toggle_flag_running
+            self.run_btn.clicked.connect(self.toggle_running)
             run_layout.addWidget(self.run_btn)
+            self.finish_btn = QPushButton("完成")
+            self.finish_btn.clicked.connect(lambda: self.end_flag("finish"))
+            run_layout.addWidget(self.finish_btn)
+            self.discard_btn = QPushButton("废止")
+            self.discard_btn.clicked.connect(lambda: self.end_flag("discard"))
+            run_layout.addWidget(self.discard_btn)
             run_layout.addStretch()
             self.pb = QProgressBar()
             self.pb.setRange(0, 100)
@@ -115,12 +127,32 @@ else:
             log_group.setLayout(log_layout)
             main_layout.addWidget(log_group)
 
+            # === 历史统计 ===
+            summary_group = QGroupBox("历史统计")
+            summary_layout = QGridLayout()
+            self.summary_labels = {}
+            for i, key in enumerate(SUMMARY_KEYS):
+                summary_layout.addWidget(QLabel(f"{SUMMARY_LABELS[key]}："), i // 3, (i % 3) * 2)
+                self.summary_labels[key] = QLabel("-")
+                summary_layout.addWidget(self.summary_labels[key], i // 3, (i % 3) * 2 + 1)
+            summary_group.setLayout(summary_layout)
+            main_layout.addWidget(summary_group)
+
             main_layout.addStretch()
 
             # 在 UI 构建完成后再创建 timer
             self.timer = QTimer(self)
             self.timer.timeout.connect(self.update_progress)
 
+        def view_key(self):
+            main_window = self.window()
+            if not getattr(main_window, 'flags', None):
+                return None
+            flag = main_window.flags[main_window.current_flag_index]
+            return (main_window.current_flag_index, flag.get("id"), flag.get("name"), flag.get("status"),
+                    flag.get("updated_at"), flag.get("event_seq"), flag.get("start_time"), flag.get("target_time"))
+
+        @timed("FlagWorkspace.refresh_ui")
         def refresh_ui(self):
             main_window = self.window()
             if not hasattr(main_window, 'flags') or main_window.current_mode != 1:
@@ -144,17 +176,82 @@ else:
                 log_text += f"废止时间：{format_datetime(flag.get('discarded_at'))}"
             self.log_label.setText(log_text)
 
-            # 更新进度条（简单示例，后续完善计算逻辑）
+            # 运行控制：按钮文字随状态切换，运行中每秒刷新进度
+            active = flag["status"] == "active"
+            if not flag.get("running"):
+                self.run_btn.setText("开始运行")
+            else:
+                self.run_btn.setText("继续" if flag.get("paused") else "暂停")
+            self.run_btn.setEnabled(active)
+            self.finish_btn.setEnabled(active)
+            self.discard_btn.setEnabled(active)
+            if active and flag.get("running") and not flag.get("paused"):
+                self.timer.start(1000)
+            else:
+                self.timer.stop()
             self.update_progress()
+            self.refresh_summary()
+
+        def refresh_summary(self):
+            """历史统计（flag_analytics 缓存结果，没有新的结束记录时不重新计算）"""
+            summary = get_summary()
+            for key, label in self.summary_labels.items():
+                value = summary[key]
+                if value is None:
+                    text = "-"
+                elif key in ("completion_rate", "late_ratio", "paused_ratio"):
+                    text = f"{value * 100:.1f}%"
+                elif key == "avg_overrun_seconds":
+                    text = ("超时 " if value > 0 else "提前 ") + seconds_to_span_str(int(abs(value)))
+                else:
+                    text = str(value)
+                label.setText(text)
+
+        def toggle_running(self):
+            flag = self.window().flags[self.window().current_flag_index]
+            if not flag.get("running"):
+                self.window().flag_event("start")
+            else:
+                self.window().flag_event("resume" if flag.get("paused") else "pause")
 
-            # 启用/禁用运行按钮
-            self.run_btn.setEnabled(flag["status"] == "active")
+        def end_flag(self, kind: str):
+            """完成 / 废止当前 Flag（结束后不可再运行）"""
+            label = "完成" if kind == "finish" else "废止"
+            answer = QMessageBox.question(self, f"标记{label}", f"确认将此 Flag 标记为已{label}？")
+            if answer == QMessageBox.StandardButton.Yes:
+                self.window().flag_event(kind)
+
+        def set_target_time(self):
+            """设置当前 Flag 的截止时间（留空清除），到期前后由 DeadlineScheduler 提醒"""
+            main_window = self.window()
+            flag = main_window.flags[main_window.current_flag_index]
+            current = format_datetime(flag.get("target_time", "")) if flag.get("target_time") else ""
+            text, ok = QInputDialog.getText(self, "截止时间", "截止时间（YYYY-MM-DD HH:MM，留空清除）：", text=current)
+            if not ok:
+                return
+            text = text.strip()
+            if text:
+                try:
+                    text = datetime.fromisoformat(text).isoformat()
+                except ValueError:
+                    QMessageBox.warning(self, "格式错误", f"无法识别的时间：{text}")
+                    return
+            main_window.set_flag_target(flag, text)
 
         def update_progress(self):
-            """定时更新进度（示例逻辑，后续完善）"""
-            # TODO: 计算 elapsed, countdown, percent 等
-            self.pb.setValue(0)  # 占位
-            self.pb_label.setText("总进度: 0.00%")
+            """按事件日志推导的已运行时间更新进度（有总跨度时显示百分比）"""
+            main_window = self.window()
+            if not hasattr(main_window, 'flags'):
+                return
+            flag = main_window.flags[main_window.current_flag_index]
+            elapsed = elapsed_seconds(flag)
+            span = flag.get("span_seconds", 0)
+            percent = min(elapsed / span, 1.0) * 100 if span else 0.0
+            self.pb.setValue(int(percent))
+            text = f"已运行: {seconds_to_span_str(int(elapsed))}"
+            if span:
+                text += f" | 总进度: {percent:.2f}%"
+            self.pb_label.setText(text)
 
         # ===================== 通用操作实现 =====================
         def rename_current(self):
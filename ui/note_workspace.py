@@ -4,10 +4,14 @@
 """
 Mode 2 - 便签笔记工作区（完整功能版）
 支持实时自动保存、状态管理、重命名、上下移动、清空、导出等
+- 正文使用 QPlainTextEdit（按文本块布局）；超过 NOTE_LARGE_CHARS 的正文以大文档模式打开：
+  不自动换行，先显示第一块，其余按 NOTE_LOAD_CHUNK_CHARS 分块在之后的事件循环中追加
+- 是否需要重新载入按 (便签 id, content_hash) 判断，是否有编辑按文档的修改标记判断，
+  刷新与自动保存都不再整段比较正文
 """
 
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QTextEdit,
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPlainTextEdit,
     QGroupBox, QPushButton, QScrollArea, QFileDialog, QInputDialog,
     QMessageBox
 )
@@ -18,8 +22,10 @@ from datetime import datetime
 import os
 
 from config import PYQT6_AVAILABLE,TIANGAN
-from data_utils import save_notes
+from config import NOTE_LARGE_CHARS, NOTE_LOAD_CHUNK_CHARS
+from note_store import get_note_content, set_note_content, content_hash
 from time_utils import format_datetime
+from profiler import timed, incr
 from .base_workspace import BaseWorkspace
 
 # 尝试导入 python-docx（可选）
@@ -43,6 +49,10 @@ else:
             self.log_label = None
             self.auto_save_timer = None
             self.edit_locked = True
+            self.shown_note = None     # 编辑器中显示的便签（自动保存写回它，而不是切换后的当前便签）
+            self.shown_content = None  # (便签 id, content_hash)：未变化时刷新不重新载入正文
+            self.loading = False       # 大文档正在分块载入（期间只读、不自动保存）
+            self._load_generation = 0  # 切换便签后丢弃旧的分块载入
 
         def build_ui(self):
             if self.ui_built:
@@ -71,10 +81,10 @@ else:
             content_label.setFont(QFont("", 15, QFont.Weight.Bold))
             layout.addWidget(content_label)
 
-            self.content_text = QTextEdit()
+            self.content_text = QPlainTextEdit()
             self.content_text.setPlaceholderText("在这里写下你的想法、笔记...")
             self.content_text.setFont(QFont("", 13))
-            self.content_text.setLineWrapMode(QTextEdit.LineWrapMode.WidgetWidth)
+            self.content_text.setLineWrapMode(QPlainTextEdit.LineWrapMode.WidgetWidth)
             self.content_text.textChanged.connect(self.auto_save_draft)
             layout.addWidget(self.content_text, stretch=1)
 
@@ -91,6 +101,15 @@ else:
             self.title_entry.setReadOnly(self.edit_locked)
             self.content_text.setReadOnly(self.edit_locked)
 
+        def view_key(self):
+            main_window = self.window()
+            if not getattr(main_window, 'notes', None):
+                return None
+            note = main_window.notes[main_window.current_note_index]
+            return (main_window.current_note_index, note.get("id"), note.get("title"), note.get("status"),
+                    note.get("updated_at"), note.get("content_hash"), note.get("display_name"))
+
+        @timed("NoteWorkspace.refresh_ui")
         def refresh_ui(self):
             main_window = self.window()
             if not hasattr(main_window, 'notes') or main_window.current_mode != 2:
@@ -99,12 +118,18 @@ else:
             idx = main_window.current_note_index
             note = main_window.notes[idx]
 
-            # 更新标题和内容
+            # 切换到其他便签前，先把上一个便签未保存的编辑写回
+            key = (note.get("id"), note.get("content_hash", ""))
+            switching = self.shown_content is not None and key[0] != self.shown_content[0]
+            if switching and self.auto_save_timer and self.auto_save_timer.isActive():
+                self.auto_save_timer.stop()
+                self._perform_auto_save()
+
+            # 更新标题和内容（正文版本未变化时保留编辑器现有内容）
             self.title_entry.setText(note.get("title", note.get("display_name", TIANGAN[main_window.current_note_index])))
-            current_content = self.content_text.toPlainText().strip()
-            saved_content = note.get("content", "").strip()
-            if current_content != saved_content:
-                self.content_text.setPlainText(saved_content)
+            self.shown_note = note
+            if key != self.shown_content:
+                self.load_content(note)
 
             # 更新时间日志
             log_text = f"创建时间：{format_datetime(note.get('created_at', ''))}\n"
@@ -128,7 +153,48 @@ else:
 
             # 每次刷新时，强制同步锁定状态
             self.title_entry.setReadOnly(self.edit_locked)
-            self.content_text.setReadOnly(self.edit_locked)
+            self.content_text.setReadOnly(self.edit_locked or self.loading)
+
+        @timed("NoteWorkspace.load_content")
+        def load_content(self, note: dict):
+            """载入便签正文；大文档先显示第一块，其余分块追加"""
+            text = get_note_content(note)
+            self._load_generation += 1
+            self.shown_content = (note.get("id"), note.get("content_hash", ""))
+            large = len(text) > NOTE_LARGE_CHARS
+            editor = self.content_text
+            editor.setLineWrapMode(
+                QPlainTextEdit.LineWrapMode.NoWrap if large else QPlainTextEdit.LineWrapMode.WidgetWidth)
+            editor.blockSignals(True)  # 载入不是编辑，不触发自动保存
+            editor.setUndoRedoEnabled(False)
+            editor.setPlainText(text[:NOTE_LOAD_CHUNK_CHARS] if large else text)
+            if large:
+                incr("note.large_loaded")
+                self.loading = True
+                editor.setReadOnly(True)
+                self._append_chunk(self._load_generation, text, NOTE_LOAD_CHUNK_CHARS)
+            else:
+                self._finish_load()
+
+        def _append_chunk(self, generation: int, text: str, pos: int):
+            if generation != self._load_generation:
+                return  # 已切换到其他便签
+            if pos >= len(text):
+                self._finish_load()
+                self.window().statusBar().showMessage(f"大文档模式：已载入 {len(text)} 个字符（不自动换行）", 3000)
+                return
+            cursor = QTextCursor(self.content_text.document())
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText(text[pos:pos + NOTE_LOAD_CHUNK_CHARS])
+            QTimer.singleShot(0, lambda: self._append_chunk(generation, text, pos + NOTE_LOAD_CHUNK_CHARS))
+
+        def _finish_load(self):
+            editor = self.content_text
+            self.loading = False
+            editor.setUndoRedoEnabled(True)
+            editor.document().setModified(False)
+            editor.blockSignals(False)
+            editor.setReadOnly(self.edit_locked)
 
         def auto_save_draft(self):
             """500ms 防抖自动保存"""
@@ -143,21 +209,26 @@ else:
             if not hasattr(main_window, 'notes'):
                 return
 
-            note = main_window.notes[main_window.current_note_index]
+            note = self.shown_note if self.shown_note is not None else main_window.notes[main_window.current_note_index]
             new_title = self.title_entry.text().strip()
-            new_content = self.content_text.toPlainText().strip()
 
             changed = False
             if new_title != note.get("title", "").strip():
                 note["title"] = new_title
                 changed = True
-            if new_content != note.get("content", "").strip():
-                note["content"] = new_content
-                changed = True
+            document = self.content_text.document()
+            if not self.loading and document.isModified():
+                # 只有编辑过才取出正文，按哈希判断是否真的变化（例如改动后又撤销）
+                new_content = self.content_text.toPlainText().strip()
+                if (content_hash(new_content) if new_content else "") != note.get("content_hash", ""):
+                    set_note_content(note, new_content)
+                    changed = True
+                document.setModified(False)
+                self.shown_content = (note.get("id"), note.get("content_hash", ""))
 
             if changed:
                 note["updated_at"] = datetime.now().isoformat()
-                save_notes(main_window.notes)
+                main_window.request_save_notes()
                 self.log_label.setText(
                     f"创建时间：{format_datetime(note.get('created_at', ''))}\n"
                     f"更新时间：{format_datetime(note['updated_at'])}"
@@ -174,7 +245,7 @@ else:
             new_name, ok = QInputDialog.getText(self, "重命名便签", "新名称：", text=current_name)
             if ok and new_name.strip():
                 note["display_name"] = new_name.strip()
-                save_notes(main_window.notes)
+                main_window.request_save_notes()
                 main_window.refresh_left_list()
 
         def move_up_current(self):
@@ -183,7 +254,7 @@ else:
             if idx > 0:
                 main_window.notes[idx-1], main_window.notes[idx] = main_window.notes[idx], main_window.notes[idx-1]
                 main_window.current_note_index = idx - 1
-                save_notes(main_window.notes)
+                main_window.request_save_notes()
                 main_window.refresh_left_list()
 
         def move_down_current(self):
@@ -192,7 +263,7 @@ else:
             if idx < len(main_window.notes) - 1:
                 main_window.notes[idx+1], main_window.notes[idx] = main_window.notes[idx], main_window.notes[idx+1]
                 main_window.current_note_index = idx + 1
-                save_notes(main_window.notes)
+                main_window.request_save_notes()
                 main_window.refresh_left_list()
 
         def clear_current(self):
@@ -201,10 +272,10 @@ else:
             note = main_window.notes[idx]
             if QMessageBox.question(self, "清空", "确定清空当前便签内容？") == QMessageBox.Yes:
                 note["title"] = ""
-                note["content"] = ""
+                set_note_content(note, "")
                 note["display_name"] = TIANGAN[idx]  # 恢复默认天干
                 note["updated_at"] = datetime.now().isoformat()
-                save_notes(main_window.notes)
+                main_window.request_save_notes()
                 self.refresh_ui()
                 main_window.refresh_left_list()
                 main_window.statusBar().showMessage("当前便签已清空", 2000)
@@ -225,7 +296,7 @@ else:
                 return
             self.edit_locked = False
             self.title_entry.setReadOnly(False)
-            self.content_text.setReadOnly(False)
+            self.content_text.setReadOnly(self.loading)
             self.window().statusBar().showMessage("已解锁编辑，可编辑内容", 2000)
 
         # ===================== 状态管理 =====================
@@ -238,7 +309,7 @@ else:
                 note["status"] = "completed"
                 note["finished_at"] = datetime.now().isoformat()
                 note["updated_at"] = datetime.now().isoformat()
-                save_notes(main_window.notes)
+                main_window.request_save_notes()
                 self.refresh_ui()
                 main_window.statusBar().showMessage("便签已标记为完成", 2000)
 
@@ -251,7 +322,7 @@ else:
                 note["status"] = "discarded"
                 note["discarded_at"] = datetime.now().isoformat()
                 note["updated_at"] = datetime.now().isoformat()
-                save_notes(main_window.notes)
+                main_window.request_save_notes()
                 self.refresh_ui()
                 main_window.statusBar().showMessage("便签已标记为废止", 2000)
 
@@ -305,5 +376,5 @@ else:
                 lines.append(f"完成时间：{format_datetime(note['finished_at'])}")
             if note.get("discarded_at"):
                 lines.append(f"废止时间：{format_datetime(note['discarded_at'])}")
-            lines.extend(["", "内容：", note.get("content", "")])
+            lines.extend(["", "内容：", get_note_content(note)])
             return "\n".join(lines)
\ No newline at end of file
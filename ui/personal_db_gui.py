@@ -7,21 +7,39 @@
 """
 
 import sys
+import copy
+import time
+from datetime import datetime
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
     QListWidget, QStackedWidget, QPushButton, QGroupBox,
-    QButtonGroup, QStatusBar, QMessageBox
+    QButtonGroup, QStatusBar, QMessageBox, QLabel, QApplication, QSystemTrayIcon, QStyle
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, QThreadPool
 from PyQt6.QtGui import QFont, QKeySequence, QShortcut
 
 from config import PYQT6_AVAILABLE, ensure_data_dir,TIANGAN,DIZHI_SCENE,DIZHI_FLAG
-from data_utils import load_scenes, load_flags, load_notes, save_scenes, save_flags, save_notes
+from config import FLAG_CHECKPOINT_EVENTS
+import startup
+from data_utils import (
+    load_scenes, load_flags, load_notes, save_scenes, save_notes, record_flag_event, checkpoint_flags,
+    get_scene_stamp, adopt_baseline
+)
+from time_utils import calculate_span_seconds, format_datetime
+from flag_deadlines import EVENT_LABELS
 from ui.welcome_widget import WelcomeWidget
 from ui.base_workspace import BaseWorkspace
 from ui.table_workspace import TableWorkspace
 from ui.flag_workspace import FlagWorkspace
 from ui.note_workspace import NoteWorkspace
+from ui.components import DiagnosticsDialog, BackupDialog
+from ui.data_watcher import DataWatcher
+from ui.save_coordinator import SaveCoordinator, save_entities, merge_back
+from ui.deadline_scheduler import DeadlineScheduler
+from ui.background import run_in_background
+from profiler import timed, span
+
+WORKSPACE_CLASSES = (TableWorkspace, FlagWorkspace, NoteWorkspace)  # 按模式编号
 
 if not PYQT6_AVAILABLE:
     class PersonalDBGUI(QWidget):
@@ -39,8 +57,12 @@ else:
             # 数据预加载
             ensure_data_dir()
             self.scenes = load_scenes()
-            self.flags = load_flags()
-            self.notes = load_notes()
+            self.flags, flags_baseline = load_flags()
+            adopt_baseline("flags", flags_baseline)
+            self.flag_events_since_checkpoint = 0
+            self.notes, notes_baseline = load_notes()
+            adopt_baseline("notes", notes_baseline)
+            startup.mark("data_load")
 
             # 当前状态
             self.current_mode = 0  # 0:table, 1:flag, 2:note
@@ -72,13 +94,78 @@ else:
             # 全局快捷键
             self.setup_global_shortcuts()
 
-        def build_ui(self):
-            """构建主界面：左侧操作区贯通，右侧工作区+底部按钮"""
+            # 后台批量保存 + 状态栏待写入指示
+            self.save_coordinator = SaveCoordinator(self)
+            self.pending_label = QLabel()
+            self.pending_label.setStyleSheet("color: #b06000; padding: 0 8px;")
+            self.pending_label.hide()  # build_ui 中放入状态栏
+            self.save_coordinator.pending_changed.connect(self.on_pending_writes_changed)
+            QApplication.instance().aboutToQuit.connect(self.save_coordinator.flush_now)
+            # 退出时等待重新加载等其他后台任务结束，避免解释器退出时任务仍在运行
+            QApplication.instance().aboutToQuit.connect(lambda: QThreadPool.globalInstance().waitForDone())
+
+            # 监视 data/ 的外部修改（同步盘、脚本生成的 CSV 等）
+            self.data_watcher = DataWatcher(self)
+            self.data_watcher.start()
+
+            # Flag 截止提醒：一个定时器只等待下一个截止事件
+            self.tray_icon = None  # 首次提醒时创建
+            self.deadline_scheduler = DeadlineScheduler(self)
+            self.deadline_scheduler.deadline_reached.connect(self.on_flag_deadline)
+            self.deadline_scheduler.reschedule(self.flags)
+
+            self.prefetched_scene = None  # 欢迎页空闲时后台读取的首个场景：(场景名, 字段 repr, (文件戳, SceneTable))
+            startup.mark("window")
+
+        def prebuild(self):
+            """
+            欢迎页首次绘制后调用：后台预读首个场景，读完后构建主界面（不切换过去），
+            点击“开始使用”时只需切换页面；预读完成前点击则照常同步构建
+            """
+            if self._ui_ready():
+                return
+            scene_names = list(self.scenes)
+            if self.current_mode != 0 or not scene_names:
+                self.build_ui(show=False)
+                return
+            name = scene_names[min(self.current_scene_index, len(scene_names) - 1)]
+            fields = self.scenes[name]
+            if TableWorkspace.auto_paged(name):
+                self.build_ui(show=False)  # 超大场景按分页打开，不整表预读
+                return
+            started = time.perf_counter()
+
+            def done(result):
+                startup.mark_duration("prefetch", time.perf_counter() - started)
+                if self._ui_ready():
+                    return  # 预读期间已点击开始使用
+                self.prefetched_scene = (name, repr(fields), result)
+                self.build_ui(show=False)
+
+            def failed(message):
+                if not self._ui_ready():
+                    self.build_ui(show=False)
+
+            run_in_background(TableWorkspace.open_scene, name, fields, on_done=done, on_error=failed)
+
+        def take_prefetched_scene(self, scene_name: str, fields: list):
+            """取出预读的场景（场景名、字段定义、文件戳都未变化时才可用），只用一次"""
+            prefetched, self.prefetched_scene = self.prefetched_scene, None
+            if prefetched is None or prefetched[:2] != (scene_name, repr(fields)):
+                return None
+            stamp, table = prefetched[2]
+            return (stamp, table) if stamp == get_scene_stamp(scene_name) else None
+
+        @timed("PersonalDBGUI.build_ui")
+        def build_ui(self, show: bool = True):
+            """构建主界面：左侧操作区贯通，右侧工作区+底部按钮；show=False 时只构建（欢迎页预构建）"""
             if hasattr(self, '_ui_built') and self._ui_built:
                 return
             self._ui_built = True
+            started = time.perf_counter()
 
-            self.main_stack.setCurrentWidget(self.main_container)
+            if show:
+                self.main_stack.setCurrentWidget(self.main_container)
 
             # 主布局改为 QHBoxLayout，确保左侧能一通到底
             main_h_layout = QHBoxLayout(self.main_container)
@@ -135,12 +222,8 @@ else:
             right_v_layout.setContentsMargins(0, 0, 0, 0)
 
             # (1) 右侧工作区堆栈 (占据上方)
+            # 工作区在首次切换到对应模式时才创建（get_workspace），之后常驻保留视图状态
             self.right_stack = QStackedWidget()
-            self.workspaces[0] = TableWorkspace(self)
-            self.workspaces[1] = FlagWorkspace(self)
-            self.workspaces[2] = NoteWorkspace(self)
-            for ws in self.workspaces:
-                self.right_stack.addWidget(ws)
             right_v_layout.addWidget(self.right_stack, stretch=1)
 
             # (2) 底部按钮栏 (红色框线区域：三组按钮，每组2个上下排列)
@@ -212,11 +295,22 @@ else:
 
             self.refresh_left_list()
             self.btn_mode_table.setChecked(True)
-            self.switch_mode(0)
             self.setStatusBar(QStatusBar())
-
-        def switch_mode(self, mode_index: int):
-            if mode_index == self.current_mode:
+            self.statusBar().addPermanentWidget(self.pending_label)
+            backup_btn = QPushButton("备份与恢复")
+            backup_btn.setFlat(True)
+            backup_btn.setToolTip("快照备份 data/ 目录或恢复到之前的快照（Ctrl+Shift+B）")
+            backup_btn.clicked.connect(self.show_backup)
+            self.statusBar().addPermanentWidget(backup_btn)
+            self.switch_mode(self.current_mode, force=True)
+            self.prefetched_scene = None  # 未被使用的预读结果（期间场景已变化）不再保留
+
+            startup.mark_duration("ui_build", time.perf_counter() - started)
+            startup.report()
+
+        @timed("PersonalDBGUI.switch_mode")
+        def switch_mode(self, mode_index: int, force: bool = False):
+            if mode_index == self.current_mode and not force:
                 return
 
             self.current_mode = mode_index
@@ -225,8 +319,9 @@ else:
             buttons = [self.btn_mode_table, self.btn_mode_flag, self.btn_mode_note]
             buttons[mode_index].setChecked(True)
 
-            # 切换堆栈
-            self.right_stack.setCurrentIndex(mode_index)
+            # 切换堆栈（首次进入时创建工作区）
+            ws = self.get_workspace(mode_index)
+            self.right_stack.setCurrentWidget(ws)
 
             # 刷新左侧列表
             self.refresh_left_list()
@@ -234,20 +329,28 @@ else:
             # 刷新底部按钮状态
             self.update_bottom_buttons()
 
-            # 刷新当前工作区
-            ws = self.workspaces[mode_index]
-            if not ws.ui_built:
-                ws.build_ui()
-            ws.refresh_ui()
+            # 刷新当前工作区：数据版本未变化时保留现有视图，不重新加载
+            ws.refresh_if_changed()
 
             mode_names = ["数据记录", "Flag 任务", "便签笔记"]
             self.statusBar().showMessage(f"已切换到：{mode_names[mode_index]} 模式")
 
             # 确保切换便签或模式时恢复锁定
             if hasattr(self, 'workspaces') and self.workspaces[self.current_mode]:
-                if self.current_mode == 2:
-                    self.workspaces[2].lock_edit()  # 切换时默认锁定
+                if self.current_mode in (0, 2):
+                    self.workspaces[self.current_mode].lock_edit()  # 切换时默认锁定
+
+        def get_workspace(self, mode: int) -> BaseWorkspace:
+            """返回指定模式的工作区，第一次使用时才创建并构建界面"""
+            ws = self.workspaces[mode]
+            if ws is None:
+                with span(f"PersonalDBGUI.create_workspace[{mode}]"):
+                    ws = self.workspaces[mode] = WORKSPACE_CLASSES[mode](self)
+                    ws.build_ui()
+                self.right_stack.addWidget(ws)
+            return ws
 
+        @timed("PersonalDBGUI.refresh_left_list")
         def refresh_left_list(self):
             self.left_list.clear()
             if self.current_mode == 0:
@@ -296,15 +399,189 @@ else:
                 btn.setEnabled(is_note_mode)
 
         def enter_edit_mode(self):
-            if self.current_mode == 2:
-                self.workspaces[2].unlock_edit()
+            if self.current_mode in (0, 2):
+                self.workspaces[self.current_mode].unlock_edit()
 
         def exit_edit_mode(self):
-            if self.current_mode == 2:
-                self.workspaces[2].lock_edit()
+            if self.current_mode in (0, 2):
+                self.workspaces[self.current_mode].lock_edit()
+
+        def apply_external_change(self, kind: str, data):
+            """
+            应用 DataWatcher 在后台读取到的外部修改，只刷新受影响的实体
+            kind: "scenes" 时 data 为新数据；"flags" / "notes" 时为 (新数据, 合并基线)；"table" 时为场景名
+            只有真正采用新数据时才更新合并基线，被丢弃的读取结果不影响下次保存的合并
+            """
+            if kind == "scenes":
+                if self.save_coordinator.is_pending("scenes"):  # save_scenes 不合并，采用外部版本会丢掉本地修改
+                    self.statusBar().showMessage("场景定义已被外部修改，当前有未保存的修改，已保留本地内容", 5000)
+                    return
+                self.scenes = data
+                if self.current_scene_index >= len(self.scenes):
+                    self.current_scene_index = 0
+                if self._ui_ready() and self.current_mode == 0:
+                    self.refresh_left_list()
+                    self.workspaces[0].reload_from_disk()
+            elif kind == "flags":
+                if self.save_coordinator.is_pending("flags") or self.flag_events_since_checkpoint:
+                    # 不采用时基线不变，下次检查点保存会把外部修改合并进来
+                    self.statusBar().showMessage("Flag 文件已被外部修改，当前有未保存的计时，已保留本地内容", 5000)
+                    return
+                self.flags, baseline = data
+                adopt_baseline("flags", baseline)
+                self.deadline_scheduler.reschedule(self.flags)
+                if self._ui_ready() and self.current_mode == 1:
+                    self.refresh_left_list()
+                    self.workspaces[1].refresh_ui()
+            elif kind == "notes":
+                note_ws = self.workspaces[2]
+                if self.save_coordinator.is_pending("notes") or (
+                        note_ws and note_ws.auto_save_timer and note_ws.auto_save_timer.isActive()):
+                    self.statusBar().showMessage("便签文件已被外部修改，当前有未保存的编辑，已保留本地内容", 5000)
+                    return
+                self.notes, baseline = data
+                adopt_baseline("notes", baseline)
+                if self._ui_ready() and self.current_mode == 2:
+                    self.refresh_left_list()
+                    note_ws.refresh_ui()
+            elif kind == "table":
+                table_ws = self.workspaces[0]
+                if self._ui_ready() and self.current_mode == 0:
+                    if table_ws.current_scene_name == data:
+                        table_ws.reload_from_disk()
+                    else:
+                        table_ws.on_other_scene_changed(data)  # 当前场景的查找列可能引用它
+                return  # 其他非当前场景无需处理：切换场景时会重新读取
+            labels = {"scenes": "场景定义", "flags": "Flag 任务", "notes": "便签笔记"}
+            self.statusBar().showMessage(f"已重新加载外部修改：{labels[kind]}", 3000)
+
+        def _ui_ready(self) -> bool:
+            return getattr(self, '_ui_built', False)
 
         def setup_global_shortcuts(self):
-            # Ctrl+C / V / X / A 等全局快捷键（后续完善）
-            pass
-
-        # ... 其他方法如 toggle_edit_mode、save_all 等可在此添加
\ No newline at end of file
+            # Ctrl+C / X / V / A：交给当前工作区处理（输入框、文本编辑器获得焦点时由其自身处理）
+            for key, action in (
+                (QKeySequence.StandardKey.Copy, "copy_selection"),
+                (QKeySequence.StandardKey.Cut, "cut_selection"),
+                (QKeySequence.StandardKey.Paste, "paste_clipboard"),
+                (QKeySequence.StandardKey.SelectAll, "select_all"),
+            ):
+                QShortcut(QKeySequence(key), self, activated=lambda a=action: self.workspace_action(a))
+            # Ctrl+Shift+D：性能诊断窗口
+            QShortcut(QKeySequence("Ctrl+Shift+D"), self, activated=self.show_diagnostics)
+            # Ctrl+Shift+B：快照备份与恢复
+            QShortcut(QKeySequence("Ctrl+Shift+B"), self, activated=self.show_backup)
+
+        def workspace_action(self, action: str):
+            ws = self.workspaces[self.current_mode] if self.current_mode is not None else None
+            if ws is not None:
+                getattr(ws, action)()
+
+        def show_diagnostics(self):
+            """打开性能诊断窗口（埋点数据来自 profiler）"""
+            DiagnosticsDialog(self).exec()
+
+        def show_backup(self):
+            """打开快照备份与恢复窗口（见 data_backup.py）"""
+            BackupDialog(self).exec()
+
+        # ===================== 保存 =====================
+        def request_save_notes(self):
+            """登记便签保存（由 SaveCoordinator 合并后在后台写入）"""
+            self.save_coordinator.submit(
+                "notes", lambda: copy.deepcopy(self.notes),
+                lambda notes: save_entities(save_notes, notes),
+                on_saved=lambda result: self._on_entities_saved("notes", result),
+            )
+
+        def request_save_flags(self):
+            """登记 Flag 保存；写入 flags.json 后同时压缩计时事件日志（检查点）"""
+            self.flag_events_since_checkpoint = 0
+            self.save_coordinator.submit(
+                "flags", lambda: copy.deepcopy(self.flags),
+                lambda flags: save_entities(checkpoint_flags, flags),
+                on_saved=lambda result: self._on_entities_saved("flags", result),
+            )
+
+        def request_save_scenes(self):
+            self.save_coordinator.submit("scenes", lambda: copy.deepcopy(self.scenes), save_scenes)
+
+        def _on_entities_saved(self, kind: str, result):
+            """写入时合并了其他进程的修改：并回当前列表并刷新"""
+            external, before, after = result
+            if not external:
+                return
+            merge_back(getattr(self, kind), before, after)
+            if kind == "flags":
+                self.deadline_scheduler.reschedule(self.flags)
+            mode = {"flags": 1, "notes": 2}[kind]
+            if self._ui_ready() and self.current_mode == mode:
+                self.refresh_left_list()
+                self.workspaces[mode].refresh_ui()
+            self.statusBar().showMessage(f"保存时合并了 {external} 项其他程序的修改", 3000)
+
+        def flag_event(self, kind: str):
+            """当前 Flag 的计时操作：只追加事件日志，累计一定数量后再做检查点"""
+            flag = self.flags[self.current_flag_index]
+            try:
+                record_flag_event(flag, kind)
+            except (OSError, TimeoutError) as e:
+                QMessageBox.warning(self, "记录失败", str(e))
+                return
+            self.flag_events_since_checkpoint += 1
+            if kind in ("finish", "discard") or self.flag_events_since_checkpoint >= FLAG_CHECKPOINT_EVENTS:
+                self.request_save_flags()
+            self.deadline_scheduler.update_flag(flag)  # 完成 / 废止后不再提醒
+            if self._ui_ready() and self.current_mode == 1:
+                self.refresh_left_list()
+                self.workspaces[1].refresh_ui()
+
+        def set_flag_target(self, flag: dict, target_time: str):
+            """修改 Flag 的截止时间（空字符串表示清除），并重新安排提醒"""
+            flag["target_time"] = target_time
+            flag["span_seconds"] = calculate_span_seconds(flag.get("start_time", ""), target_time)
+            flag["updated_at"] = datetime.now().isoformat()
+            self.request_save_flags()
+            self.deadline_scheduler.update_flag(flag)
+            if self._ui_ready() and self.current_mode == 1:
+                self.workspaces[1].refresh_ui()
+
+        def on_flag_deadline(self, flag_id: str, kind: str):
+            """截止提醒：状态栏 + 系统托盘通知（托盘不可用时只用状态栏）"""
+            flag = next((f for f in self.flags if f.get("id") == flag_id), None)
+            if flag is None:
+                return
+            name = flag.get("name", "未命名")
+            if kind == "reminder":
+                message = f"Flag「{name}」将在 {format_datetime(flag.get('target_time', ''))} 截止"
+            else:
+                message = f"Flag「{name}」已到截止时间"
+            self.statusBar().showMessage(message, 10000)
+            if self.tray_icon is None and QSystemTrayIcon.isSystemTrayAvailable():
+                icon = self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxInformation)
+                self.tray_icon = QSystemTrayIcon(icon, self)
+                self.tray_icon.setToolTip("Systema")
+                self.tray_icon.show()
+            if self.tray_icon is not None:
+                self.tray_icon.showMessage(EVENT_LABELS[kind], message)
+            QApplication.alert(self)
+
+        def on_pending_writes_changed(self, count: int):
+            self.pending_label.setText(f"待写入 {count}")
+            self.pending_label.setVisible(count > 0)
+
+        def save_all(self):
+            """立即写完所有待写入数据"""
+            self.save_coordinator.flush_now()
+
+        def closeEvent(self, event):
+            note_ws = self.workspaces[2]
+            if note_ws and note_ws.auto_save_timer and note_ws.auto_save_timer.isActive():
+                note_ws.auto_save_timer.stop()
+                note_ws._perform_auto_save()
+            if self.flag_events_since_checkpoint:
+                self.request_save_flags()
+            self.save_coordinator.flush_now()
+            super().closeEvent(event)
+
+        # ... 其他方法如 toggle_edit_mode 等可在此添加
\ No newline at end of file
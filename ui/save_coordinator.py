@@ -0,0 +1,121 @@
+# 后台批量保存调度
+
+# ui/save_coordinator.py
+"""
+统一的保存调度器
+- 各工作区只登记“某个文件需要保存”（submit），同一文件在 SAVE_BATCH_INTERVAL_MS 内的多次修改只写一次
+- 写入在调度器自己的 QThreadPool 中进行（不与重新加载等其他后台任务混用）；写入前在 UI 线程取数据快照，之后的编辑不会影响正在写的数据
+- 同一文件同时只有一个写入在进行，写入期间的新修改留到下一轮
+- 窗口关闭 / 程序退出时 flush_now() 同步写完所有待写入数据
+- pending_changed 信号报告待写入数量（状态栏指示器）
+"""
+
+import copy
+
+from PyQt6.QtCore import QObject, QTimer, QThreadPool, pyqtSignal
+
+from config import SAVE_BATCH_INTERVAL_MS
+from data_utils import merge_entities
+from .background import run_in_background
+
+
+class SaveCoordinator(QObject):
+    """后台批量保存调度器（由 PersonalDBGUI 创建）"""
+    pending_changed = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending = {}      # key → (snapshot_fn, write_fn, on_saved)，后登记的覆盖先登记的
+        self._in_flight = set()
+        self._pool = QThreadPool(self)  # flush_now 只等待保存任务
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    def submit(self, key, snapshot_fn, write_fn, on_saved=None):
+        """
+        登记一次保存
+        key：文件标识（如 "notes"、("table", 场景名)）
+        snapshot_fn()：UI 线程中调用，返回要写入的数据副本
+        write_fn(snapshot)：后台线程中调用，执行实际写入，返回值交给 on_saved
+        on_saved(result)：写入成功后在 UI 线程调用
+        """
+        self._pending[key] = (snapshot_fn, write_fn, on_saved)
+        # 不重新计时：连续编辑时最迟 SAVE_BATCH_INTERVAL_MS 后落盘
+        if not self._timer.isActive():
+            self._timer.start(SAVE_BATCH_INTERVAL_MS)
+        self._emit_pending()
+
+    def is_pending(self, key) -> bool:
+        return key in self._pending or key in self._in_flight
+
+    def pending_count(self) -> int:
+        return len(self._pending.keys() | self._in_flight)
+
+    def _emit_pending(self):
+        self.pending_changed.emit(self.pending_count())
+
+    def flush(self):
+        """把当前所有待写入提交到后台线程"""
+        for key in list(self._pending):
+            if key in self._in_flight:
+                continue  # 上一次写入尚未完成，留到下一轮
+            snapshot_fn, write_fn, on_saved = self._pending.pop(key)
+            self._in_flight.add(key)
+            run_in_background(
+                write_fn, snapshot_fn(),
+                on_done=lambda result, key=key, cb=on_saved: self._finished(key, cb, result),
+                on_error=lambda message, key=key: self._failed(key, message),
+                pool=self._pool,
+            )
+        if self._pending and not self._timer.isActive():
+            self._timer.start(SAVE_BATCH_INTERVAL_MS)
+        self._emit_pending()
+
+    def flush_now(self):
+        """同步写完所有待写入（关闭窗口 / 退出时调用）"""
+        self._timer.stop()
+        self._pool.waitForDone()
+        for key in list(self._pending):
+            snapshot_fn, write_fn, on_saved = self._pending.pop(key)
+            try:
+                result = write_fn(snapshot_fn())
+            except Exception as e:
+                print(f"保存失败（{key}）: {e}")
+                continue
+            if on_saved:
+                on_saved(result)
+        self._emit_pending()
+
+    def _finished(self, key, on_saved, result):
+        self._in_flight.discard(key)
+        if on_saved:
+            on_saved(result)
+        self._emit_pending()
+
+    def _failed(self, key, message: str):
+        self._in_flight.discard(key)
+        self._emit_pending()
+        parent = self.parent()
+        if parent is not None and hasattr(parent, 'statusBar'):
+            parent.statusBar().showMessage(f"保存失败：{message}", 5000)
+
+
+def save_entities(save_func, items: list):
+    """
+    flags / notes 的后台写入：返回 (合并的外部修改数, 写入前快照, 合并后列表)
+    save_func 会把其他进程的修改原地合并进 items，由 merge_back 再并回 UI 中的列表
+    """
+    before = copy.deepcopy(items)
+    external = save_func(items)
+    return external, before, items
+
+def merge_back(current: list, before: list, after: list) -> int:
+    """
+    写入期间 UI 中的列表可能又被修改：以写入前快照为基线三方合并，
+    自快照后未再修改的实体采用合并结果，本地新修改保留；原地更新 current
+    """
+    base = {item["id"]: item for item in before if "id" in item}
+    merged, adopted = merge_entities(base, current, after)
+    current[:] = merged
+    return adopted
@@ -0,0 +1,165 @@
+# Mode 0 场景表格数据模型
+
+# ui/scene_table_model.py
+"""
+基于 SceneTable 列存储的表格模型（QAbstractTableModel）
+取代逐格创建 QStandardItem 的方式：数据只保存一份，编辑时按字段类型校验
+挂载 validator（scene_validation.SceneValidator）后，不符合字段规则的单元格以底色和提示标出
+"""
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QColor
+
+from scene_types import SceneTable, field_name, field_type, field_options, FIELD_TYPE_LABELS
+from scene_lookup import field_lookup, describe
+
+
+class SceneTableModel(QAbstractTableModel):
+    """场景表格模型"""
+    validation_failed = pyqtSignal(str)  # 编辑校验失败时发出错误消息
+    INVALID_COLOR = QColor("#ffd6d6")
+
+    def __init__(self, table: SceneTable, parent=None):
+        super().__init__(parent)
+        self.table = table
+        self.row_offset = 0  # 分页浏览时本页首行在整个场景中的行号（只影响行号表头）
+        self.validator = None  # 可选的 SceneValidator，由工作区挂载
+
+    # ===================== 基本接口 =====================
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.table.row_count()
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.table.column_count()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self.table.text(index.row(), index.column())
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if field_type(self.table.fields[index.column()]) in ("int", "float"):
+                return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        if self.validator is not None and role in (Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ToolTipRole):
+            error = self.validator.cell_error(index.row(), index.column())
+            if error:
+                return self.INVALID_COLOR if role == Qt.ItemDataRole.BackgroundRole else error
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and 0 <= section < self.table.column_count():
+            spec = self.table.fields[section]
+            if role == Qt.ItemDataRole.DisplayRole:
+                return field_name(spec)
+            if role == Qt.ItemDataRole.ToolTipRole:
+                if field_lookup(spec):
+                    return f"查找列：{describe(spec)}"
+                tip = f"类型：{FIELD_TYPE_LABELS[field_type(spec)]}"
+                if field_type(spec) == "enum":
+                    tip += f"\n可选：{'、'.join(field_options(spec))}"
+                return tip
+        elif orientation == Qt.Orientation.Vertical and role == Qt.ItemDataRole.DisplayRole:
+            return self.row_offset + section + 1
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        if field_lookup(self.table.fields[index.column()]):
+            return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable  # 查找列由其他字段计算得出
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        """编辑入口：按字段类型校验，不合法时拒绝写入并发出 validation_failed"""
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        try:
+            self.table.set_text(index.row(), index.column(), value)
+        except ValueError as e:
+            self.validation_failed.emit(str(e))
+            return False
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole])
+        return True
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """按类型值原生排序（数值列走 array/NumPy 路径）"""
+        if not 0 <= column < self.table.column_count():
+            return
+        self.layoutAboutToBeChanged.emit()
+        self.table.sort_rows(column, reverse=(order == Qt.SortOrder.DescendingOrder))
+        self.layoutChanged.emit()
+
+    def set_block(self, top: int, left: int, block: list):
+        """批量写入已校验的矩形区域，只发出一次 dataChanged"""
+        if not block or not block[0]:
+            return
+        self.table.set_block(top, left, block)
+        bottom, right = top + len(block[0]) - 1, left + len(block) - 1
+        self.dataChanged.emit(self.index(top, left), self.index(bottom, right),
+                              [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole])
+
+    # ===================== 行列结构（每次一整段：一组 begin/end 信号 + 一次存储更新） =====================
+    def insertRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or count <= 0 or not 0 <= row <= self.rowCount():
+            return False
+        self.beginInsertRows(QModelIndex(), row, row + count - 1)
+        self.table.insert_rows(row, count)
+        self.endInsertRows()
+        return True
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or count <= 0 or row < 0 or row + count > self.rowCount():
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        self.table.remove_rows(row, count)
+        self.endRemoveRows()
+        return True
+
+    def moveRows(self, source_parent, row, count, dest_parent, dest):
+        if source_parent.isValid() or dest_parent.isValid() or count <= 0:
+            return False
+        if row < 0 or row + count > self.rowCount() or not 0 <= dest <= self.rowCount():
+            return False
+        if not self.beginMoveRows(QModelIndex(), row, row + count - 1, QModelIndex(), dest):
+            return False  # 目标位于被移动的区间内
+        self.table.move_rows(row, count, dest)
+        self.endMoveRows()
+        return True
+
+    def insert_fields(self, col: int, specs: list):
+        """插入若干新字段（字段名重复时抛出 ValueError，表格不变）"""
+        if not specs:
+            return
+        self.table.check_new_fields(specs)
+        self.beginInsertColumns(QModelIndex(), col, col + len(specs) - 1)
+        self.table.insert_columns(col, specs)
+        self.endInsertColumns()
+
+    def removeColumns(self, col, count, parent=QModelIndex()):
+        if parent.isValid() or count <= 0 or col < 0 or col + count > self.columnCount():
+            return False
+        self.beginRemoveColumns(QModelIndex(), col, col + count - 1)
+        self.table.remove_columns(col, count)
+        self.endRemoveColumns()
+        return True
+
+    def moveColumns(self, source_parent, col, count, dest_parent, dest):
+        if source_parent.isValid() or dest_parent.isValid() or count <= 0:
+            return False
+        if col < 0 or col + count > self.columnCount() or not 0 <= dest <= self.columnCount():
+            return False
+        if not self.beginMoveColumns(QModelIndex(), col, col + count - 1, QModelIndex(), dest):
+            return False
+        self.table.move_columns(col, count, dest)
+        self.endMoveColumns()
+        return True
+
+    # ===================== 辅助 =====================
+    def field_names(self) -> list:
+        return self.table.names
+
+    def retype_column(self, col: int, spec):
+        """修改列类型（失败抛出 ValueError，表格保持不变）"""
+        self.table.retype_column(col, spec)
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, col, col)
+        self.dataChanged.emit(self.index(0, col), self.index(self.rowCount() - 1, col))
@@ -8,15 +8,31 @@ Mode 0 - 数据表格工作区
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QTableView, QHeaderView,
-    QPushButton, QGroupBox, QScrollArea, QProgressBar,
-    QMessageBox, QInputDialog, QFileDialog
+    QPushButton, QSpinBox, QLabel, QGroupBox, QScrollArea, QProgressBar,
+    QMessageBox, QInputDialog, QFileDialog, QTableWidget, QTableWidgetItem, QApplication, QMenu
 )
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QStandardItemModel, QStandardItem
+from PyQt6.QtCore import Qt, QTimer, QItemSelection, QItemSelectionModel, QModelIndex
 
-from config import PYQT6_AVAILABLE
-from data_utils import load_records, save_records
+from config import PYQT6_AVAILABLE, SCENE_PAGED_THRESHOLD_BYTES
+from data_utils import (
+    load_scene_table, save_scene_table, get_scene_stamp, get_scene_file, is_own_write,
+    get_scene_storage, convert_scene_storage, file_stamp
+)
+from scene_types import (
+    SceneTable, FIELD_TYPES, FIELD_TYPE_LABELS, INDEX_KINDS, INDEX_KIND_LABELS,
+    update_field, field_name, field_type, field_options, field_index, format_value
+)
+from scene_index import SceneIndexes
+from profiler import timed, incr
+from scene_stats import StatsCache, STAT_KEYS, STAT_LABELS
+from table_clipboard import selection_to_tsv, parse_tsv_block
+from scene_pages import PageWindow, load_page_index, read_page
+from scene_validation import SceneValidator
+from scene_lookup import field_lookup, lookup_targets, lookup_columns, get_key_map, compute_column
 from .base_workspace import BaseWorkspace
+from .scene_table_model import SceneTableModel
+from .components import QueryDialog, FieldRulesDialog, LookupFieldDialog
+from .background import run_in_background
 
 if not PYQT6_AVAILABLE:
     class TableWorkspace(BaseWorkspace):
@@ -31,6 +47,15 @@ else:
             self.model = None
             self.table_view = None
             self.edit_mode_locked = True  # 默认锁定编辑
+            self.stats_cache = StatsCache()
+            self.stats_view = None
+            self.dirty = False  # 是否有未保存的编辑（外部修改时据此决定能否自动重载）
+            self.loaded_stamp = None  # 加载时的 CSV 文件戳，保存前据此发现其他进程的写入
+            self.view_states = {}  # 场景名 → (垂直滚动, 水平滚动, 当前行, 当前列)，切换场景后恢复
+            self.page_bar = None
+            self.page_window = None  # 分页浏览状态（scene_pages.PageWindow），None 表示整表加载
+            self.paged_scenes = set()  # 用户手动开启分页浏览的场景
+            self.updating_lookups = False  # 正在重算查找列（派生数据，不算用户编辑）
 
         def build_ui(self):
             if self.ui_built:
@@ -46,17 +71,97 @@ else:
             self.table_view.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
             self.table_view.setAlternatingRowColors(True)
             self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-            layout.addWidget(self.table_view)
+            # 点击表头按类型值排序（不用 setSortingEnabled，避免加载时自动重排数据）
+            header = self.table_view.horizontalHeader()
+            header.setSortIndicatorShown(True)
+            header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+            header.sortIndicatorChanged.connect(self.sort_by_column)
+            layout.addWidget(self.table_view, stretch=1)
+
+            # 分页浏览导航条（仅分页模式显示）
+            self.page_bar = QWidget()
+            page_layout = QHBoxLayout(self.page_bar)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            btn_prev = QPushButton("上一页")
+            btn_prev.clicked.connect(lambda: self.show_page(self.page_window.current - 1))
+            page_layout.addWidget(btn_prev)
+            self.page_spin = QSpinBox()
+            self.page_spin.setMinimum(1)
+            self.page_spin.valueChanged.connect(lambda value: self.show_page(value - 1))
+            page_layout.addWidget(self.page_spin)
+            btn_next = QPushButton("下一页")
+            btn_next.clicked.connect(lambda: self.show_page(self.page_window.current + 1))
+            page_layout.addWidget(btn_next)
+            self.page_label = QLabel()
+            page_layout.addWidget(self.page_label, stretch=1)
+            self.page_bar.setVisible(False)
+            layout.addWidget(self.page_bar)
+
+            # 列统计面板（默认隐藏）
+            self.stats_view = QTableWidget(0, len(STAT_KEYS))
+            self.stats_view.setHorizontalHeaderLabels([STAT_LABELS[k] for k in STAT_KEYS])
+            self.stats_view.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+            self.stats_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+            self.stats_view.setMaximumHeight(200)
+            self.stats_view.setVisible(False)
+            layout.addWidget(self.stats_view)
 
             # 底部操作区（示例，可扩展）
             bottom_layout = QHBoxLayout()
             btn_save = QPushButton("保存")
             btn_save.clicked.connect(self.save_table)
             bottom_layout.addWidget(btn_save)
+            btn_type = QPushButton("设置列类型")
+            btn_type.clicked.connect(self.set_column_type)
+            bottom_layout.addWidget(btn_type)
+            btn_rules = QPushButton("校验规则")
+            btn_rules.clicked.connect(self.set_column_rules)
+            bottom_layout.addWidget(btn_rules)
+            self.btn_stats = QPushButton("列统计")
+            self.btn_stats.setCheckable(True)
+            self.btn_stats.toggled.connect(self.toggle_stats)
+            bottom_layout.addWidget(self.btn_stats)
+            btn_index = QPushButton("设置索引")
+            btn_index.clicked.connect(self.set_column_index)
+            bottom_layout.addWidget(btn_index)
+            btn_find = QPushButton("查找定位")
+            btn_find.clicked.connect(self.find_row)
+            bottom_layout.addWidget(btn_find)
+            btn_query = QPushButton("分组汇总")
+            btn_query.clicked.connect(self.open_query_dialog)
+            bottom_layout.addWidget(btn_query)
+            btn_storage = QPushButton("存储格式")
+            btn_storage.clicked.connect(self.set_storage_format)
+            bottom_layout.addWidget(btn_storage)
+            btn_structure = QPushButton("行列操作")
+            structure_menu = QMenu(btn_structure)
+            for label, slot in (
+                ("插入行…", self.insert_rows),
+                ("删除选中行", self.remove_selected_rows),
+                ("选中行上移", lambda: self.move_selected_rows(-1)),
+                ("选中行下移", lambda: self.move_selected_rows(1)),
+                (None, None),
+                ("添加列…", self.add_columns),
+                ("添加查找列…", self.add_lookup_column),
+                ("删除选中列", self.remove_selected_columns),
+                ("选中列左移", lambda: self.move_selected_columns(-1)),
+                ("选中列右移", lambda: self.move_selected_columns(1)),
+            ):
+                if label is None:
+                    structure_menu.addSeparator()
+                else:
+                    structure_menu.addAction(label, slot)
+            btn_structure.setMenu(structure_menu)
+            bottom_layout.addWidget(btn_structure)
+            self.btn_paged = QPushButton("分页浏览")
+            self.btn_paged.setCheckable(True)
+            self.btn_paged.clicked.connect(self.toggle_paged)
+            bottom_layout.addWidget(self.btn_paged)
 
-            # ... 其他按钮（如批量添加列等）可在此添加
+            # ... 其他按钮（如导入导出 CSV 等）可在此添加
             layout.addLayout(bottom_layout)
 
+        @timed("TableWorkspace.refresh_ui")
         def refresh_ui(self):
             main_window = self.window()
             if not hasattr(main_window, 'scenes') or main_window.current_mode != 0:
@@ -71,48 +176,362 @@ else:
                 idx = 0
                 main_window.current_scene_index = 0
 
-            self.current_scene_name = scene_names[idx]
+            scene_name = scene_names[idx]
+            if self.dirty and self.model and scene_name == self.current_scene_name:
+                # 有未保存的编辑：保留当前模型（外部修改由 reload_from_disk 提示）
+                return
+            self.save_view_state()
+            self.current_scene_name = scene_name
             fields = main_window.scenes[self.current_scene_name]
-            records = load_records(self.current_scene_name, fields)
-
-            self.load_data(fields, records)
+            if main_window.save_coordinator.is_pending(("table", self.current_scene_name)):
+                main_window.save_coordinator.flush_now()  # 该场景还有未落盘的保存，先写完再读取
+            if self.wants_paged(scene_name):
+                self.open_paged(scene_name, fields)
+                return
+            self.close_paged()
+            prefetched = main_window.take_prefetched_scene(scene_name, fields)
+            if prefetched is not None:
+                incr("startup.prefetch_used")
+            try:
+                stamp, table = prefetched or self.open_scene(self.current_scene_name, fields)
+            except (OSError, ValueError) as e:
+                self.show_load_error(scene_name, str(e))
+                return
+            self.stats_cache.bind(self.current_scene_name, stamp)
+            self.set_table(table)
+            self.loaded_stamp = stamp
+            self.restore_view_state()
+            self.shown_key = self.view_key()
 
             rows = self.model.rowCount() if self.model else 0
             cols = self.model.columnCount() if self.model else 0
+            invalid = self.model.validator.count() if self.model and self.model.validator else 0
             main_window.statusBar().showMessage(
-                f"场景：{self.current_scene_name} | 共 {rows} 行 {cols} 列", 5000
+                f"场景：{self.current_scene_name} | 共 {rows} 行 {cols} 列"
+                + (f" | {invalid} 个单元格不符合校验规则" if invalid else ""), 5000
             )
 
+        def view_key(self):
+            """(场景名, 场景文件戳, 字段定义)：都未变化时切换回来无需重新读取磁盘"""
+            main_window = self.window()
+            if not getattr(main_window, 'scenes', None):
+                return None
+            scene_names = list(main_window.scenes.keys())
+            idx = main_window.current_scene_index if main_window.current_scene_index < len(scene_names) else 0
+            name = scene_names[idx]
+            fields = main_window.scenes[name]
+            lookups = tuple(get_scene_stamp(scene) for scene in sorted(lookup_targets(fields)))
+            return name, get_scene_stamp(name), repr(fields), lookups
+
+        def save_view_state(self):
+            if not self.model or not self.current_scene_name:
+                return
+            current = self.table_view.currentIndex()
+            self.view_states[self.current_scene_name] = (
+                self.table_view.verticalScrollBar().value(),
+                self.table_view.horizontalScrollBar().value(),
+                current.row(), current.column(),
+            )
+
+        def restore_view_state(self):
+            state = self.view_states.get(self.current_scene_name)
+            if not state or not self.model:
+                return
+            v_scroll, h_scroll, row, col = state
+            if 0 <= row < self.model.rowCount() and 0 <= col < self.model.columnCount():
+                self.table_view.setCurrentIndex(self.model.index(row, col))
+            # 滚动条范围在布局完成后才更新，延迟到下一轮事件循环
+            QTimer.singleShot(0, lambda: (
+                self.table_view.verticalScrollBar().setValue(v_scroll),
+                self.table_view.horizontalScrollBar().setValue(h_scroll),
+            ))
+
+        @staticmethod
+        def open_scene(scene_name: str, fields: list):
+            """从磁盘加载场景并挂载索引，返回 (文件戳, SceneTable)；可在后台线程调用"""
+            stamp = get_scene_stamp(scene_name)
+            table = load_scene_table(scene_name, fields)
+            table.indexes = SceneIndexes(scene_name, table, stamp)
+            return stamp, table
+
+        def reload_from_disk(self):
+            """场景 CSV 被外部修改：有未保存编辑时保留本地，否则后台重新加载"""
+            main_window = self.window()
+            if self.dirty:
+                main_window.statusBar().showMessage(
+                    f"场景「{self.current_scene_name}」已被外部修改，当前有未保存的编辑，未自动重载", 5000
+                )
+                return
+            scene_name = self.current_scene_name
+            if scene_name not in main_window.scenes:
+                # scenes.json 被外部修改后当前场景已改名或删除：按当前序号重新选择场景
+                self.refresh_ui()
+                return
+            fields = main_window.scenes[scene_name]
+            if self.page_window is not None:
+                self.open_paged(scene_name, fields, self.page_window.current)
+                return
+
+            def apply(result):
+                # 加载期间切换了场景或开始编辑，则丢弃结果
+                if scene_name != self.current_scene_name or self.dirty:
+                    return
+                stamp, table = result
+                self.stats_cache.bind(scene_name, stamp)
+                self.save_view_state()
+                self.set_table(table)
+                self.loaded_stamp = stamp
+                self.restore_view_state()
+                self.shown_key = self.view_key()
+                main_window.statusBar().showMessage(f"已重新加载外部修改：{scene_name}", 3000)
+
+            def failed(message):
+                if scene_name == self.current_scene_name and not self.dirty:
+                    self.show_load_error(scene_name, message)
+
+            run_in_background(self.open_scene, scene_name, fields, on_done=apply, on_error=failed)
+
+        def show_load_error(self, scene_name: str, message: str):
+            """场景文件无法读取（损坏 / 截断）：清空视图而不是显示可保存的空表，避免覆盖原文件"""
+            self.model = None
+            self.loaded_stamp = None
+            self.shown_key = None  # 切换回来时重新尝试读取
+            if self.table_view:
+                self.table_view.setModel(None)
+            if self.stats_view:
+                self.stats_view.setRowCount(0)
+            self.window().statusBar().showMessage(
+                f"无法打开场景「{scene_name}」：{message}（可在「备份与恢复」中恢复）", 10000
+            )
+
+        @timed("TableWorkspace.load_data")
         def load_data(self, fields: list, records: list):
             """加载字段和记录到表格"""
+            self.set_table(SceneTable.from_records(fields, records))
+            self.loaded_stamp = None
+
+        @timed("TableWorkspace.set_table")
+        def set_table(self, table: SceneTable):
+            """用类型化场景表替换当前模型"""
             if not self.table_view:
                 return
 
-            self.model = QStandardItemModel()
-            self.model.setHorizontalHeaderLabels(fields)
+            self.model = SceneTableModel(table, self)
+            self.model.validation_failed.connect(self.on_validation_failed)
+            self.model.dataChanged.connect(self.on_model_data_changed)
+            self.model.rowsInserted.connect(self.on_rows_changed)
+            self.model.rowsRemoved.connect(self.on_rows_changed)
+            self.model.rowsMoved.connect(self.on_rows_moved)
+            self.model.columnsInserted.connect(self.on_columns_inserted)
+            for signal in (self.model.columnsRemoved, self.model.columnsMoved):
+                signal.connect(self.on_layout_changed)
+            if self.page_window is None:  # 分页浏览只有部分行，查找列与唯一性等规则无法计算
+                self.refresh_lookups()
+                self.model.validator = SceneValidator(table)
+                self.run_validation()
+            self.table_view.setModel(self.model)
+            self.table_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+            self.dirty = False
+            self.refresh_stats()
 
-            for rec in records:
-                row = [QStandardItem(str(rec.get(f, ""))) for f in fields]
-                self.model.appendRow(row)
+        @timed("TableWorkspace.run_validation")
+        def run_validation(self) -> int:
+            """整表按列批量校验，返回不合规单元格数"""
+            if not self.model or self.model.validator is None:
+                return 0
+            count = self.model.validator.validate_all()
+            self.table_view.viewport().update()
+            return count
 
-            self.table_view.setModel(self.model)
+        def sort_by_column(self, column: int, order):
+            if self.page_window is not None:
+                return  # 分页浏览只读，不重排
+            if self.model and column >= 0:
+                self.model.sort(column, order)
+                self.dirty = True
+                self.run_validation()  # 行号变化，校验结果按行缓存
 
-        def save_table(self):
+        def on_model_data_changed(self, top_left, bottom_right, roles=()):
+            """编辑只使被改动列的统计失效"""
+            if not self.updating_lookups:
+                self.dirty = True
+            names = self.model.table.names[top_left.column():bottom_right.column() + 1]
+            self.stats_cache.invalidate(self.current_scene_name, names)
+            self.refresh_stats()
+            if self.model.validator is not None:
+                top, bottom = top_left.row(), bottom_right.row()
+                rows = range(top, bottom + 1) if bottom - top < 1000 else None  # 大块粘贴直接整列校验
+                self.model.validator.revalidate(range(top_left.column(), bottom_right.column() + 1), rows)
+            if not self.updating_lookups and self.page_window is None:
+                # 匹配字段被编辑（或查找列被粘贴覆盖）：只重算这些行
+                top, bottom = top_left.row(), bottom_right.row()
+                cols = set(lookup_columns(self.model.table, match_names=names))
+                cols.update(c for c in lookup_columns(self.model.table) if top_left.column() <= c <= bottom_right.column())
+                self.refresh_lookups(cols=cols, rows=range(top, bottom + 1))
+
+        def on_rows_changed(self, *args):
+            """插入 / 删除行：各列统计都可能变化"""
+            self.dirty = True
+            self.stats_cache.invalidate(self.current_scene_name)
+            self.refresh_stats()
+            self.run_validation()
+
+        def on_rows_moved(self, *args):
+            self.dirty = True
+            self.run_validation()
+
+        def on_columns_inserted(self, parent, first: int, last: int):
+            """新列可能与删除过的列同名：丢弃该名称残留的统计缓存"""
+            self.stats_cache.invalidate(self.current_scene_name, self.model.table.names[first:last + 1])
+            self.on_layout_changed()
+
+        def on_layout_changed(self, *args):
+            """增删、移动列：统计按字段名缓存，校验结果按列对象缓存，只需清理已删除的列"""
+            self.dirty = True
+            self.refresh_stats()
+            if self.model.validator is not None:
+                self.model.validator.prune()
+
+        # ===================== 查找列 =====================
+        def refresh_lookups(self, scene: str = None, cols=None, rows=None):
+            """
+            重算查找列：scene 只重算引用该场景的列，cols 指定列号，rows 只重算这些行
+            只对取值变化的行发出 dataChanged，不标记为未保存的编辑
+            """
+            main_window = self.window()
+            if not self.model or not hasattr(main_window, 'scenes'):
+                return  # 不在主窗口中（例如基准测试直接使用工作区）时没有可查找的场景
+            table = self.model.table
+            scenes = main_window.scenes
+            targets = lookup_columns(table, scene=scene) if cols is None else sorted(cols)
+            self.updating_lookups = True
+            try:
+                for col in targets:
+                    changed = compute_column(table, col, get_key_map(scenes, field_lookup(table.fields[col])), rows)
+                    if changed:
+                        self.model.dataChanged.emit(self.model.index(min(changed), col),
+                                                    self.model.index(max(changed), col))
+            finally:
+                self.updating_lookups = False
+
+        def on_other_scene_changed(self, scene_name: str):
+            """其他场景的数据文件被修改（外部程序或本程序保存）：更新引用它的查找列"""
+            if self.page_window is None and self.model and scene_name in lookup_targets(self.model.table.fields):
+                self.refresh_lookups(scene=scene_name)
+                self.shown_key = self.view_key()
+
+        def add_lookup_column(self):
+            """在当前列右侧添加跨场景查找列（基于目标场景已保存的数据）"""
+            if not self.model or not self._check_editable() or self.page_window is not None:
+                return
+            main_window = self.window()
+            table = self.model.table
+            match_names = [field_name(spec) for spec in table.fields if not field_lookup(spec)]
+            dialog = LookupFieldDialog(main_window.scenes, self.current_scene_name, match_names, table.names, self)
+            if not dialog.exec():
+                return
+            runs = self._selected_runs(1)
+            col = runs[0][0] + runs[0][1] if runs else self.model.columnCount()
+            self.model.insert_fields(col, [dialog.result_field])
+            self.refresh_lookups(cols=[col])
+            self.window().statusBar().showMessage(f"已添加查找列「{field_name(dialog.result_field)}」，保存后生效", 3000)
+
+        # ===================== 列统计 =====================
+        def toggle_stats(self, checked: bool):
+            self.stats_view.setVisible(checked)
+            self.refresh_stats()
+
+        def refresh_stats(self):
+            """统计面板可见时刷新；未失效的列直接使用缓存"""
+            if not self.stats_view or not self.btn_stats.isChecked() or not self.model:
+                return
+            if self.page_window is not None:
+                self.stats_view.setRowCount(0)  # 分页浏览时内存中只有部分行，统计没有意义
+                return
+            rows = self.stats_cache.get(self.current_scene_name, self.model.table)
+            self.stats_view.setRowCount(len(rows))
+            self.stats_view.setVerticalHeaderLabels([field_name(spec) for spec, _ in rows])
+            for r, (spec, stats) in enumerate(rows):
+                for c, key in enumerate(STAT_KEYS):
+                    value = stats[key]
+                    if value is None:
+                        text = "-"
+                    elif key in ("sum", "min", "max"):
+                        text = format_value(spec, value)
+                    elif key == "mean":
+                        text = f"{value:.4g}"
+                    else:
+                        text = str(value)
+                    self.stats_view.setItem(r, c, QTableWidgetItem(text))
+
+        def open_query_dialog(self):
+            """打开分组汇总视图（查询走 scene_query 流式引擎）"""
             main_window = self.window()
             if not hasattr(main_window, 'scenes'):
                 return
+            QueryDialog(main_window.scenes, self.current_scene_name, self).exec()
+
+        def on_validation_failed(self, message: str):
+            self.window().statusBar().showMessage(f"输入无效：{message}", 5000)
+
+        @timed("TableWorkspace.save_table")
+        def save_table(self):
+            main_window = self.window()
+            if not hasattr(main_window, 'scenes') or not self.model:
+                return
+            if self.page_window is not None:
+                main_window.statusBar().showMessage("分页浏览为只读模式，没有需要保存的修改", 3000)
+                return
+            validator = self.model.validator
+            if validator is not None and validator.count():
+                row, name, message = validator.first_error()
+                answer = QMessageBox.question(
+                    self, "存在不合规数据",
+                    f"有 {validator.count()} 个单元格不符合校验规则（如第 {row + 1} 行「{name}」：{message}）。仍然保存？"
+                )
+                if answer != QMessageBox.StandardButton.Yes:
+                    target = self.model.index(row, self.model.table.names.index(name))
+                    self.table_view.setCurrentIndex(target)
+                    self.table_view.scrollTo(target, QTableView.ScrollHint.PositionAtCenter)
+                    return
+
+            # 表格没有实体可合并：发现其他进程在加载后写过该场景时，由用户决定是否覆盖
+            path = get_scene_file(self.current_scene_name)
+            disk_stamp = get_scene_stamp(self.current_scene_name)
+            if self.loaded_stamp is not None and disk_stamp != self.loaded_stamp and not is_own_write(path):
+                answer = QMessageBox.question(
+                    self, "场景已被修改",
+                    f"场景「{self.current_scene_name}」在加载后被其他程序修改过，保存将覆盖这些修改。继续保存？"
+                )
+                if answer != QMessageBox.StandardButton.Yes:
+                    return
 
-            fields = [self.model.headerData(i, Qt.Orientation.Horizontal) for i in range(self.model.columnCount())]
-            records = []
-            for row in range(self.model.rowCount()):
-                rec = {fields[col]: self.model.item(row, col).text() for col in range(self.model.columnCount())}
-                records.append(rec)
+            # 取数据快照交给保存调度器在后台写入；写完后再更新文件戳、统计缓存与索引
+            scene_name, table = self.current_scene_name, self.model.table
+            main_window.save_coordinator.submit(
+                ("table", scene_name), table.copy, lambda snapshot: self._write_table(scene_name, snapshot),
+                on_saved=lambda stamp: self._on_table_saved(scene_name, table, stamp),
+            )
+            self.dirty = False
+            main_window.scenes[scene_name] = list(table.fields)
+            main_window.request_save_scenes()
+
+        @staticmethod
+        def _write_table(scene_name: str, table: SceneTable):
+            """后台线程：写入场景数据并返回新的文件戳"""
+            save_scene_table(scene_name, table)
+            return get_scene_stamp(scene_name)
 
-            save_records(self.current_scene_name, fields, records)
-            main_window.scenes[self.current_scene_name] = fields
-            from data_utils import save_scenes  # 延迟导入避免循环
-            save_scenes(main_window.scenes)
-            main_window.statusBar().showMessage(f"已保存场景：{self.current_scene_name}", 3000)
+        def _on_table_saved(self, scene_name: str, table: SceneTable, stamp):
+            if self.model is None or self.model.table is not table:
+                return  # 写入期间已切换场景或重新加载
+            self.loaded_stamp = stamp
+            self.shown_key = self.view_key()
+            self.stats_cache.restamp(scene_name, stamp)
+            # 写入期间又有编辑时，内存中的索引已与刚写入的文件不一致：不持久化，下次加载按需重建
+            if table.indexes is not None and not self.dirty:
+                table.indexes.save(stamp)
+            self.window().statusBar().showMessage(f"已保存场景：{scene_name}", 3000)
 
         # ===================== 通用操作实现 =====================
         def rename_current(self):
@@ -127,4 +546,486 @@ else:
         def clear_current(self):
             pass
 
-        # ... 其他方法如 toggle_edit_mode、import_csv 等可在此添加
\ No newline at end of file
+        # ===================== 编辑操作 =====================
+        def lock_edit(self):
+            self.edit_mode_locked = True
+            if self.table_view:
+                self.table_view.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+
+        def unlock_edit(self):
+            if self.page_window is not None:
+                self.window().statusBar().showMessage("分页浏览为只读模式，关闭分页后才能编辑", 3000)
+                return
+            self.edit_mode_locked = False
+            if self.table_view:
+                self.table_view.setEditTriggers(
+                    QTableView.EditTrigger.DoubleClicked | QTableView.EditTrigger.EditKeyPressed
+                    | QTableView.EditTrigger.AnyKeyPressed
+                )
+            self.window().statusBar().showMessage("已解锁编辑，输入将按字段类型校验", 2000)
+
+        # ===================== 分页浏览 =====================
+        def wants_paged(self, scene_name: str) -> bool:
+            """用户开启了分页，或 CSV 超过 SCENE_PAGED_THRESHOLD_BYTES（.scol 不支持分页）"""
+            if get_scene_storage(scene_name) != "csv":
+                return False
+            return scene_name in self.paged_scenes or self.auto_paged(scene_name)
+
+        @staticmethod
+        def auto_paged(scene_name: str) -> bool:
+            """CSV 是否大到默认以分页方式打开"""
+            if get_scene_storage(scene_name) != "csv":
+                return False
+            stamp = file_stamp(get_scene_file(scene_name))
+            return stamp is not None and stamp[1] > SCENE_PAGED_THRESHOLD_BYTES
+
+        def toggle_paged(self, checked: bool):
+            name = self.current_scene_name
+            if not name:
+                return
+            if checked and get_scene_storage(name) != "csv":
+                self.btn_paged.setChecked(False)
+                QMessageBox.information(self, "提示", "分页浏览只支持 CSV 存储的场景，请先在「存储格式」中转换")
+                return
+            if checked and self.dirty:
+                self.save_table()
+                if self.dirty:
+                    self.btn_paged.setChecked(False)
+                    return
+            if checked:
+                self.paged_scenes.add(name)
+            else:
+                self.paged_scenes.discard(name)
+            self.shown_key = None
+            self.refresh_ui()
+
+        def open_paged(self, scene_name: str, fields: list, page: int = 0):
+            """后台读取（必要时建立）页偏移索引，完成后显示第 page 页"""
+            self.lock_edit()
+            self.close_paged()
+            self.set_table(SceneTable(fields))
+            self.btn_paged.setChecked(True)
+            self.page_bar.setVisible(True)
+            self.page_label.setText("正在建立分页索引…")
+
+            def apply(meta):
+                if scene_name != self.current_scene_name or not self.btn_paged.isChecked():
+                    return
+                self.page_window = PageWindow(scene_name, fields, meta)
+                self.loaded_stamp = tuple(meta["stamp"]) if meta["stamp"] else None
+                self.shown_key = self.view_key()
+                self.page_spin.blockSignals(True)
+                self.page_spin.setMaximum(max(1, self.page_window.page_count))
+                self.page_spin.blockSignals(False)
+                self.show_page(page)
+
+            run_in_background(load_page_index, scene_name, on_done=apply,
+                              on_error=lambda message: self.page_label.setText(f"建立分页索引失败：{message}"))
+
+        def close_paged(self):
+            self.page_window = None
+            if self.page_bar:
+                self.page_bar.setVisible(False)
+                self.btn_paged.setChecked(False)
+
+        def show_page(self, page: int):
+            """切换到第 page 页：已常驻则直接显示，否则后台读取；同时预读相邻页"""
+            window = self.page_window
+            if window is None or not window.page_count:
+                if window is not None:
+                    self.page_label.setText("共 0 行")
+                return
+            missing = window.move_to(page)
+            table = window.pages.get(window.current)
+            if table is not None:
+                self._display_page(window, window.current, table)
+            else:
+                self.page_label.setText(f"正在读取第 {window.current + 1} 页…")
+            for p in missing:
+                window.loading.add(p)
+                run_in_background(
+                    read_page, window.scene_name, window.meta, p, window.fields,
+                    on_done=lambda t, p=p: self._on_page_loaded(window, p, t),
+                    on_error=lambda message, p=p: self._on_page_failed(window, p, message),
+                )
+
+        def _on_page_loaded(self, window: PageWindow, page: int, table: SceneTable):
+            if self.page_window is not window or not window.put(page, table):
+                return  # 已退出分页、切换了场景，或该页已滑出窗口
+            if page == window.current:
+                self._display_page(window, page, table)
+            elif window.current in window.pages:
+                self._update_page_label(window)
+
+        def _on_page_failed(self, window: PageWindow, page: int, message: str):
+            window.loading.discard(page)
+            if self.page_window is window:
+                self.page_label.setText(f"读取第 {page + 1} 页失败：{message}")
+
+        def _display_page(self, window: PageWindow, page: int, table: SceneTable):
+            self.set_table(table)
+            self.model.row_offset = page * window.page_rows
+            self.page_spin.blockSignals(True)
+            self.page_spin.setValue(page + 1)
+            self.page_spin.blockSignals(False)
+            self._update_page_label(window)
+
+        def _update_page_label(self, window: PageWindow):
+            first = window.current * window.page_rows + 1
+            last = first + window.pages[window.current].row_count() - 1
+            self.page_label.setText(
+                f"第 {window.current + 1}/{window.page_count} 页（第 {first}～{last} 行），"
+                f"共 {window.total_rows} 行，内存中 {len(window.pages)} 页"
+            )
+
+        # ===================== 剪贴板 =====================
+        def _selection_ranges(self) -> list:
+            """选区的 (上, 左, 下, 右) 列表；没有选区时取当前单元格"""
+            ranges = [(r.top(), r.left(), r.bottom(), r.right())
+                      for r in self.table_view.selectionModel().selection()]
+            if not ranges:
+                current = self.table_view.currentIndex()
+                if current.isValid():
+                    ranges = [(current.row(), current.column(), current.row(), current.column())]
+            return ranges
+
+        def _check_editable(self) -> bool:
+            if self.edit_mode_locked:
+                self.window().statusBar().showMessage("当前为锁定状态，请先解锁编辑", 3000)
+                return False
+            return True
+
+        @timed("TableWorkspace.copy_selection")
+        def copy_selection(self) -> bool:
+            """复制选区为 TSV；多个选区时复制它们涉及的行与列的交叉部分"""
+            if not self.model:
+                return False
+            ranges = self._selection_ranges()
+            if not ranges:
+                return False
+            if len(ranges) == 1:
+                top, left, bottom, right = ranges[0]
+                rows, cols = range(top, bottom + 1), range(left, right + 1)
+            else:
+                rows = sorted({r for top, _, bottom, _ in ranges for r in range(top, bottom + 1)})
+                cols = sorted({c for _, left, _, right in ranges for c in range(left, right + 1)})
+            try:
+                text = selection_to_tsv(self.model.table, rows, cols)
+            except ValueError as e:
+                QMessageBox.warning(self, "无法复制", str(e))
+                return False
+            QApplication.clipboard().setText(text)
+            self.window().statusBar().showMessage(f"已复制 {len(rows)} 行 × {len(cols)} 列", 3000)
+            return True
+
+        def cut_selection(self):
+            """复制后清空选区（只支持单个连续区域）"""
+            if not self.model or not self._check_editable():
+                return
+            ranges = self._selection_ranges()
+            if len(ranges) != 1:
+                self.window().statusBar().showMessage("剪切只支持单个连续区域", 3000)
+                return
+            if not self.copy_selection():
+                return
+            top, left, bottom, right = ranges[0]
+            self.model.set_block(top, left, [[None] * (bottom - top + 1) for _ in range(left, right + 1)])
+
+        @timed("TableWorkspace.paste_clipboard")
+        def paste_clipboard(self):
+            """
+            从选区左上角开始粘贴 TSV：整块按列类型校验通过后一次写入（一次 dataChanged）
+            超出表格行列范围的部分丢弃
+            """
+            if not self.model or not self._check_editable():
+                return
+            ranges = self._selection_ranges()
+            if not ranges:
+                return
+            top, left = min(r[0] for r in ranges), min(r[1] for r in ranges)
+            table = self.model.table
+            try:
+                block, rows, dropped_rows, dropped_cols = parse_tsv_block(
+                    QApplication.clipboard().text(), table.fields[left:], table.row_count() - top
+                )
+            except ValueError as e:
+                QMessageBox.warning(self, "无法粘贴", str(e))
+                return
+            if not rows:
+                return
+            self.model.set_block(top, left, block)
+
+            selection = QItemSelection(self.model.index(top, left),
+                                       self.model.index(top + rows - 1, left + len(block) - 1))
+            self.table_view.selectionModel().select(selection, QItemSelectionModel.SelectionFlag.ClearAndSelect)
+            message = f"已粘贴 {rows} 行 × {len(block)} 列"
+            if dropped_rows or dropped_cols:
+                message += f"（超出表格范围：{dropped_rows} 行、{dropped_cols} 列未粘贴）"
+            self.window().statusBar().showMessage(message, 5000)
+
+        def select_all(self):
+            if self.table_view:
+                self.table_view.selectAll()
+
+        # ===================== 行列结构 =====================
+        def _selected_runs(self, axis: int) -> list:
+            """选区涉及的行（axis=0）或列（axis=1）合并为连续区间 [(起点, 数量)]，从后往前排列"""
+            spans = sorted((r[axis], r[axis + 2]) for r in self._selection_ranges())
+            runs = []
+            for start, end in spans:
+                if runs and start <= runs[-1][1] + 1:
+                    runs[-1][1] = max(runs[-1][1], end)
+                else:
+                    runs.append([start, end])
+            return [(start, end - start + 1) for start, end in reversed(runs)]
+
+        def insert_rows(self):
+            """在选区上方插入 N 个空行（没有选区时追加到末尾）"""
+            if not self.model or not self._check_editable():
+                return
+            count, ok = QInputDialog.getInt(self, "插入行", "插入行数：", 1, 1, 1000000)
+            if not ok:
+                return
+            runs = self._selected_runs(0)
+            row = runs[-1][0] if runs else self.model.rowCount()
+            self.model.insertRows(row, count)
+            self.window().statusBar().showMessage(f"已插入 {count} 行", 3000)
+
+        def remove_selected_rows(self):
+            if not self.model or not self._check_editable():
+                return
+            runs = self._selected_runs(0)
+            total = sum(count for _, count in runs)
+            if not total:
+                return
+            answer = QMessageBox.question(self, "删除行", f"删除选中的 {total} 行？保存后生效")
+            if answer != QMessageBox.StandardButton.Yes:
+                return
+            for row, count in runs:  # 从后往前删，前面区间的行号不受影响
+                self.model.removeRows(row, count)
+            self.window().statusBar().showMessage(f"已删除 {total} 行", 3000)
+
+        def move_selected_rows(self, step: int):
+            """选中的连续行整体上移 / 下移一行"""
+            if not self.model or not self._check_editable():
+                return
+            runs = self._selected_runs(0)
+            if len(runs) != 1:
+                self.window().statusBar().showMessage("请选中一段连续的行", 3000)
+                return
+            row, count = runs[0]
+            dest = row - 1 if step < 0 else row + count + 1
+            if not 0 <= dest <= self.model.rowCount() or not self.model.moveRows(
+                    QModelIndex(), row, count, QModelIndex(), dest):
+                return
+            self._select_block(row + step, count, 0)
+
+        def add_columns(self):
+            """在当前列右侧（没有选中时在末尾）添加 N 个文本字段"""
+            if not self.model or not self._check_editable():
+                return
+            count, ok = QInputDialog.getInt(self, "添加列", "添加列数：", 1, 1, 100)
+            if not ok:
+                return
+            prefix, ok = QInputDialog.getText(self, "添加列", "字段名前缀：", text="新字段")
+            prefix = prefix.strip()
+            if not ok or not prefix:
+                return
+            existing, specs, n = set(self.model.table.names), [], 1
+            while len(specs) < count:
+                name = f"{prefix}{n}"
+                if name not in existing:
+                    specs.append(name)
+                n += 1
+            runs = self._selected_runs(1)
+            col = runs[0][0] + runs[0][1] if runs else self.model.columnCount()
+            self.model.insert_fields(col, specs)
+            self.window().statusBar().showMessage(f"已添加 {count} 列，保存后生效", 3000)
+
+        def remove_selected_columns(self):
+            if not self.model or not self._check_editable():
+                return
+            runs = self._selected_runs(1)
+            names = [name for col, count in reversed(runs) for name in self.model.table.names[col:col + count]]
+            if not names:
+                return
+            if len(names) == self.model.columnCount():
+                self.window().statusBar().showMessage("场景至少需要保留一个字段", 3000)
+                return
+            answer = QMessageBox.question(self, "删除列", f"删除字段「{'、'.join(names)}」及其全部数据？保存后生效")
+            if answer != QMessageBox.StandardButton.Yes:
+                return
+            for col, count in runs:
+                self.model.removeColumns(col, count)
+            self.stats_cache.invalidate(self.current_scene_name, names)
+            self.window().statusBar().showMessage(f"已删除 {len(names)} 列", 3000)
+
+        def move_selected_columns(self, step: int):
+            if not self.model or not self._check_editable():
+                return
+            runs = self._selected_runs(1)
+            if len(runs) != 1:
+                self.window().statusBar().showMessage("请选中一段连续的列", 3000)
+                return
+            col, count = runs[0]
+            dest = col - 1 if step < 0 else col + count + 1
+            if not 0 <= dest <= self.model.columnCount() or not self.model.moveColumns(
+                    QModelIndex(), col, count, QModelIndex(), dest):
+                return
+            self._select_block(col + step, count, 1)
+
+        def _select_block(self, start: int, count: int, axis: int):
+            """移动后重新选中整行 / 整列区间"""
+            last_row, last_col = self.model.rowCount() - 1, self.model.columnCount() - 1
+            if axis == 0:
+                top_left, bottom_right = self.model.index(start, 0), self.model.index(start + count - 1, last_col)
+            else:
+                top_left, bottom_right = self.model.index(0, start), self.model.index(last_row, start + count - 1)
+            self.table_view.selectionModel().select(
+                QItemSelection(top_left, bottom_right), QItemSelectionModel.SelectionFlag.ClearAndSelect
+            )
+
+        def set_column_type(self):
+            """为当前列设置字段类型（int/float/date/enum/str），已有数据不符合时拒绝"""
+            if not self.model:
+                return
+            col = self.table_view.currentIndex().column()
+            if col < 0:
+                QMessageBox.information(self, "提示", "请先选中要设置类型的列")
+                return
+            spec = self.model.table.fields[col]
+            if field_lookup(spec):
+                QMessageBox.information(self, "提示", "查找列的内容来自其他场景，不能设置类型")
+                return
+            labels = [FIELD_TYPE_LABELS[t] for t in FIELD_TYPES]
+            label, ok = QInputDialog.getItem(
+                self, "设置列类型", f"字段「{field_name(spec)}」的类型：",
+                labels, FIELD_TYPES.index(field_type(spec)), False
+            )
+            if not ok:
+                return
+            ftype = FIELD_TYPES[labels.index(label)]
+            options = None
+            if ftype == "enum":
+                text, ok = QInputDialog.getText(
+                    self, "枚举可选值", "用逗号分隔：", text="，".join(field_options(spec))
+                )
+                if not ok:
+                    return
+                options = [o.strip() for o in text.replace("，", ",").split(",") if o.strip()]
+            try:
+                self.model.retype_column(col, update_field(spec, type=ftype, options=options))
+            except ValueError as e:
+                QMessageBox.warning(self, "无法转换", str(e))
+                return
+            if self.model.validator is not None:
+                self.model.validator.prune()
+                self.model.validator.revalidate([col])
+            self.window().statusBar().showMessage(f"已将「{field_name(spec)}」设为{label}，保存后生效", 3000)
+
+        def set_column_rules(self):
+            """编辑当前列的校验规则，保存后写入 scenes.json"""
+            if not self.model:
+                return
+            col = self.table_view.currentIndex().column()
+            if col < 0:
+                QMessageBox.information(self, "提示", "请先选中要设置规则的列")
+                return
+            spec = self.model.table.fields[col]
+            dialog = FieldRulesDialog(spec, self)
+            if not dialog.exec():
+                return
+            self.model.table.fields[col] = update_field(spec, rules=dialog.result_rules or None)
+            self.dirty = True
+            message = f"已更新「{field_name(spec)}」的校验规则，保存后生效"
+            if self.model.validator is not None:
+                self.model.validator.revalidate([col])
+                self.table_view.viewport().update()
+                message += f"，当前 {self.model.validator.count()} 个单元格不合规"
+            self.window().statusBar().showMessage(message, 5000)
+
+        def set_column_index(self):
+            """为当前列声明二级索引（哈希 / 有序 / 无），保存后写入 scenes.json"""
+            if not self.model:
+                return
+            col = self.table_view.currentIndex().column()
+            if col < 0:
+                QMessageBox.information(self, "提示", "请先选中要建立索引的列")
+                return
+            spec = self.model.table.fields[col]
+            kinds = [None] + list(INDEX_KINDS)
+            labels = [INDEX_KIND_LABELS[k] for k in kinds]
+            label, ok = QInputDialog.getItem(
+                self, "设置索引", f"字段「{field_name(spec)}」的索引：",
+                labels, kinds.index(field_index(spec)), False
+            )
+            if not ok:
+                return
+            self.model.table.fields[col] = update_field(spec, index=kinds[labels.index(label)])
+            self.dirty = True  # 字段声明已改变：外部修改或刷新时不能直接重载丢掉它
+            self.window().statusBar().showMessage(f"已设置「{field_name(spec)}」索引：{label}，保存后生效", 3000)
+
+        def find_row(self):
+            """按字段值查找并跳转到首个匹配行（有索引时 O(1) / O(log n)）"""
+            if not self.model or self.model.table.indexes is None:
+                return
+            table = self.model.table
+            col = self.table_view.currentIndex().column()
+            names = table.names
+            indexed = [n for n in names if n in table.indexes.declared()]
+            default = names[col] if col >= 0 else (indexed[0] if indexed else names[0])
+            name, ok = QInputDialog.getItem(self, "查找定位", "字段：", names, names.index(default), False)
+            if not ok:
+                return
+            text, ok = QInputDialog.getText(self, "查找定位", f"「{name}」的值：")
+            if not ok:
+                return
+            try:
+                rows = table.indexes.lookup(name, text)
+            except ValueError as e:
+                QMessageBox.warning(self, "查找失败", str(e))
+                return
+            if not rows:
+                self.window().statusBar().showMessage(f"未找到「{name}」= {text}", 3000)
+                return
+            target = self.model.index(rows[0], names.index(name))
+            self.table_view.setCurrentIndex(target)
+            self.table_view.scrollTo(target, QTableView.ScrollHint.PositionAtCenter)
+            via = "索引" if name in indexed else "全表扫描"
+            self.window().statusBar().showMessage(f"找到 {len(rows)} 行（{via}），已定位到第 {rows[0] + 1} 行", 3000)
+
+        def set_storage_format(self):
+            """在 CSV 与二进制列式格式（.scol）之间切换当前场景的存储"""
+            if not self.model:
+                return
+            storages = ["csv", "binary"]
+            labels = ["CSV（通用文本）", "二进制列式（加载更快、体积更小）"]
+            current = get_scene_storage(self.current_scene_name)
+            label, ok = QInputDialog.getItem(
+                self, "存储格式", f"场景「{self.current_scene_name}」的存储格式：",
+                labels, storages.index(current), False
+            )
+            storage = storages[labels.index(label)] if ok else current
+            if storage == current:
+                return
+            if self.page_window is not None:
+                QMessageBox.information(self, "提示", "请先关闭分页浏览再转换存储格式")
+                return
+            if self.dirty:
+                self.save_table()
+                if self.dirty:
+                    return
+            self.window().save_coordinator.flush_now()  # 转换读取磁盘数据，先等待已登记的写入完成
+            try:
+                convert_scene_storage(self.current_scene_name, self.model.table.fields, storage)
+            except (OSError, ValueError, TimeoutError) as e:
+                QMessageBox.warning(self, "转换失败", str(e))
+                return
+            stamp = get_scene_stamp(self.current_scene_name)
+            self.loaded_stamp = stamp
+            self.stats_cache.restamp(self.current_scene_name, stamp)
+            if self.model.table.indexes is not None:
+                self.model.table.indexes.save(stamp)
+            self.window().statusBar().showMessage(f"已将场景「{self.current_scene_name}」转换为{label}", 3000)
+
+        # ... 其他方法如 import_csv 等可在此添加
\ No newline at end of file
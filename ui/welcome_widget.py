@@ -4,12 +4,15 @@
 """
 启动欢迎页面
 显示标题、简介和“开始使用”按钮，点击后切换到主界面
+首次绘制后利用空闲时间让主窗口预读首个场景并预构建主界面（PersonalDBGUI.prebuild）
 """
 import sys
+import time
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton
 from PyQt6.QtGui import QFont
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 
+import startup
 from config import PYQT6_AVAILABLE
 
 if not PYQT6_AVAILABLE:
@@ -22,6 +25,7 @@ else:
         """欢迎页面组件"""
         def __init__(self, parent=None):
             super().__init__(parent)
+            self.painted = False
             self.setStyleSheet("background-color: #f8f9fa;")
 
             layout = QVBoxLayout(self)
@@ -60,12 +64,24 @@ else:
 
             layout.addStretch(1)
 
+        def paintEvent(self, event):
+            super().paintEvent(event)
+            if not self.painted:
+                self.painted = True
+                startup.mark("first_paint")
+                # 回到事件循环后再开始预构建，不推迟欢迎页的显示
+                if hasattr(self.window(), 'prebuild'):
+                    QTimer.singleShot(0, self.window().prebuild)
+
         def start_app(self):
             """点击开始使用，切换到主界面"""
             main_window = self.window()
             # 只要父窗口有 build_ui 方法就执行，无需判断具体的类名
             if hasattr(main_window, 'build_ui'):
+                started = time.perf_counter()
+                prebuilt = getattr(main_window, '_ui_built', False)
                 main_window.build_ui()
                 # 确保 main_stack 和 main_container 存在后再切换
                 if hasattr(main_window, 'main_stack'):
-                    main_window.main_stack.setCurrentWidget(main_window.main_container)
\ No newline at end of file
+                    main_window.main_stack.setCurrentWidget(main_window.main_container)
+                startup.report_click(time.perf_counter() - started, prebuilt)
\ No newline at end of file